@@ -1,116 +1,212 @@
 import random
 import time
 import math
-from PyQt5.QtWidgets import QMenu
-from PyQt5.QtGui import QCursor
+from collections import deque, namedtuple
+from PyQt5.QtWidgets import QMenu, QShortcut
+from PyQt5.QtGui import QCursor, QKeySequence
 from PyQt5.QtCore import Qt, QTimer
+from physics import SwingPhysics
+from prediction import DragPredictor
+from events import THROWN
+
+# 菜单动作声明：key 用于分发与外部命令，checked 为返回当前勾选状态的函数（None 表示不可勾选），
+# 可勾选动作的 handler 接收新的勾选状态
+MenuAction = namedtuple("MenuAction", ["key", "label", "handler", "checked", "shortcut"], defaults=(None, None))
+MENU_SEPARATOR = None
+THROW_WINDOW = 0.2  # 抛掷速度估计使用的最近轨迹时长（秒）
 
 class BehaviorController:
-    def __init__(self, pet):
+    def __init__(self, pet, defer_menu=False):
+        """
+        Args:
+            pet: 宠物窗口
+            defer_menu: 为 True 时不立即注册快捷键，由 build_menu() 稍后完成
+        """
         self.pet = pet
         # 拖动相关
         self._drag_offset = None
         self._is_dragging = False
-        self._drag_history = []  # [(x, y, t), ...]
+        # 最近 THROW_WINDOW 秒的拖动轨迹 [(x, y, t), ...]，用于抛掷速度估计；
+        # 只按时间裁剪，不限制条数，保证估计结果与鼠标的事件频率无关
+        self._drag_history = deque()
+
+        # 鼠标输入合并：事件只记录最新样本，由主循环每帧统一应用
+        self._pending_mouse = None  # (global_x, global_y, buttons, t)
+        self._last_apply_time = 0.0  # 上次真正移动窗口的时间
+        self._min_move_interval = 1.0 / 60  # 两次窗口移动的最小间隔（秒），按屏幕刷新率更新
+
+        # 拖动延迟补偿（可选）：把宠物放在外推到下一帧的光标位置
+        self.predictive_drag_enabled = False
+        self._drag_predictor = DragPredictor()
 
-        self._swing_angle = 0
-        self._swing_speed = 0
-        self._swing_damping = 0.90  # 降低阻尼系数，使摆动更持久
-        self._max_swing_angle = 25  # 增加最大晃动角度
-        self._mouse_velocity = [0, 0]  # 鼠标速度 [vx, vy]
-        self._prev_mouse_pos = None  # 上一帧鼠标位置
-        self._prev_time = time.time()  # 上一帧时间
+        # 拎起状态的摆动（阻尼摆，按帧时钟推进）
+        self._swing = SwingPhysics(max_angle=25)
+        self._lift_anchor = None  # 拎起时的鼠标锚点 (x, y)
+        self._prev_mouse_pos = None  # 上一个样本的鼠标位置
+        self._prev_time = time.monotonic()  # 上一个样本的时间
+
+        # 右键菜单：由动作注册表构建一次，之后只刷新勾选状态
+        self._actions = self._build_action_registry()
+        self._action_table = {a.key: a for a in self._actions if a is not MENU_SEPARATOR}
+        self._context_menu = None
+        self._menu_checked = {}  # 菜单上当前显示的勾选状态缓存
+        self._menu_labels = {}  # 动态菜单项当前显示的文本缓存
+        self._shortcuts = []
+        if not defer_menu:
+            self._install_shortcuts()
     
     @property
     def is_dragging(self):
         return self._is_dragging
     
+    @property
+    def has_pending_input(self):
+        """是否有尚未应用的鼠标样本"""
+        return self._pending_mouse is not None
+    
     def on_mouse_press(self, event):
         """处理鼠标按下事件"""
         if event.button() == Qt.LeftButton:
             self._drag_offset = event.globalPos() - self.pet.frameGeometry().topLeft()
             self._is_dragging = True
             self._drag_history.clear()
+            self._pending_mouse = None
+            self._drag_predictor.reset()
+            self._update_refresh_interval()
             # 停止当前速度，避免拖拽时被物理影响
             self.pet.physics_system.stop_movement()
+            # 拖拽时立即切换到流畅的电源配置
+            self.pet.power_manager.evaluate()
         elif event.button() == Qt.RightButton:
             self.show_context_menu()
     
+    def _update_refresh_interval(self):
+        """根据当前屏幕刷新率更新窗口移动的最小间隔"""
+        scr = self.pet.screen()
+        rate = scr.refreshRate() if scr is not None else 0
+        if not rate or rate < 1:
+            rate = 60.0
+        self._min_move_interval = 1.0 / rate
+
     def on_mouse_move(self, event):
-        """处理鼠标移动事件"""
-        current_time = time.time()
+        """处理鼠标移动事件（只记录样本，不直接移动窗口）"""
+        now = time.monotonic()
+        gx, gy = event.globalX(), event.globalY()
+        self._pending_mouse = (gx, gy, int(event.buttons()), now)
+        
+        # 拖动时记录轨迹（保留所有样本，抛掷估计更准确）
+        if event.buttons() & Qt.LeftButton and self._drag_offset is not None:
+            self._drag_history.append((gx - self._drag_offset.x(), gy - self._drag_offset.y(), now))
+            # 只保留最近 THROW_WINDOW 秒的样本
+            cutoff = now - THROW_WINDOW
+            while self._drag_history and self._drag_history[0][2] < cutoff:
+                self._drag_history.popleft()
+        
+        # 距离上次移动已超过一帧时立即应用，避免引入额外的输入延迟；
+        # 否则留给主循环在本帧末尾统一应用
+        if now - self._last_apply_time >= self._min_move_interval:
+            self.flush_pending_input()
+    
+    def flush_pending_input(self, place_lifted=True):
+        """应用最新的鼠标样本（由主循环每帧调用一次）
+        
+        Args:
+            place_lifted: 拎起状态下是否立即放置宠物；主循环随后会在 update_lift() 中放置，
+                传 False 避免一帧内移动两次窗口
+        """
+        sample = self._pending_mouse
+        if sample is None:
+            return
+        self._pending_mouse = None
+        gx, gy, buttons, current_time = sample
+        self._last_apply_time = time.monotonic()
         dt = current_time - self._prev_time
-        # 检查是否处于lift状态，如果是，则跟随鼠标并添加晃动效果
-        if hasattr(self.pet, 'is_in_lift_state') and self.pet.is_in_lift_state:
-            current_mouse_pos = (event.globalX(), event.globalY())
+        old_pos = self.pet.pos()
+        # 检查是否处于lift状态，如果是，则更新锚点与鼠标速度，摆动由主循环推进
+        if self.pet.is_in_lift_state:
+            current_mouse_pos = (gx, gy)
             
             # 计算鼠标速度
             if self._prev_mouse_pos and dt > 0:
                 dx = current_mouse_pos[0] - self._prev_mouse_pos[0]
-                self._mouse_velocity[0] = dx / dt  # 水平速度
-            
-            # 更新摆动物理
-            self._update_swing(dt)
-            
-            # 计算摆动位移
-            swing_offset_x = math.sin(math.radians(self._swing_angle)) * 30  # 增加摆动幅度的乘数，从15增加到30
-            
-            # 计算目标位置，考虑摆动偏移
-            target_x = int(event.globalX() - self.pet.width() // 2 + swing_offset_x)
-            target_y = int(event.globalY() - self.pet.height() // 3)
-            
-            self.pet.move(target_x, target_y)
+                self._swing.mouse_vx = dx / dt  # 水平速度
             
-            # 更新朝向（根据摆动方向）
-            if self._swing_angle > 0:
-                self.pet.renderer.face_right(False)
-            elif self._swing_angle < 0:
-                self.pet.renderer.face_left(False)
+            self._lift_anchor = current_mouse_pos
+            if place_lifted:
+                self._place_lifted()
             
             # 保存当前鼠标位置和时间
             self._prev_mouse_pos = current_mouse_pos
             self._prev_time = current_time
-        elif event.buttons() & Qt.LeftButton and self._drag_offset is not None:
-            self.pet.move(event.globalPos() - self._drag_offset)
-            # 记录轨迹（限制长度与时间窗口）
-            now = time.monotonic()
-            self._drag_history.append((self.pet.x(), self.pet.y(), now))
-            # 保留最近 ~0.2 秒的样本
-            cutoff = now - 0.2
-            while len(self._drag_history) > 0 and self._drag_history[0][2] < cutoff:
-                self._drag_history.pop(0)
+        elif buttons & Qt.LeftButton and self._drag_offset is not None:
+            target_x = gx - self._drag_offset.x()
+            target_y = gy - self._drag_offset.y()
+            if self.predictive_drag_enabled:
+                self._drag_predictor.add_sample(target_x, target_y, current_time)
+                self.update_drag()
+            else:
+                self.pet.move(target_x, target_y)
         else:
             # 不在lift状态且未拖动时，重置摆动相关变量
             self._prev_mouse_pos = None
-            self._swing_angle = 0
-            self._swing_speed = 0
+            self._lift_anchor = None
+            self._swing.reset()
+        # 在鼠标事件中应用时不会经过主循环，气泡需要立即跟随，否则会落后一帧
+        if self.pet.pos() != old_pos:
+            self.pet.dialog_manager.update_bubble_positions()
     
-    def _update_swing(self, dt):
-        """更新摆动物理状态"""
-        # 根据鼠标水平速度影响摆动
-        mouse_influence = self._mouse_velocity[0] * 0.15  # 增加鼠标速度对摆动的影响系数
-        
-        # 计算恢复力（让摆动回到中心位置的力）
-        restoring_force = -self._swing_angle * 0.05  # 减小恢复力，使摆动更缓慢地回到中心
-        
-        # 更新摆动速度
-        self._swing_speed += (mouse_influence + restoring_force) * dt
-        
-        # 应用阻尼
-        self._swing_speed *= self._swing_damping
-        
-        # 更新摆动角度
-        self._swing_angle += self._swing_speed
+    def update_drag(self):
+        """延迟补偿模式下，把宠物放到预测的下一帧光标位置（由主循环每帧调用）"""
+        if not self.predictive_drag_enabled or not self._is_dragging or self._drag_offset is None:
+            return
+        # 画面在下一次合成时才显示，因此预测一帧之后的位置
+        pos = self._drag_predictor.predict(time.monotonic() + self._min_move_interval)
+        if pos is None:
+            return
+        x, y = int(round(pos[0])), int(round(pos[1]))
+        if x != self.pet.x() or y != self.pet.y():
+            self.pet.move(x, y)
+    
+    def set_predictive_drag_enabled(self, enabled):
+        """启用或禁用拖动延迟补偿"""
+        self.predictive_drag_enabled = enabled
+        self._drag_predictor.reset()
+    
+    def update_lift(self, dt):
+        """按帧推进拎起状态的摆动（鼠标静止时也会继续衰减）"""
+        if self._lift_anchor is None:
+            self._lift_anchor = (self.pet.x() + self.pet.width() // 2,
+                                 self.pet.y() + self.pet.height() // 3)
+        self._swing.step(dt)
+        self._place_lifted()
+    
+    def _place_lifted(self):
+        """根据锚点和当前摆角放置宠物"""
+        angle = self._swing.angle
+        # 计算摆动位移
+        swing_offset_x = math.sin(math.radians(angle)) * 30
         
-        # 限制最大角度
-        self._swing_angle = max(-self._max_swing_angle, min(self._max_swing_angle, self._swing_angle))
+        # 计算目标位置，考虑摆动偏移
+        target_x = int(self._lift_anchor[0] - self.pet.width() // 2 + swing_offset_x)
+        target_y = int(self._lift_anchor[1] - self.pet.height() // 3)
+        if target_x != self.pet.x() or target_y != self.pet.y():
+            self.pet.move(target_x, target_y)
         
-        # 逐渐减小鼠标速度影响（摩擦）
-        self._mouse_velocity[0] *= 0.8  # 减小摩擦系数，使鼠标速度影响更持久
+        # 更新朝向（根据摆动方向）
+        if angle > 0.5:
+            self.pet.renderer.face_right(False)
+        elif angle < -0.5:
+            self.pet.renderer.face_left(False)
     
     def on_mouse_release(self, event):
         """处理鼠标释放事件"""
         if event.button() == Qt.LeftButton:
+            # 先应用尚未处理的最后一个样本，保证松手位置准确
+            self.flush_pending_input()
+            # 延迟补偿模式下松手时回到真实位置，避免预测的超调
+            if self.predictive_drag_enabled and self._drag_history:
+                x, y, _ = self._drag_history[-1]
+                self.pet.move(x, y)
             self._drag_offset = None
             # 抛掷速度估计
             vx_tick, vy_per_sec = self._estimate_throw_velocity()
@@ -128,74 +224,173 @@ class BehaviorController:
                 # 抛掷后短暂禁用摩擦，避免瞬间被摩擦拉回慢速
                 self.pet.speed_controller.set_friction_cooldown()
                 self.pet.speed_controller.thrown_recently = True
+                self.pet.events.publish(THROWN, vx_tick)
                 # 启动对话框交互
                 self.pet.register_interaction()
             self._is_dragging = False
+            self.pet.power_manager.evaluate()
+    
+    def _build_action_registry(self):
+        """声明右键菜单、快捷键和外部命令共用的动作表"""
+        pet = self.pet
+        return [
+            MenuAction("bigger", "变大", lambda: pet.increase_scale(0.1), shortcut="Ctrl+="),
+            MenuAction("smaller", "变小", lambda: pet.decrease_scale(0.1), shortcut="Ctrl+-"),
+            MenuAction("reset_scale", "重置大小", pet.reset_scale, shortcut="Ctrl+0"),
+            MENU_SEPARATOR,
+            MenuAction("start_walk", "开始行走", lambda: pet.start_walk(), shortcut="W"),
+            MenuAction("stop_walk", "停止行走", pet.stop_walk, shortcut="S"),
+            MenuAction("jump", "跳跃", pet.jump, shortcut="Space"),
+            MENU_SEPARATOR,
+            MenuAction("toggle_random_speed", "切换随机速度",
+                       lambda: pet.enable_random_speed(not pet.speed_controller.random_speed_enabled)),
+            MenuAction("randomize_speed_once", "随机变化一次", lambda: pet.speed_controller.randomize_speed_once()),
+            MENU_SEPARATOR,
+            MenuAction("place_ground", "随机放置（任务栏上）", lambda: pet._place_random_in_available_area(on_ground=True)),
+            MenuAction("place_free", "随机放置（屏幕上）", lambda: pet._place_random_in_available_area(on_ground=False)),
+            MENU_SEPARATOR,
+            MenuAction("face_left", "面向左", lambda: pet.renderer.face_left(True)),
+            MenuAction("face_right", "面向右", lambda: pet.renderer.face_right(True)),
+            MenuAction("quit", "退出", pet.close, shortcut="Ctrl+Q"),
+            MENU_SEPARATOR,
+            MenuAction("show_dialog", "显示对话", self._show_dialog_from_menu, shortcut="D"),
+            MenuAction("auto_dialog", "启用自动对话", self._set_auto_dialog,
+                       checked=lambda: pet.dialog_manager.auto_trigger_enabled),
+            MENU_SEPARATOR,
+            MenuAction("save_settings", "保存当前设置", lambda: pet._save_settings(wait=True), shortcut="Ctrl+S"),
+            MenuAction("save_snapshot", "保存快照", lambda path=None: pet.save_snapshot(path)),
+            MenuAction("load_snapshot", "恢复快照", lambda path=None: pet.load_snapshot(path)),
+            MenuAction("predictive_drag", "拖动延迟补偿", self.set_predictive_drag_enabled,
+                       checked=lambda: self.predictive_drag_enabled),
+            MenuAction("power_profile", lambda: "电源模式：" + pet.power_manager.describe(), self._set_power_profile),
+            MenuAction("profiler", "帧耗时分析", pet.set_profiling, checked=lambda: "user" in pet.profiler.holders),
+            MenuAction("dump_profile", "导出帧耗时分析", lambda path=None: pet.dump_profile(path)),
+            MenuAction("debug_hud", "调试信息", pet.set_debug_hud,
+                       checked=lambda: pet.debug_hud is not None and pet.debug_hud.isVisible()),
+        ]
+    
+    def _show_dialog_from_menu(self):
+        """菜单中的“显示对话”"""
+        self.pet.show_random_dialog()
+        self.pet.register_interaction()
+    
+    def _set_auto_dialog(self, checked):
+        """菜单中的“启用自动对话”"""
+        self.pet.dialog_manager.set_auto_trigger_enabled(checked)
+        self.pet._save_settings()
+    
+    def _set_power_profile(self, name=None):
+        """菜单中的“电源模式”：不带参数时依次切换，外部命令可指定配置名"""
+        if name is None:
+            self.pet.power_manager.cycle_preference()
+        else:
+            self.pet.power_manager.set_preference(name)
+        self.pet._save_settings()
+    
+    def _install_shortcuts(self):
+        """为声明了快捷键的动作注册键盘快捷键"""
+        for action in self._actions:
+            if action is MENU_SEPARATOR or not action.shortcut:
+                continue
+            shortcut = QShortcut(QKeySequence(action.shortcut), self.pet)
+            shortcut.activated.connect(lambda key=action.key: self.run_command(key))
+            self._shortcuts.append(shortcut)
+    
+    @staticmethod
+    def _menu_label(action):
+        """菜单项文本；label 可以是返回文本的函数（显示动态状态）"""
+        label = action.label() if callable(action.label) else action.label
+        # 快捷键只作为提示显示，实际由 QShortcut 触发，避免与菜单内的快捷键冲突
+        return label + "\t" + action.shortcut if action.shortcut else label
+    
+    def build_menu(self):
+        """注册快捷键并构建右键菜单（快速启动时在首次绘制后调用）"""
+        if not self._shortcuts:
+            self._install_shortcuts()
+        if self._context_menu is None:
+            self._build_context_menu()
+    
+    def _build_context_menu(self):
+        """根据动作表构建右键菜单（只构建一次）"""
+        menu = QMenu(self.pet)
+        self._menu_labels = {}
+        for action in self._actions:
+            if action is MENU_SEPARATOR:
+                menu.addSeparator()
+                continue
+            label = self._menu_label(action)
+            qaction = menu.addAction(label)
+            qaction.setData(action.key)
+            if action.checked is not None:
+                qaction.setCheckable(True)
+            if callable(action.label):
+                self._menu_labels[action.key] = label
+        self._context_menu = menu
+        self._menu_checked = {}
+    
+    def _refresh_menu_bindings(self):
+        """只在绑定的状态变化时更新菜单上的勾选状态和动态文本"""
+        for qaction in self._context_menu.actions():
+            key = qaction.data()
+            action = self._action_table.get(key)
+            if action is None:
+                continue
+            if key in self._menu_labels:
+                label = self._menu_label(action)
+                if self._menu_labels[key] != label:
+                    qaction.setText(label)
+                    self._menu_labels[key] = label
+            if action.checked is None:
+                continue
+            value = bool(action.checked())
+            if self._menu_checked.get(key) != value:
+                qaction.setChecked(value)
+                self._menu_checked[key] = value
     
     def show_context_menu(self):
         """显示右键菜单"""
-        menu = QMenu(self.pet)
-        bigger_action = menu.addAction("变大")
-        smaller_action = menu.addAction("变小")
-        reset_action = menu.addAction("重置大小")
-        menu.addSeparator()
-        start_walk_action = menu.addAction("开始行走")
-        stop_walk_action = menu.addAction("停止行走")
-        jump_action = menu.addAction("跳跃")
-        menu.addSeparator()
-        toggle_random_speed_action = menu.addAction("切换随机速度")
-        randomize_speed_once_action = menu.addAction("随机变化一次")
-        menu.addSeparator()
-        random_place_ground_action = menu.addAction("随机放置（任务栏上）")
-        random_place_free_action = menu.addAction("随机放置（屏幕上）")
-        menu.addSeparator()
-        face_left_action = menu.addAction("面向左")
-        face_right_action = menu.addAction("面向右")
-        quit_action = menu.addAction("退出")
-        menu.addSeparator()
-        show_dialog_action = menu.addAction("显示对话")
-        toggle_auto_dialog_action = menu.addAction("启用自动对话")
-        toggle_auto_dialog_action.setCheckable(True)
-        toggle_auto_dialog_action.setChecked(True)  # 默认启用
-        menu.addSeparator()
-        save_size_action = menu.addAction("保存当前设置")
+        if self._context_menu is None:
+            self._build_context_menu()
+        self._refresh_menu_bindings()
+        
+        qaction = self._context_menu.exec_(QCursor.pos())
+        if qaction is None:
+            return
+        key = qaction.data()
+        action = self._action_table.get(key)
+        if action is None:
+            return
+        if action.checked is not None:
+            # Qt 已经切换了勾选状态，同步缓存后把新状态交给处理函数
+            self._menu_checked[key] = qaction.isChecked()
+            action.handler(qaction.isChecked())
+        else:
+            action.handler()
+        # 动作可能让宠物动起来（主循环可能因静止而停止）
+        self.pet.resume_tick()
     
+    def command_names(self):
+        """返回所有可用的命令名"""
+        return list(self._action_table.keys())
+    
+    def run_command(self, key, *args):
+        """按名称执行动作（供快捷键和外部调用使用）
         
-        action = menu.exec_(QCursor.pos())
+        可勾选的动作不带参数时切换状态，带参数时设置为指定状态。
         
-        if action == bigger_action:
-            self.pet.increase_scale(0.1)
-        elif action == smaller_action:
-            self.pet.decrease_scale(0.1)
-        elif action == reset_action:
-            self.pet.reset_scale()
-        elif action == start_walk_action:
-            self.pet.start_walk()
-        elif action == stop_walk_action:
-            self.pet.stop_walk()
-        elif action == jump_action:
-            self.pet.jump()
-        elif action == toggle_random_speed_action:
-            self.pet.enable_random_speed(not self.pet.speed_controller.random_speed_enabled)
-        elif action == randomize_speed_once_action:
-            self.pet.speed_controller.randomize_speed_once()
-        elif action == random_place_ground_action:
-            self.pet._place_random_in_available_area(on_ground=True)
-        elif action == random_place_free_action:
-            self.pet._place_random_in_available_area(on_ground=False)
-        elif action == face_left_action:
-            self.pet.renderer.face_left(True)
-        elif action == face_right_action:
-            self.pet.renderer.face_right(True)
-        elif action == quit_action:
-            self.pet.close()
-        elif action == show_dialog_action:
-            self.pet.show_random_dialog()
-            self.pet.register_interaction()
-        elif action == toggle_auto_dialog_action:
-            self.pet.dialog_manager.set_auto_trigger_enabled(action.isChecked())
-        elif action == save_size_action:
-            self.pet._save_settings()
+        Returns:
+            bool: 命令是否存在并已执行
+        """
+        action = self._action_table.get(key)
+        if action is None:
+            return False
+        if action.checked is not None:
+            checked = bool(args[0]) if args else not action.checked()
+            action.handler(checked)
+        else:
+            action.handler(*args)
+        self.pet.resume_tick()
+        return True
 
     def _estimate_throw_velocity(self):
         """估计抛掷速度"""
@@ -0,0 +1,103 @@
+"""拖动延迟补偿的测量脚本（不依赖Qt）
+
+用合成的鼠标事件流模拟拖动：事件按固定频率到达，窗口每帧移动一次，
+画面在下一次合成（一帧之后）才真正显示。对比直接使用最新样本与
+使用 DragPredictor 外推两种方式下，屏幕上宠物相对真实光标的滞后。
+
+用法：
+    python bench_drag.py [--frame-hz 60] [--event-hz 125 500 1000]
+"""
+import argparse
+import math
+import random
+
+from prediction import DragPredictor
+
+
+def _path_constant(t):
+    return 300.0 + 900.0 * t, 400.0
+
+
+def _path_circle(t):
+    a = 2 * math.pi * 0.8 * t
+    return 600.0 + 250.0 * math.cos(a), 400.0 + 250.0 * math.sin(a)
+
+
+def _path_fling(t):
+    # 加速甩动后急停
+    if t < 0.6:
+        return 200.0 + 2500.0 * t * t, 500.0 - 300.0 * t
+    return 200.0 + 2500.0 * 0.36, 500.0 - 180.0
+
+
+def _path_shaky(t, _rng=random.Random(7)):
+    x, y = _path_circle(t)
+    return x + _rng.uniform(-1.5, 1.5), y + _rng.uniform(-1.5, 1.5)
+
+
+PATHS = {
+    "constant": _path_constant,
+    "circle": _path_circle,
+    "fling": _path_fling,
+    "shaky": _path_shaky,
+}
+
+
+def simulate(path, event_hz, frame_hz, duration=1.2, predictive=False):
+    """返回每帧的 (误差像素, 光标速度) 列表"""
+    frame_dt = 1.0 / frame_hz
+    event_dt = 1.0 / event_hz
+    predictor = DragPredictor()
+    results = []
+    latest = None
+    next_event = 0.0
+    t_frame = frame_dt
+    while t_frame < duration:
+        # 本帧之前到达的所有事件
+        while next_event <= t_frame:
+            x, y = path(next_event)
+            latest = (x, y)
+            if predictive:
+                predictor.add_sample(x, y, next_event)
+            next_event += event_dt
+        photon = t_frame + frame_dt  # 合成器再延迟一帧才显示
+        if predictive:
+            shown = predictor.predict(photon)
+        else:
+            shown = latest
+        true_x, true_y = path(photon)
+        vx = (path(photon + 1e-3)[0] - path(photon - 1e-3)[0]) / 2e-3
+        vy = (path(photon + 1e-3)[1] - path(photon - 1e-3)[1]) / 2e-3
+        err = math.hypot(shown[0] - true_x, shown[1] - true_y)
+        results.append((err, math.hypot(vx, vy)))
+        t_frame += frame_dt
+    return results
+
+
+def perceived_lag_ms(results, min_speed=50.0):
+    """把位置误差换算成等效滞后时间（毫秒），只统计光标在移动的帧"""
+    lags = [err / speed * 1000.0 for err, speed in results if speed >= min_speed]
+    if not lags:
+        return 0.0
+    return sum(lags) / len(lags)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="拖动延迟补偿测量")
+    parser.add_argument("--frame-hz", type=float, default=60.0)
+    parser.add_argument("--event-hz", type=float, nargs="+", default=[125.0, 500.0, 1000.0])
+    args = parser.parse_args()
+
+    print(f"{'path':<10}{'event Hz':>10}{'base ms':>10}{'pred ms':>10}{'saved ms':>10}{'max err px':>12}")
+    for name, path in PATHS.items():
+        for hz in args.event_hz:
+            base = simulate(path, hz, args.frame_hz, predictive=False)
+            pred = simulate(path, hz, args.frame_hz, predictive=True)
+            base_ms = perceived_lag_ms(base)
+            pred_ms = perceived_lag_ms(pred)
+            max_err = max(err for err, _ in pred)
+            print(f"{name:<10}{hz:>10.0f}{base_ms:>10.1f}{pred_ms:>10.1f}{base_ms - pred_ms:>10.1f}{max_err:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
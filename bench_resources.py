@@ -0,0 +1,148 @@
+"""资源加载冷启动基准测试（不依赖Qt）
+
+把图片和配置打成 zip，对比三种读取方式准备好全部资源所需的时间：
+    extract     PyInstaller --onefile 的方式：每次启动先解压到新的临时目录，再从磁盘读取
+    archive     ArchiveResources：直接从压缩包读取字节，不写磁盘
+    filesystem  FileSystemResources：资源本来就在目录中（开发环境的基准）
+
+项目中有 assets/ 时使用真实资源，否则生成同等数量的 PNG 图片。
+安装了 PyQt5 时可以加 --decode 同时计入图片解码时间。
+
+用法：
+    python bench_resources.py [--runs 20] [--images 12] [--size 256] [--decode]
+"""
+import argparse
+import os
+import random
+import shutil
+import struct
+import tempfile
+import time
+import zipfile
+import zlib
+
+from resources import ArchiveResources, FileSystemResources, program_dir
+from util import percentile
+
+
+def _png(width, height, rng):
+    """生成带噪点的 RGBA PNG（噪点让压缩后的大小接近真实精灵图）"""
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+    row = bytes(rng.getrandbits(8) if i % 4 != 3 else 255 for i in range(width * 4))
+    raw = b"".join(b"\0" + row[y % 7:] + row[:y % 7] for y in range(height))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 6))
+            + chunk(b"IEND", b""))
+
+
+def collect_resources(images, size):
+    """返回 {相对名称: 字节}：真实资源优先，没有 assets/ 时生成图片"""
+    base = program_dir()
+    files = {}
+    for name in ("dialogs.json", "pic_asset.json"):
+        path = os.path.join(base, name)
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                files[name] = f.read()
+    assets = os.path.join(base, "assets")
+    if os.path.isdir(assets):
+        for entry in sorted(os.listdir(assets)):
+            path = os.path.join(assets, entry)
+            if os.path.isfile(path):
+                with open(path, "rb") as f:
+                    files[f"assets/{entry}"] = f.read()
+    if not any(name.startswith("assets/") for name in files):
+        rng = random.Random(42)
+        for i in range(images):
+            files[f"assets/sprite_{i:02d}.png"] = _png(size, size, rng)
+    return files
+
+
+def _decoder():
+    try:
+        from PyQt5.QtGui import QImage, QGuiApplication
+    except ImportError:
+        return None
+    app = QGuiApplication.instance() or QGuiApplication(["bench", "-platform", "offscreen"])
+
+    def decode(data):
+        image = QImage()
+        image.loadFromData(data)
+        return image
+    decode.app = app  # 保持引用
+    return decode
+
+
+def load_all(resources, names, decode):
+    for name in names:
+        data = resources.read_bytes(name)
+        if decode is not None and name.endswith((".png", ".gif")):
+            decode(data)
+
+
+def run_extract(archive, names, decode):
+    tmp = tempfile.mkdtemp(prefix="_MEI")
+    try:
+        start = time.perf_counter()
+        with zipfile.ZipFile(archive) as zf:
+            zf.extractall(tmp)
+        load_all(FileSystemResources(tmp), names, decode)
+        return (time.perf_counter() - start) * 1000.0
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def run_archive(archive, names, decode):
+    start = time.perf_counter()
+    load_all(ArchiveResources(archive), names, decode)
+    return (time.perf_counter() - start) * 1000.0
+
+
+def run_filesystem(directory, names, decode):
+    start = time.perf_counter()
+    load_all(FileSystemResources(directory), names, decode)
+    return (time.perf_counter() - start) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="资源加载冷启动基准测试")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--images", type=int, default=12, help="没有 assets/ 时生成的图片数量")
+    parser.add_argument("--size", type=int, default=256, help="生成图片的边长（像素）")
+    parser.add_argument("--decode", action="store_true", help="同时解码图片（需要 PyQt5）")
+    args = parser.parse_args()
+
+    decode = _decoder() if args.decode else None
+    if args.decode and decode is None:
+        print("未安装 PyQt5，只测量读取时间")
+
+    files = collect_resources(args.images, args.size)
+    names = sorted(files)
+    work = tempfile.mkdtemp(prefix="desktopet-bench-")
+    try:
+        directory = os.path.join(work, "dir")
+        archive = os.path.join(work, "resources.zip")
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name in names:
+                zf.writestr(name, files[name])
+                path = os.path.join(directory, *name.split("/"))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(files[name])
+
+        total = sum(len(data) for data in files.values())
+        print(f"{len(names)} 个资源，共 {total / 1024:.0f} KB，压缩包 {os.path.getsize(archive) / 1024:.0f} KB")
+        print(f"{'mode':<12}{'p50 ms':>10}{'p95 ms':>10}")
+        for mode, run, source in (("extract", run_extract, archive),
+                                  ("archive", run_archive, archive),
+                                  ("filesystem", run_filesystem, directory)):
+            times = sorted(run(source, names, decode) for _ in range(args.runs))
+            print(f"{mode:<12}{percentile(times, 50):>10.2f}{percentile(times, 95):>10.2f}")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
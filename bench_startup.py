@@ -0,0 +1,97 @@
+"""启动时间基准测试
+
+多次启动 main.py（--exit-after-startup），读取每次的启动报告，
+对比普通启动与快速启动的首次绘制时间（time-to-first-paint）。
+子进程使用临时主目录，不会读取或覆盖用户的 ~/.desktopet。默认先不计时地启动一次
+预热配置和精灵图缓存，两种模式都在热缓存下测量；--cold 时每次启动使用新的空主目录。
+
+用法：
+    python bench_startup.py [--runs 10] [--offscreen] [--phases] [--cold]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from util import percentile
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+def run_once(fast_start, offscreen, home, timeout=30.0):
+    """以 home 为主目录启动一次，返回 (启动报告, 进程总耗时毫秒)"""
+    fd, trace_path = tempfile.mkstemp(suffix=".json", prefix="desktopet-startup-")
+    os.close(fd)
+    env = dict(os.environ)
+    env["HOME"] = env["USERPROFILE"] = home
+    if offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    cmd = [sys.executable, MAIN, "--exit-after-startup", "--startup-trace", trace_path]
+    if fast_start:
+        cmd.append("--fast-start")
+    try:
+        start = time.perf_counter()
+        subprocess.run(cmd, env=env, timeout=timeout, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wall_ms = (time.perf_counter() - start) * 1000.0
+        with open(trace_path, "r", encoding="utf-8") as f:
+            return json.load(f), wall_ms
+    finally:
+        os.remove(trace_path)
+
+
+def summarize(values):
+    values = sorted(values)
+    return percentile(values, 50), percentile(values, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动时间基准测试")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--offscreen", action="store_true", help="使用 Qt offscreen 平台（无显示器环境）")
+    parser.add_argument("--phases", action="store_true", help="同时输出各阶段耗时的中位数")
+    parser.add_argument("--cold", action="store_true", help="每次启动使用新的空主目录（冷缓存）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="desktopet-home-") as shared_home:
+        if not args.cold:
+            # 预热：第一次启动会写入配置和精灵图缓存，不计入结果
+            run_once(False, args.offscreen, shared_home)
+        _bench(args, shared_home)
+
+
+def _run_timed(fast_start, args, shared_home):
+    """计时启动一次：热缓存时共用预热过的主目录，冷缓存时每次使用新的主目录"""
+    if not args.cold:
+        return run_once(fast_start, args.offscreen, shared_home)
+    with tempfile.TemporaryDirectory(prefix="desktopet-home-") as home:
+        return run_once(fast_start, args.offscreen, home)
+
+
+def _bench(args, shared_home):
+    print(f"{'mode':<8}{'first paint p50':>17}{'p95':>9}{'complete p50':>14}{'p95':>9}{'process p50':>13}")
+    for mode, fast_start in (("normal", False), ("fast", True)):
+        reports = []
+        walls = []
+        for _ in range(args.runs):
+            report, wall_ms = _run_timed(fast_start, args, shared_home)
+            reports.append(report)
+            walls.append(wall_ms)
+        paint = summarize([r["marks"]["first_paint"] for r in reports])
+        complete = summarize([r["marks"]["startup_complete"] for r in reports])
+        print(f"{mode:<8}{paint[0]:>17.1f}{paint[1]:>9.1f}{complete[0]:>14.1f}{complete[1]:>9.1f}"
+              f"{summarize(walls)[0]:>13.1f}")
+        if args.phases:
+            durations = {}
+            for report in reports:
+                for phase in report["phases"]:
+                    durations.setdefault((phase["depth"], phase["name"]), []).append(phase["duration_ms"])
+            for (depth, name), values in durations.items():
+                print(f"    {'  ' * depth}{name:<32}{summarize(values)[0]:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import json
+import marshal
+import hashlib
+import os
+import sys
+import threading
+from types import MappingProxyType
+
+from dialog_index import parse_cooldown, parse_weight
+from resources import get_resources, program_dir
+
+# 编译缓存格式版本，校验规则变化时需要递增
+CACHE_VERSION = 2
+
+DIALOGS_FILE = "dialogs.json"
+ASSETS_FILE = "pic_asset.json"
+
+DEFAULT_ASSET_CONFIG = {
+    "states": {
+        "default": "assets/扫地机器人.png",
+        "shache": "assets/brake.png"
+    },
+    "default_asset": "assets/扫地机器人.png"
+}
+DEFAULT_DIALOG_CONFIG = {
+    "dialogues": {},
+    "dialogues_move": {},
+    "dialogues_sleep": {}
+}
+
+_lock = threading.Lock()
+_loaded = {}  # 绝对路径（或压缩包中的资源标识） -> (mtime_ns, size, 冻结后的配置)
+
+
+def config_path(name):
+    """配置文件在磁盘上的路径（资源位于压缩包时为程序目录下的同名文件）"""
+    return get_resources().local_path(name) or os.path.join(program_dir(), name)
+
+
+def _load_packed(name, validate, default, strict):
+    """从压缩包中读取配置：直接解析内存中的字节，按资源标识在进程内共享"""
+    resources = get_resources()
+    signature = resources.signature(name)
+    if signature is None:
+        if strict:
+            raise FileNotFoundError(name)
+        return _freeze(validate(default))
+    with _lock:
+        entry = _loaded.get(signature)
+        if entry is not None:
+            return entry[2]
+    try:
+        data = validate(json.loads(resources.read_bytes(name).decode("utf-8")))
+    except Exception as e:
+        if strict:
+            raise
+        print(f"加载配置失败 {name}: {e}")
+        return _freeze(validate(default))
+    frozen = _freeze(data)
+    with _lock:
+        _loaded[signature] = (None, None, frozen)
+    return frozen
+
+
+def cache_dir():
+    """编译缓存目录"""
+    return os.path.join(os.path.expanduser("~"), ".desktopet", "cache")
+
+
+def _cache_file(path):
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir(), f"{os.path.basename(path)}.{digest}.bin")
+
+
+def _freeze(value):
+    """把字典和列表递归转换为只读的 MappingProxyType 和元组"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _validate_dialogs(config):
+    """校验对话配置，返回只包含合法内容的普通字典
+
+    weight 不是非负整数或 cooldown 不是非负数时抛出 ValueError（热加载时保留原配置）
+    """
+    result = {}
+    for group in DEFAULT_DIALOG_CONFIG:
+        categories = config.get(group) if isinstance(config, dict) else None
+        if not isinstance(categories, dict):
+            result[group] = {}
+            continue
+        clean = {}
+        for category, entries in categories.items():
+            if not isinstance(entries, list):
+                continue
+            lines = []
+            for entry in entries:
+                if isinstance(entry, str):
+                    lines.append(entry)
+                elif isinstance(entry, dict) and isinstance(entry.get("text"), str):
+                    if "weight" in entry and parse_weight(entry["weight"]) is None:
+                        raise ValueError(f"{group}.{category}: weight 必须是非负整数: {entry['weight']!r}")
+                    if "cooldown" in entry and parse_cooldown(entry["cooldown"]) is None:
+                        raise ValueError(f"{group}.{category}: cooldown 必须是非负数: {entry['cooldown']!r}")
+                    lines.append({k: entry[k] for k in ("text", "weight", "cooldown") if k in entry})
+            clean[str(category)] = lines
+        result[group] = clean
+    return result
+
+
+def _validate_assets(config):
+    """校验图片资源配置，缺失的部分使用默认值"""
+    result = {}
+    states = config.get("states") if isinstance(config, dict) else None
+    if isinstance(states, dict):
+        result["states"] = {str(k): v for k, v in states.items() if isinstance(v, str)}
+    else:
+        result["states"] = dict(DEFAULT_ASSET_CONFIG["states"])
+    default_asset = config.get("default_asset") if isinstance(config, dict) else None
+    result["default_asset"] = default_asset if isinstance(default_asset, str) else DEFAULT_ASSET_CONFIG["default_asset"]
+    return result
+
+
+_VALIDATORS = {
+    DIALOGS_FILE: (_validate_dialogs, DEFAULT_DIALOG_CONFIG),
+    ASSETS_FILE: (_validate_assets, DEFAULT_ASSET_CONFIG),
+}
+
+
+def _read_cache(path, mtime_ns, size):
+    try:
+        with open(_cache_file(path), "rb") as f:
+            header, data = marshal.load(f)
+    except Exception:
+        return None
+    if header != (CACHE_VERSION, sys.version_info[:2], os.path.abspath(path), mtime_ns, size):
+        return None
+    return data
+
+
+def _write_cache(path, mtime_ns, size, data):
+    target = _cache_file(path)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(tmp, "wb") as f:
+            marshal.dump(((CACHE_VERSION, sys.version_info[:2], os.path.abspath(path), mtime_ns, size), data), f)
+        os.replace(tmp, target)
+    except Exception as e:
+        print(f"写入配置缓存失败: {e}")
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def load_config(name, path=None, strict=False):
+    """加载并校验配置文件，结果只读且在进程内共享
+
+    同一文件（路径、修改时间、大小都不变）只解析一次；
+    解析结果同时写入 ~/.desktopet/cache，下次启动时直接读取编译结果。
+
+    Args:
+        name: 配置文件名（DIALOGS_FILE 或 ASSETS_FILE）
+        path: 配置文件路径，默认为资源目录下的同名文件（资源位于压缩包时直接从压缩包读取）
+        strict: 为 True 时解析失败直接抛出异常，而不是退回默认配置（热加载时使用）
+    """
+    validate, default = _VALIDATORS[name]
+    if path is None and get_resources().local_path(name) is None:
+        return _load_packed(name, validate, default, strict)
+    path = os.path.abspath(path or config_path(name))
+    try:
+        st = os.stat(path)
+    except OSError:
+        if strict:
+            raise
+        # 配置文件不存在时创建默认配置文件
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(default, f, indent=2, ensure_ascii=False)
+            st = os.stat(path)
+        except OSError as e:
+            print(f"创建默认配置失败: {e}")
+            return _freeze(validate(default))
+
+    with _lock:
+        entry = _loaded.get(path)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[2]
+
+    data = _read_cache(path, st.st_mtime_ns, st.st_size)
+    if data is None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = validate(json.load(f))
+        except Exception as e:
+            if strict:
+                raise
+            print(f"加载配置失败 {os.path.basename(path)}: {e}")
+            return _freeze(validate(default))
+        _write_cache(path, st.st_mtime_ns, st.st_size, data)
+
+    frozen = _freeze(data)
+    with _lock:
+        _loaded[path] = (st.st_mtime_ns, st.st_size, frozen)
+    return frozen
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+from collections import deque
+
+# 本地控制服务：脚本通过 Unix 域套接字驱动宠物（负载测试、与其他程序集成）。
+#
+# 协议：每行一个 JSON 请求，可以是单条命令或命令列表（批量），每个请求回复一行 JSON。
+#     {"cmd": "jump"}
+#     [{"cmd": "start_walk", "args": [150, -1]}, {"cmd": "show_dialog", "args": ["你好"]}, {"cmd": "stats"}]
+# 回复：{"ok": true, "results": [...]}，单条命令出错时对应结果为 {"error": "..."}，不影响同一批中的其他命令。
+#
+# asyncio 事件循环运行在后台线程中，只负责收发；命令放入队列，
+# 由主循环在帧开始时统一执行（drain），不会在一帧的中途改变宠物状态。
+
+MAX_BATCH = 256  # 单个请求最多包含的命令数
+
+
+def default_socket_path():
+    """用户目录下的控制套接字路径"""
+    return os.path.join(os.path.expanduser("~"), ".desktopet", "control.sock")
+
+
+class ControlServer:
+    """后台线程中的 asyncio 控制服务，命令在主线程的帧边界执行"""
+
+    def __init__(self, pet, path=None, host="127.0.0.1", port=0):
+        """
+        Args:
+            pet: 宠物窗口
+            path: Unix 套接字路径；平台不支持 Unix 套接字时改为监听 host:port
+        """
+        self.pet = pet
+        self.path = path or default_socket_path()
+        self.host = host
+        self.port = port
+        self.pending = deque()  # 等待主线程执行的 (命令列表, future)
+        self.clients = 0
+        self.requests = 0
+        self.commands = 0
+        self.on_pending = None  # 有新命令排队时在后台线程中调用（用于唤醒停止的主循环）
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+        self._handlers = {
+            "start_walk": self._cmd_start_walk,
+            "stop_walk": lambda: pet.stop_walk(),
+            "jump": lambda: pet.jump(),
+            "show_dialog": self._cmd_show_dialog,
+            "scale": self._cmd_scale,
+            "place": self._cmd_place,
+            "face": self._cmd_face,
+            "stats": lambda: pet.stats(),
+            "commands": self._cmd_commands,
+        }
+
+    @property
+    def unix(self):
+        return hasattr(socket, "AF_UNIX") and hasattr(asyncio, "start_unix_server")
+
+    @property
+    def address(self):
+        """监听地址：Unix 套接字路径或 (host, port)"""
+        return self.path if self.unix else (self.host, self.port)
+
+    def start(self):
+        """启动后台线程并等待开始监听
+
+        Returns:
+            bool: 是否启动成功
+        """
+        self._thread = threading.Thread(target=self._run, name="ControlServer", daemon=True)
+        self._thread.start()
+        self._ready.wait(5.0)
+        if self._error is not None:
+            print(f"启动控制服务失败: {self._error}")
+            return False
+        return True
+
+    def stop(self):
+        """停止监听并结束后台线程，删除套接字文件"""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(2.0)
+            self._thread = None
+        # 未执行的命令不再回复（连接已随事件循环关闭）
+        self.pending.clear()
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._listen())
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            loop.close()
+            return
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._server.close()
+            for task in asyncio.all_tasks(loop):
+                task.cancel()
+            loop.run_until_complete(asyncio.sleep(0))
+            loop.close()
+            if self.unix:
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+
+    async def _listen(self):
+        if self.unix:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # 上次异常退出留下的套接字文件（仍有进程在监听时不抢占）
+            if os.path.exists(self.path):
+                probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    probe.connect(self.path)
+                except OSError:
+                    os.remove(self.path)
+                else:
+                    raise OSError(f"{self.path} 已被其他进程使用")
+                finally:
+                    probe.close()
+            self._server = await asyncio.start_unix_server(self._serve_client, path=self.path)
+            os.chmod(self.path, 0o600)
+        else:
+            self._server = await asyncio.start_server(self._serve_client, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    async def _serve_client(self, reader, writer):
+        self.clients += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = await self._handle_line(line)
+                writer.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    async def _handle_line(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return {"ok": False, "error": f"invalid JSON: {e}"}
+        batch = request if isinstance(request, list) else [request]
+        if not batch or len(batch) > MAX_BATCH:
+            return {"ok": False, "error": f"batch must contain 1-{MAX_BATCH} commands"}
+        future = self._loop.create_future()
+        self.requests += 1
+        self.pending.append((batch, future))
+        if self.on_pending is not None:
+            self.on_pending()
+        results = await future
+        return {"ok": True, "results": results}
+
+    def drain(self):
+        """在主线程执行排队的全部命令（由主循环在帧开始时调用）"""
+        while self.pending:
+            batch, future = self.pending.popleft()
+            results = [self._execute(command) for command in batch]
+            self.commands += len(batch)
+            try:
+                self._loop.call_soon_threadsafe(self._resolve, future, results)
+            except RuntimeError:
+                pass  # 事件循环已经停止
+
+    @staticmethod
+    def _resolve(future, results):
+        if not future.done():
+            future.set_result(results)
+
+    def _execute(self, command):
+        if not isinstance(command, dict) or not isinstance(command.get("cmd"), str):
+            return {"error": "command must be an object with a string 'cmd'"}
+        name = command["cmd"]
+        args = command.get("args", [])
+        if not isinstance(args, list):
+            args = [args]
+        handler = self._handlers.get(name)
+        try:
+            if handler is not None:
+                result = handler(*args)
+            elif not self.pet.run_command(name, *args):
+                return {"error": f"unknown command: {name}"}
+            else:
+                result = None
+        except Exception as e:
+            return {"error": f"{name}: {e}"}
+        return {"result": result}
+
+    # ===== 命令 =====
+    def _cmd_start_walk(self, speed_px_per_sec=150, direction=1):
+        self.pet.start_walk(float(speed_px_per_sec), -1 if direction < 0 else 1)
+
+    def _cmd_show_dialog(self, text=None, dialog_type=None, timeout=3000):
+        self.pet.show_dialog(text, dialog_type, int(timeout))
+
+    def _cmd_scale(self, factor):
+        self.pet.set_scale(float(factor))
+        return self.pet._scale_factor
+
+    def _cmd_place(self, x, y=None):
+        """x, y 为屏幕坐标；x 为 "ground" 或 "free" 时随机放置"""
+        if x in ("ground", "free"):
+            self.pet._place_random_in_available_area(on_ground=x == "ground")
+        else:
+            self.pet.move(int(x), int(y))
+        return [self.pet.x(), self.pet.y()]
+
+    def _cmd_face(self, direction):
+        if direction in ("left", -1):
+            self.pet.face_left()
+        elif direction in ("right", 1):
+            self.pet.face_right()
+        else:
+            raise ValueError(f"unknown direction: {direction!r}")
+
+    def _cmd_commands(self):
+        return sorted(set(self._handlers) | set(self.pet.behavior_controller.command_names()))
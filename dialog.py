@@ -1,134 +1,304 @@
 import time
-from PyQt5.QtWidgets import QDialog, QLabel, QVBoxLayout, QPushButton
-from PyQt5.QtCore import Qt, QTimer, QPoint
-from PyQt5.QtGui import QFont, QColor, QPainter, QBrush, QPen
+from PyQt5.QtWidgets import QDialog
+from PyQt5.QtCore import Qt, QPoint, QPointF, QSize
+from PyQt5.QtGui import QFont, QColor, QPainter, QBrush, QPen, QPolygon
 
 import random
-import json
-import os
-from util import IdleTimeTracker
+from collections import namedtuple
+from collections.abc import Mapping
+from events import ENTERED_IDLE, LEFT_GROUND, CLICKED
+from text_layout import TextLayoutCache
+from dialog_index import DialogIndex
+from config_loader import load_config, config_path, DIALOGS_FILE
+
+BUBBLE_FONT_FAMILY = "SimHei"
+BUBBLE_FONT_SIZE = 10
+BUBBLE_MAX_TEXT_WIDTH = 240  # 文本换行宽度（像素）
+BUBBLE_MARGINS = (20, 15, 20, 15)  # 左、上、右、下
+BUBBLE_TAIL = 10  # 指向宠物的小三角高度
+BUBBLE_GAP = 2  # 气泡尖端与宠物之间的距离
+
+# 气泡优先级：正在显示更高优先级的气泡时，低优先级的对话直接丢弃
+PRIORITY_AMBIENT = 0  # 自动触发、起飞、跳跃、睡觉等环境对话
+PRIORITY_REACTION = 1  # 点击互动的回应
+PRIORITY_MILESTONE = 2  # 点击里程碑
+PRIORITY_DIRECT = 3  # 用户或外部调用直接请求的对话
+
+# 排队等待显示的对话请求（文本在真正显示时才选择）
+DialogRequest = namedtuple("DialogRequest", ["text", "dialog_type", "timeout", "typing_speed", "priority", "time"])
+
 
 class SpeechBubble(QDialog):
-    """自定义对话框气泡组件，支持打字效果"""
-    def __init__(self, parent=None, text="", timeout=3000, typing_speed=100):
+    """自定义对话框气泡组件，支持打字效果
+
+    气泡由 BubblePool 复用：reset() 设置新文本并重新启动计时器，
+    结束后只隐藏并交还给对象池，不会反复创建窗口。
+    文本按缓存的排版结果直接绘制，打字效果只改变已显示的字符数，
+    由共享的 TypingScheduler 按帧推进。
+    """
+    def __init__(self, scheduler, parent=None, on_finished=None, font=None):
         super().__init__(parent)
         
         # 设置无边框、半透明背景
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
         self.setAttribute(Qt.WA_TranslucentBackground, True)
         
+        self._on_finished = on_finished  # 气泡结束时的回调（交还对象池）
+        self._font = font if font is not None else QFont(BUBBLE_FONT_FAMILY, BUBBLE_FONT_SIZE)
+        
         # 设置内容
-        self.full_text = text  # 完整文本
-        self.displayed_text = ""  # 当前显示的文本
-        self.timeout = timeout
-        self.typing_speed = typing_speed  # 打字速度（毫秒/字符）
-        self.current_char_index = 0  # 当前字符索引
-        self.typing_complete = False  # 打字是否完成
+        self.full_text = ""  # 完整文本
+        self.layout_info = None  # 文本排版结果（TextLayoutInfo）
+        self.timeout = 0
+        self.typing_speed = 0  # 打字速度（毫秒/字符）
+        self.revealed_chars = 0  # 已显示的字符数
+        self.typing_complete = True  # 打字是否完成
         
-        # 布局和样式
-        self.init_ui()
+        # 跟随宠物的位置缓存（由 DialogManager 每帧更新）
+        self._pos = None  # 上次移动到的位置 (x, y)
+        self._pointer_x = 0  # 小三角尖端在气泡内的x坐标
+        self._pointer_up = False  # 气泡在宠物下方时小三角朝上
         
-        # 自动关闭定时器
-        if timeout > 0:
-            self.timer = QTimer(self)
-            self.timer.setSingleShot(True)
-            self.timer.timeout.connect(self.close)
-            
-        # 打字效果定时器
-        if text and typing_speed > 0:
-            self.typing_timer = QTimer(self)
-            self.typing_timer.setInterval(typing_speed)
-            self.typing_timer.timeout.connect(self._update_typing)
-            self.typing_timer.start()
-        else:
+        # 自动关闭任务（调度器句柄）
+        self._scheduler = scheduler
+        self._close_handle = None
+    
+    def reset(self, text, layout_info, size, timeout=3000, typing_speed=100, font=None):
+        """用新文本重新启动气泡
+        
+        Args:
+            text: 完整文本
+            layout_info: 文本排版结果（TextLayoutInfo）
+            size: 气泡尺寸 QSize
+            timeout: 打字完成后自动关闭的时间（毫秒），<=0 表示不自动关闭
+            typing_speed: 打字速度（毫秒/字符），<=0 表示直接显示全文
+            font: 绘制文本的字体，与排版时使用的字体一致
+        """
+        self._scheduler.cancel(self._close_handle)
+        self._close_handle = None
+        self.full_text = text
+        self.layout_info = layout_info
+        self.timeout = timeout
+        self.typing_speed = typing_speed
+        self.resize(size)
+        self._pos = None
+        
+        if font is not None:
+            self._font = font
+        self.revealed_chars = 0
+        self.typing_complete = False
+        if not text or typing_speed <= 0:
             # 如果没有文本或者不需要打字效果，直接显示完整文本
-            self.displayed_text = text
-            self.label.setText(text)
+            self.set_revealed(len(text))
+        self.update()
+    
+    def set_revealed(self, count):
+        """设置已显示的字符数（由打字调度器调用）"""
+        total = len(self.full_text)
+        if count > total:
+            count = total
+        if count != self.revealed_chars:
+            self.revealed_chars = count
+            self.update()
+        if count >= total and not self.typing_complete:
             self.typing_complete = True
             # 启动自动关闭定时器
-            if timeout > 0:
-                self.timer.start(timeout)
-    
-    def init_ui(self):
-        # 创建标签显示文本
-        self.label = QLabel(self.displayed_text)
-        self.label.setFont(QFont("SimHei", 10))
-        self.label.setWordWrap(True)
-        self.label.setAlignment(Qt.AlignCenter)
-        
-        # 设置布局
-        layout = QVBoxLayout()
-        layout.addWidget(self.label)
-        layout.setContentsMargins(20, 15, 20, 15)
-        self.setLayout(layout)
-        
-        # 先使用完整文本估算大小，确保气泡足够大
-        temp_label = QLabel(self.full_text)
-        temp_label.setFont(QFont("SimHei", 10))
-        temp_label.setWordWrap(True)
-        temp_label.adjustSize()
-        
-        # 设置气泡大小
-        width = temp_label.width() + 40
-        height = temp_label.height() + 30
-        self.resize(width, height)
-    
-    def _update_typing(self):
-        """更新打字效果，逐字显示文本"""
-        if self.current_char_index < len(self.full_text):
-            # 添加下一个字符
-            self.displayed_text += self.full_text[self.current_char_index]
-            self.current_char_index += 1
-            self.label.setText(self.displayed_text)
-            
-            # 如果是最后一个字符，完成打字
-            if self.current_char_index >= len(self.full_text):
-                self.typing_complete = True
-                self.typing_timer.stop()
-                # 启动自动关闭定时器
-                if hasattr(self, 'timer') and self.timeout > 0:
-                    self.timer.start(self.timeout)
+            if self.timeout > 0:
+                self._close_handle = self._scheduler.call_later(self.timeout / 1000.0, self.close)
+    
+    def place(self, x, y, pointer_x, pointer_up):
+        """移动气泡并设置小三角方向，位置不变时不做任何事"""
+        if pointer_x != self._pointer_x or pointer_up != self._pointer_up:
+            self._pointer_x = pointer_x
+            self._pointer_up = pointer_up
+            self.update()
+        if self._pos != (x, y):
+            self._pos = (x, y)
+            self.move(x, y)
+    
+    def closeEvent(self, event):
+        """关闭时只隐藏并交还对象池"""
+        self._scheduler.cancel(self._close_handle)
+        self._close_handle = None
+        super().closeEvent(event)
+        if self._on_finished is not None:
+            self._on_finished(self)
         
     def paintEvent(self, event):
         # 自定义绘制气泡形状
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
         
-        # 绘制气泡背景
-        bubble_rect = self.rect().adjusted(5, 5, -5, -5)
+        # 气泡主体避开小三角所在的一侧
+        if self._pointer_up:
+            bubble_rect = self.rect().adjusted(5, 5 + BUBBLE_TAIL, -5, -5)
+        else:
+            bubble_rect = self.rect().adjusted(5, 5, -5, -5 - BUBBLE_TAIL)
         painter.setBrush(QBrush(QColor(255, 255, 255, 240)))
         painter.setPen(QPen(QColor(0, 0, 0, 100), 1))
         painter.drawRoundedRect(bubble_rect, 10, 10)
         
-        # 绘制小三角形指向桌宠
-        if self.parent():
-            parent_center = self.parent().geometry().center()
-            bubble_bottom = self.geometry().bottom()
-            triangle_points = [
-                QPoint(parent_center.x() - 10, bubble_bottom),
-                QPoint(parent_center.x(), bubble_bottom + 10),
-                QPoint(parent_center.x() + 10, bubble_bottom)
-            ]
-            painter.drawPolygon(triangle_points)
+        # 绘制小三角形指向桌宠（位置由 place() 预先计算）
+        px = self._pointer_x
+        if self._pointer_up:
+            edge = bubble_rect.top()
+            tip = edge - BUBBLE_TAIL
+        else:
+            edge = bubble_rect.bottom()
+            tip = edge + BUBBLE_TAIL
+        painter.drawPolygon(QPolygon([QPoint(px - 10, edge), QPoint(px, tip), QPoint(px + 10, edge)]))
+        
+        # 按缓存的行信息绘制已显示的字符（每行位置固定，打字时文字不会跳动）
+        info = self.layout_info
+        if info is None or self.revealed_chars <= 0:
+            return
+        painter.setFont(self._font)
+        painter.setPen(QColor(0, 0, 0))
+        left, top, _, _ = BUBBLE_MARGINS
+        if self._pointer_up:
+            top += BUBBLE_TAIL
+        content_width = info.size.width()
+        remaining = self.revealed_chars
+        text = self.full_text
+        for line in info.lines:
+            if remaining <= 0:
+                break
+            count = line.length if line.length < remaining else remaining
+            x = left + (content_width - line.width) / 2
+            painter.drawText(QPointF(x, top + line.y + line.ascent), text[line.start:line.start + count])
+            remaining = self.revealed_chars - (line.start + line.length)
+
+
+class TypingScheduler:
+    """共享的打字效果调度器：在主循环每帧推进所有正在打字的气泡"""
+    def __init__(self):
+        self._active = []  # [[bubble, 开始时间, 每字符毫秒], ...]
+    
+    def __len__(self):
+        return len(self._active)
+    
+    def start(self, bubble, typing_speed, revealed=0):
+        """开始（或重新开始）一个气泡的打字效果，revealed 为已经显示的字符数（恢复快照时使用）"""
+        self.stop(bubble)
+        if bubble.typing_complete or typing_speed <= 0:
+            return
+        started = time.monotonic() - revealed * typing_speed / 1000.0
+        self._active.append([bubble, started, float(typing_speed)])
+    
+    def stop(self, bubble):
+        """停止某个气泡的打字效果"""
+        for i, entry in enumerate(self._active):
+            if entry[0] is bubble:
+                del self._active[i]
+                return
+    
+    def advance(self, now=None):
+        """按当前时间推进所有气泡，速度快时一帧可显示多个字符"""
+        if not self._active:
+            return
+        if now is None:
+            now = time.monotonic()
+        i = 0
+        while i < len(self._active):
+            bubble, started, ms_per_char = self._active[i]
+            if not bubble.isVisible():
+                del self._active[i]
+                continue
+            bubble.set_revealed(int((now - started) * 1000.0 / ms_per_char) + 1)
+            if bubble.typing_complete:
+                del self._active[i]
+                continue
+            i += 1
+
+
+class BubblePool:
+    """气泡对象池：复用少量 SpeechBubble，避免每次显示对话都创建窗口"""
+    def __init__(self, parent, scheduler, capacity=3):
+        self.parent = parent
+        self.scheduler = scheduler  # 气泡自动关闭使用的调度器
+        self.capacity = capacity  # 同时存在的气泡上限
+        self._idle = []  # 空闲的气泡
+        self._live = []  # 正在显示的气泡（按显示先后排列）
+        self.layout_cache = TextLayoutCache(QFont(BUBBLE_FONT_FAMILY, BUBBLE_FONT_SIZE), BUBBLE_MAX_TEXT_WIDTH)
+    
+    @property
+    def live_bubbles(self):
+        return self._live
+    
+    def bubble_size(self, text):
+        """显示该文本所需的气泡尺寸（排版结果来自缓存）"""
+        text_size = self.layout_cache.layout(text).size
+        left, top, right, bottom = BUBBLE_MARGINS
+        return QSize(text_size.width() + left + right, text_size.height() + top + bottom + BUBBLE_TAIL)
+    
+    def acquire(self):
+        """取出一个可用的气泡；达到上限时回收最早显示的那个"""
+        if self._idle:
+            bubble = self._idle.pop()
+        elif len(self._live) < self.capacity:
+            bubble = SpeechBubble(self.scheduler, self.parent, on_finished=self.release)
+        else:
+            bubble = self._live.pop(0)
+            bubble.hide()
+        self._live.append(bubble)
+        return bubble
+    
+    def release(self, bubble):
+        """气泡关闭后放回空闲列表"""
+        if bubble in self._live:
+            self._live.remove(bubble)
+            self._idle.append(bubble)
+    
+    def clear(self):
+        """销毁所有气泡"""
+        for bubble in self._live + self._idle:
+            bubble._on_finished = None
+            bubble.close()
+            bubble.deleteLater()
+        self._live = []
+        self._idle = []
 
 class DialogManager:
     """对话框管理器，负责处理对话框的显示和触发条件"""
-    def __init__(self, pet):
+    def __init__(self, pet, defer_load=False):
+        """
+        Args:
+            pet: 宠物窗口
+            defer_load: 为 True 时先不加载对话配置，由 load_dialogues() 稍后加载
+        """
         self.pet = pet
         
-        # 默认对话框内容库（作为备选）
-        self.default_dialogues = {
-              
-        }
+        # 气泡对象池与共享的打字效果调度器（由宠物主循环每帧推进）
+        self.bubble_pool = BubblePool(self.pet, pet.scheduler)
+        self.typing_scheduler = TypingScheduler()
+        
+        # 气泡队列：每只宠物同一时间只显示一个气泡
+        self.min_bubble_interval = 1.5  # 同优先级气泡之间的最短显示时间（秒）
+        self.pending_ttl = 3.0  # 排队的对话超过该时间未显示则丢弃（秒）
+        self._live_bubble = None
+        self._live_priority = PRIORITY_AMBIENT
+        self._live_started = 0.0
+        self._pending = None  # 同优先级时合并，只保留最新的一条
+        self.shown_counts = {}  # 按类别统计显示过的气泡数（直接指定文本的为 "direct"）
+        
         # 从配置文件加载对话文本
         self.dialogues = {}
         self.dialogues_move = {}
-        self._load_dialogues_from_config()
+        self.dialogues_sleep = {}
+        if defer_load:
+            self._build_indexes()
+        else:
+            self._load_dialogues_from_config()
+            self._build_indexes()
+            # 进入事件循环后预先排版所有对话文本，避免阻塞启动
+            pet.scheduler.call_later(0, self._prewarm_layouts)
         # 自动触发相关设置
         self.auto_trigger_enabled = True
         self.min_interval = 15  # 最小间隔（秒）
         self.max_interval = 30  # 最大间隔（秒）
         self.last_trigger_time = 0
+        self.trigger_interval_scale = 1.0  # 自动对话间隔的倍数（由电源配置调整）
+        self.typing_speed_scale = 1.0  # 打字效果每字符时间的倍数，0 表示直接显示全文
         self.time_to_next_trigger = random.uniform(self.min_interval, self.max_interval)
         
         # 状态追踪
@@ -136,165 +306,306 @@ class DialogManager:
             "interacted": False,
             "moved_recently": False
         }
-        # 使用IdleTimeTracker管理空闲时间
-        self.idle_tracker = IdleTimeTracker()
-        self.idle_tracker.set_threshold(40)  # 设置40秒的空闲阈值
         
         # 初始化互动计数和最近互动时间
         self.interaction_count = 0
         self.last_interaction_time = 0
         
-        # 启动自动触发检查定时器
-        self.check_timer = QTimer(self.pet)
-        self.check_timer.setInterval(1000)  # 每秒检查一次
-        self.check_timer.timeout.connect(self._check_auto_trigger_conditions)
-        self.check_timer.start()
+        # 订阅宠物事件（空闲由宠物唯一的空闲跟踪器判定）
+        pet.events.subscribe(ENTERED_IDLE, self._on_entered_idle)
+        pet.events.subscribe(LEFT_GROUND, self._on_left_ground)
+        pet.events.subscribe(CLICKED, self._on_clicked)
         
+    @property
+    def config_path(self):
+        """对话配置文件路径"""
+        return config_path(DIALOGS_FILE)
+    
     def _load_dialogues_from_config(self):
-        """从配置文件加载对话文本"""
-        try:
-            # 获取配置文件路径
-            config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dialogs.json')
-            
-            # 检查配置文件是否存在
-            if os.path.exists(config_path):
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    
-                # 加载常规对话
-                if 'dialogues' in config:
-                    self.dialogues = config['dialogues']
-                else:
-                    # 如果配置中没有常规对话，使用默认值
-                    self.dialogues = self.default_dialogues.copy()
-                    
-                # 加载动作相关对话
-                if 'dialogues_move' in config:
-                    self.dialogues_move = config['dialogues_move']
-                else:
-                    # 如果配置中没有动作对话，使用默认值
-                    self.dialogues_move = self.default_dialogues.copy()
-                    
-                if 'dialogues_sleep' in config:
-                    self.dialogues_sleep = config['dialogues_sleep']
-                else:
-                    # 如果配置中没有睡觉对话，使用默认值
-                    self.dialogues_sleep = self.default_dialogues.copy()
-            else:
-                # 配置文件不存在，使用默认对话
-                self.dialogues = self.default_dialogues.copy()
-                self.dialogues_move = self.default_dialogues.copy()
-                
-                # 创建默认配置文件
-                default_config = {
-                    'dialogues': self.default_dialogues,
-                    'dialogues_move': self.default_dialogues_move
-                }
-                with open(config_path, 'w', encoding='utf-8') as f:
-                    json.dump(default_config, f, indent=2, ensure_ascii=False)
-                
-        except Exception as e:
-            # 加载失败，使用默认对话
-            print(f"加载对话配置失败: {e}")
-            self.dialogues = self.default_dialogues.copy()
-            self.dialogues_move = self.default_dialogues.copy()
-    
-    def show_dialog(self, text=None, dialog_type=None, timeout=3000, typing_speed=30):
-        """显示一个对话框"""
+        """从配置文件加载对话文本（与其他使用者共享同一份只读配置）"""
+        config = load_config(DIALOGS_FILE)
+        self.dialogues = config['dialogues']
+        self.dialogues_move = config['dialogues_move']
+        self.dialogues_sleep = config['dialogues_sleep']
+    
+    def load_dialogues(self):
+        """加载对话配置、编译索引并预先排版（推迟加载时使用）"""
+        self._load_dialogues_from_config()
+        self._build_indexes()
+        self._prewarm_layouts()
+    
+    def _build_indexes(self):
+        """把加载的对话编译为选择索引（洗牌袋 + 里程碑表）"""
+        self.index = DialogIndex(self.dialogues)
+        self.move_index = DialogIndex(self.dialogues_move)
+        self.sleep_index = DialogIndex(self.dialogues_sleep)
+    
+    def apply_config(self, config):
+        """应用重新加载的对话配置，只重建内容发生变化的类别
         
+        Returns:
+            list: 发生变化的 (分组, 类别)
+        """
+        changed = []
+        groups = (('dialogues', self.index), ('dialogues_move', self.move_index), ('dialogues_sleep', self.sleep_index))
+        for group, index in groups:
+            new_group = config.get(group)
+            if not isinstance(new_group, Mapping):
+                continue
+            old_group = getattr(self, group)
+            for category in set(new_group) | set(old_group):
+                entries = new_group.get(category)
+                if entries != old_group.get(category):
+                    index.update_category(category, entries)
+                    changed.append((group, category))
+            setattr(self, group, new_group)
+        return changed
+    
+    def _all_texts(self):
+        """遍历所有已加载的对话文本"""
+        for index in (self.index, self.move_index, self.sleep_index):
+            yield from index.texts()
+    
+    def milestone_for(self, click_count):
+        """返回点击次数对应的里程碑对话类型，没有则返回 None"""
+        return self.index.milestone_at(click_count)
+    
+    def pick_move_text(self, category):
+        """从动作相关对话中选一条文本（如 fly、jump）"""
+        return self.move_index.pick(category)
+    
+    def _prewarm_layouts(self):
+        """预先排版所有对话文本"""
+        cache = self.bubble_pool.layout_cache
+        cache.update_environment(self.pet.screen())
+        cache.prewarm(self._all_texts())
+    
+    def show_dialog(self, text=None, dialog_type=None, timeout=3000, typing_speed=30, priority=PRIORITY_DIRECT):
+        """请求显示一个对话框
+        
+        正在显示更高优先级的气泡时丢弃该请求；同优先级的气泡显示不足
+        min_bubble_interval 时合并为一条待显示请求（只保留最新的）；
+        更高优先级的请求立即替换当前气泡。
+        
+        Returns:
+            SpeechBubble: 立即显示时返回气泡，被丢弃或排队时返回 None
+        """
+        now = time.monotonic()
+        request = DialogRequest(text, dialog_type, timeout, typing_speed, priority, now)
+        live = self._current_bubble()
+        if live is not None:
+            if priority < self._live_priority:
+                return None
+            if priority == self._live_priority and now - self._live_started < self.min_bubble_interval:
+                self._pending = request
+                return None
+        return self._show_request(request, now)
+    
+    @property
+    def has_pending_request(self):
+        """是否有排队等待显示的对话"""
+        return self._pending is not None
+    
+    def _current_bubble(self):
+        """返回正在显示的气泡（没有则返回 None）"""
+        bubble = self._live_bubble
+        if bubble is not None and not bubble.isVisible():
+            self._live_bubble = bubble = None
+        return bubble
+    
+    def process_bubble_queue(self):
+        """显示到期的排队对话（由主循环每帧调用一次）"""
+        request = self._pending
+        if request is None:
+            return
+        now = time.monotonic()
+        if now - request.time > self.pending_ttl:
+            self._pending = None
+            return
+        live = self._current_bubble()
+        if live is None or now - self._live_started >= self.min_bubble_interval:
+            if live is not None and request.priority < self._live_priority:
+                self._pending = None
+                return
+            self._show_request(request, now)
+    
+    def _show_request(self, request, now):
+        """立即显示一条对话请求，复用当前气泡窗口"""
+        text = request.text
+        dialog_type = request.dialog_type
         # 如果没有指定文本，根据类型选择一个
         if text is None:
-            if dialog_type and dialog_type in self.dialogues:
-                text = random.choice(self.dialogues[dialog_type])
+            if dialog_type and dialog_type in self.index:
+                text = self.index.pick(dialog_type)
             else:
                 # 随机选择一个类型和文本
-                dialog_type = random.choice(list(self.dialogues.keys()))
-                text = random.choice(self.dialogues[dialog_type])
-        
-        # 创建并显示对话框
-        bubble = SpeechBubble(self.pet, text, timeout, typing_speed)
+                dialog_type, text = self.index.pick_random()
+            if text is None:
+                # 没有可用文本（类别为空或都在冷却中）
+                return None
+        if self._pending is not None and (self._pending is request or self._pending.priority <= request.priority):
+            self._pending = None
         
-        # 计算对话框位置（在桌宠上方居中）
-        pet_rect = self.pet.geometry()
-        bubble_rect = bubble.geometry()
-        x = pet_rect.center().x() - bubble_rect.width() // 2
-        y = pet_rect.top() - bubble_rect.height() - 10
-        bubble.move(x, y)
+        # 复用正在显示的气泡，否则从对象池取出（屏幕DPI变化时排版缓存自动失效）
+        layout_cache = self.bubble_pool.layout_cache
+        layout_cache.update_environment(self.pet.screen())
+        size = self.bubble_pool.bubble_size(text)
+        bubble = self._current_bubble()
+        if bubble is None:
+            bubble = self.bubble_pool.acquire()
+        typing_speed = request.typing_speed * self.typing_speed_scale
+        bubble.reset(text, layout_cache.layout(text), size, request.timeout, typing_speed, layout_cache.font)
+        self.typing_scheduler.start(bubble, typing_speed)
+        self._live_bubble = bubble
+        self._live_priority = request.priority
+        self._live_started = now
         
+        # 计算对话框位置（在桌宠上方居中），之后每帧跟随宠物
+        self._place_bubble(bubble, self.pet.geometry(), self.pet._available_rect())
         bubble.show()
         
+        category = dialog_type or "direct"
+        self.shown_counts[category] = self.shown_counts.get(category, 0) + 1
+        
         # 更新最后触发时间
-        self.last_trigger_time = time.time()
-        self.time_to_next_trigger = random.uniform(self.min_interval, self.max_interval)
+        self.last_trigger_time = self.pet.scheduler.now()
+        self.time_to_next_trigger = random.uniform(self.min_interval, self.max_interval) * self.trigger_interval_scale
         
         return bubble
     
+    def bubble_state(self):
+        """返回正在显示的气泡的可序列化状态，没有气泡时返回 None
+        
+        Returns:
+            tuple: (文本, 优先级, 自动关闭时间(毫秒), 打字速度(毫秒/字符), 已显示字符数, 打字是否完成, 距离关闭的毫秒数)
+        """
+        bubble = self._current_bubble()
+        if bubble is None:
+            return None
+        handle = bubble._close_handle
+        remaining = handle.remaining() * 1000.0 if handle is not None and handle.active else float(bubble.timeout)
+        return (bubble.full_text, self._live_priority, bubble.timeout, float(bubble.typing_speed),
+                bubble.revealed_chars, bubble.typing_complete, remaining)
+    
+    def restore_bubble(self, state):
+        """按 bubble_state() 返回的状态重新显示气泡，打字效果和关闭计时从原来的进度继续"""
+        text, priority, timeout, typing_speed, revealed, complete, remaining = state
+        now = time.monotonic()
+        if complete:
+            # 已打完的气泡直接显示全文，只等待剩余的关闭时间
+            timeout = max(1, int(remaining)) if timeout > 0 else timeout
+            request = DialogRequest(text, None, timeout, 0, priority, now)
+        else:
+            request = DialogRequest(text, None, timeout, typing_speed, priority, now)
+        self._pending = None
+        bubble = self._show_request(request, now)
+        if bubble is not None and not complete:
+            bubble.set_revealed(revealed)
+            self.typing_scheduler.start(bubble, bubble.typing_speed, revealed)
+        return bubble
+    
+    def _place_bubble(self, bubble, pet_rect, avail):
+        """把气泡放在宠物上方居中，限制在可用区域内，靠近顶部时翻到宠物下方"""
+        width = bubble.width()
+        height = bubble.height()
+        center_x = pet_rect.center().x()
+        x = center_x - width // 2
+        x = max(avail.left(), min(x, avail.right() - width + 1))
+        y = pet_rect.top() - height - BUBBLE_GAP
+        pointer_up = y < avail.top()
+        if pointer_up:
+            y = min(pet_rect.bottom() + 1 + BUBBLE_GAP, avail.bottom() - height + 1)
+        # 小三角尽量对准宠物中心，但不超出气泡圆角
+        pointer_x = max(20, min(center_x - x, width - 20))
+        bubble.place(x, y, pointer_x, pointer_up)
+    
+    def update_bubble_positions(self):
+        """让所有正在显示的气泡跟随宠物（由主循环每帧调用一次）"""
+        bubbles = self.bubble_pool.live_bubbles
+        if not bubbles:
+            return
+        pet_rect = self.pet.geometry()
+        avail = self.pet._available_rect()
+        for bubble in bubbles:
+            self._place_bubble(bubble, pet_rect, avail)
+    
     def show_random_dialog(self):
         """显示一个随机对话框"""
         # 检查宠物是否处于睡眠状态，如果是则不显示对话框
-        if hasattr(self.pet, 'is_currently_sleeping') and self.pet.is_currently_sleeping:
+        if self.pet.is_currently_sleeping:
             return None
         self.show_dialog()
     
     def show_jump_dialog(self):
         """显示一个跳跃相关的对话框"""
-        # 从self.dialogues_move属性获取跳跃对话（而不是从self.dialogues中获取）
-        if hasattr(self, 'dialogues_move') and self.dialogues_move and 'jump' in self.dialogues_move:
-            text = random.choice(self.dialogues_move['jump'])
-            self.show_dialog(text=text, timeout=3000, typing_speed=50)
+        # 从动作相关对话中获取跳跃对话（而不是从常规对话中获取）
+        text = self.move_index.pick('jump')
+        if text is not None:
+            self.show_dialog(text=text, timeout=3000, typing_speed=50, priority=PRIORITY_AMBIENT)
 
     def show_sleep_dialog(self):
         """显示一个睡觉相关的对话框"""
         # 检查宠物是否处于睡眠状态，如果是则显示睡觉对话框
-        if hasattr(self.pet, 'is_currently_sleeping') and self.pet.is_currently_sleeping:
-            # 从self.dialogues_sleep属性获取睡眠对话（而不是从self.dialogues中获取）
-            if hasattr(self, 'dialogues_sleep') and self.dialogues_sleep and 'sleep' in self.dialogues_sleep:
-                text = random.choice(self.dialogues_sleep['sleep'])
-                self.show_dialog(text=text, timeout=5000, typing_speed=50)
+        if self.pet.is_currently_sleeping:
+            # 从睡眠对话中获取（而不是从常规对话中获取）
+            text = self.sleep_index.pick('sleep')
+            if text is not None:
+                self.show_dialog(text=text, timeout=5000, typing_speed=50, priority=PRIORITY_AMBIENT)
 
-    def _check_auto_trigger_conditions(self):
-        """检查是否满足自动触发对话框的条件"""
+    def _on_entered_idle(self, _idle_time):
+        """宠物进入空闲状态时，显示无聊或睡觉相关的对话框"""
         if not self.auto_trigger_enabled:
             return
         
         # 检查时间间隔
-        current_time = time.time()
+        current_time = self.pet.scheduler.now()
         if current_time - self.last_trigger_time < self.time_to_next_trigger:
             return
         
-        # 桌宠在地面上并且静止不动
-        is_actually_idle = (self.pet.physics_system.on_ground and 
-                           abs(self.pet.physics_system.vx) < 50 and 
-                           abs(self.pet.physics_system.vy) < 50)
-        
-        # 更新空闲时间状态
-        entered_idle, exited_idle = self.idle_tracker.update(is_actually_idle)
-        
-        # 如果进入空闲状态，显示无聊相关的对话框（睡觉状态下依然在计时，所以把睡觉对话框也放到这里）
-        if entered_idle:
-            if hasattr(self.pet, 'is_currently_sleeping') and self.pet.is_currently_sleeping:
-                self.show_sleep_dialog()
-            else:
-                self.show_dialog(dialog_type="bored")
+        # 宠物先处理同一事件决定是否入睡，入睡时显示睡觉对话框
+        if self.pet.is_currently_sleeping:
+            self.show_sleep_dialog()
+        else:
+            self.show_dialog(dialog_type="bored", priority=PRIORITY_AMBIENT)
+    
+    def _on_left_ground(self, cause):
+        """宠物离开地面：主动跳跃时显示跳跃对话，被弹起或抛出时偶尔显示飞行对话"""
+        if cause == "jump":
+            self.show_jump_dialog()
+        elif random.randint(0, 100) < 10:
+            text = self.pick_move_text('fly')
+            if text is not None:
+                self.show_dialog(text=text, timeout=3000, typing_speed=50, priority=PRIORITY_AMBIENT)
+    
+    def _on_clicked(self, click_count):
+        """累计点击次数到达里程碑时显示对应的对话（里程碑来自dialogs.json中的"Nclicks"）"""
+        milestone = self.milestone_for(click_count)
+        if milestone is not None:
+            self.show_dialog(dialog_type=milestone, priority=PRIORITY_MILESTONE)
     
     def register_interaction(self):
         """记录与用户的互动"""
         # 增加用户互动计数
         self.interaction_count += 1
         # 更新最近互动时间
-        self.last_interaction_time = time.time()
+        self.last_interaction_time = self.pet.scheduler.now()
         if self.interaction_count %5:
             if random.randint(0,100) < 30:
-                self.show_dialog(dialog_type="greeting")
+                self.show_dialog(dialog_type="greeting", priority=PRIORITY_REACTION)
         else:
             if random.randint(0,100) < 15:
-                self.show_dialog(dialog_type="happy")
+                self.show_dialog(dialog_type="happy", priority=PRIORITY_REACTION)
     
     def add_dialogue(self, dialog_type, texts):
         """添加新的对话框类型和内容"""
-        if dialog_type not in self.dialogues:
-            self.dialogues[dialog_type] = []
-        self.dialogues[dialog_type].extend(texts)
+        # 共享的配置是只读的，添加时复制一份
+        entries = list(self.dialogues.get(dialog_type, ())) + list(texts)
+        self.dialogues = dict(self.dialogues)
+        self.dialogues[dialog_type] = entries
+        # 只重建这个类别的索引
+        self.index.update_category(dialog_type, self.dialogues[dialog_type])
+        # 运行时添加的文本只排版一次
+        self.bubble_pool.layout_cache.prewarm(self.index.texts(dialog_type))
     
     def set_auto_trigger_enabled(self, enabled):
         """启用或禁用自动触发"""
@@ -0,0 +1,212 @@
+import random
+import re
+import time
+from bisect import bisect_left
+from collections.abc import Mapping
+
+# 点击里程碑类型，例如 "10clicks"
+_MILESTONE_PATTERN = re.compile(r"^(\d+)clicks$")
+
+
+class ShuffleBag:
+    """洗牌袋：每轮把所有条目打乱后依次取出，同一条目不会连续出现
+
+    权重通过在袋中放入多个副本实现；洗牌后重新排列本轮的顺序，使同一条目的副本
+    在轮内和两轮衔接处都不相邻（某个条目的权重超过总数一半时无法避免，只在必须时重复）。
+    冷却时间内的条目会被跳过。洗牌在原地进行，耗时均摊到每次取出，不产生新对象。
+    """
+    __slots__ = ("_slots", "_weights", "_remaining", "_pos", "_cooldowns", "_last_used", "_last", "_rng")
+
+    def __init__(self, weights, cooldowns=None, rng=random):
+        # weights: 每个条目的非负整数权重，权重为 0 的条目不会放入袋中；袋中存放条目下标
+        self._weights = list(weights)
+        self._slots = [i for i, w in enumerate(self._weights) for _ in range(w)]
+        self._remaining = [0] * len(self._weights)  # 洗牌时每个条目尚未排入的副本数
+        self._pos = len(self._slots)  # 触发第一次洗牌
+        self._cooldowns = cooldowns  # 每个条目的冷却时间（秒），None 表示都没有冷却
+        self._last_used = [float("-inf")] * len(self._weights) if cooldowns else None
+        self._last = -1
+        self._rng = rng
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _reshuffle(self):
+        slots = self._slots
+        self._rng.shuffle(slots)
+        remaining = self._remaining
+        remaining[:] = self._weights
+        entries = range(len(remaining))
+        prev = self._last
+        n = len(slots)
+        for pos in range(n):
+            # 剩余副本最多的条目如果现在不取出，之后就只能相邻出现，此时优先取出它；
+            # 否则取第一个与上一个不同的条目
+            top = max(entries, key=remaining.__getitem__)
+            force = top != prev and remaining[top] > (n - pos) // 2
+            for j in range(pos, n):
+                if (slots[j] == top) if force else (slots[j] != prev):
+                    slots[pos], slots[j] = slots[j], slots[pos]
+                    break
+            prev = slots[pos]
+            remaining[prev] -= 1
+        self._pos = 0
+
+    def _avoid_repeat(self):
+        """当前位置与上次取出的条目相同时，与本轮后面第一个不同的条目交换（冷却跳过条目后可能相邻）"""
+        slots = self._slots
+        pos = self._pos
+        for j in range(pos + 1, len(slots)):
+            if slots[j] != self._last:
+                slots[pos], slots[j] = slots[j], slots[pos]
+                return
+
+    def next(self, now=None):
+        """取出下一个条目下标；所有条目都在冷却中时返回 -1"""
+        slots = self._slots
+        if not slots:
+            return -1
+        tries = len(slots)
+        while tries > 0:
+            if self._pos >= len(slots):
+                self._reshuffle()
+            if slots[self._pos] == self._last:
+                self._avoid_repeat()
+            index = slots[self._pos]
+            self._pos += 1
+            tries -= 1
+            if self._cooldowns is not None:
+                if now is None:
+                    now = time.monotonic()
+                if now - self._last_used[index] < self._cooldowns[index]:
+                    continue
+                self._last_used[index] = now
+            self._last = index
+            return index
+        return -1
+
+
+def parse_weight(value):
+    """权重必须是非负整数（允许 2.0 这样的整数值浮点数），否则返回 None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if not isinstance(value, int) or value < 0:
+        return None
+    return value
+
+
+def parse_cooldown(value):
+    """冷却时间必须是非负数（秒），否则返回 None"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    value = float(value)
+    if not value >= 0:  # 同时排除 NaN
+        return None
+    return value
+
+
+def _parse_line(entry):
+    """解析一条对话：字符串，或 {"text": ..., "weight": 1, "cooldown": 0}
+
+    权重或冷却时间无效的条目返回 None（调用方跳过）
+    """
+    if not isinstance(entry, Mapping):
+        return (str(entry), 1, 0.0)
+    text = str(entry.get("text", ""))
+    weight = parse_weight(entry.get("weight", 1))
+    cooldown = parse_cooldown(entry.get("cooldown", 0))
+    if weight is None or cooldown is None:
+        print(f"忽略无效的对话条目（weight 必须是非负整数，cooldown 必须是非负数）: {entry!r}")
+        return None
+    return (text, weight, cooldown)
+
+
+class DialogIndex:
+    """编译后的对话索引：每个类别一个洗牌袋，点击里程碑用有序表二分查找"""
+
+    def __init__(self, categories, rng=random):
+        self._rng = rng
+        self._texts = {}  # 类别 -> 文本元组
+        self._bags = {}  # 类别 -> ShuffleBag
+        self._category_bag = None  # 随机对话时选择类别用的洗牌袋
+        self._random_categories = ()
+        self._milestone_counts = []  # 升序的点击次数
+        self._milestone_types = []  # 对应的类别名
+        for category, entries in categories.items():
+            self._compile_category(category, entries)
+        self._compile_shared()
+
+    def _compile_category(self, category, entries):
+        lines = [_parse_line(e) for e in entries or ()]
+        lines = [line for line in lines if line is not None and line[0]]
+        if not lines:
+            self._texts.pop(category, None)
+            self._bags.pop(category, None)
+            return
+        cooldowns = [line[2] for line in lines]
+        self._texts[category] = tuple(line[0] for line in lines)
+        self._bags[category] = ShuffleBag([line[1] for line in lines],
+                                          cooldowns if any(cooldowns) else None, self._rng)
+
+    def _compile_shared(self):
+        """重建类别洗牌袋与里程碑表"""
+        milestones = []
+        random_categories = []
+        for category in self._texts:
+            match = _MILESTONE_PATTERN.match(category)
+            if match:
+                milestones.append((int(match.group(1)), category))
+            else:
+                random_categories.append(category)
+        milestones.sort()
+        self._milestone_counts = [count for count, _ in milestones]
+        self._milestone_types = [category for _, category in milestones]
+        self._random_categories = tuple(random_categories)
+        self._category_bag = ShuffleBag([1] * len(random_categories), rng=self._rng)
+
+    def update_category(self, category, entries):
+        """重建单个类别（运行时添加或修改对话时使用）"""
+        self._compile_category(category, entries)
+        self._compile_shared()
+
+    def __contains__(self, category):
+        return category in self._bags
+
+    def categories(self):
+        return tuple(self._texts.keys())
+
+    def texts(self, category=None):
+        """返回某个类别（或全部类别）的文本"""
+        if category is not None:
+            return self._texts.get(category, ())
+        return tuple(text for texts in self._texts.values() for text in texts)
+
+    def pick(self, category):
+        """从指定类别中选一条文本，类别不存在或都在冷却中时返回 None"""
+        bag = self._bags.get(category)
+        if bag is None:
+            return None
+        index = bag.next()
+        if index < 0:
+            return None
+        return self._texts[category][index]
+
+    def pick_random(self):
+        """随机选一个类别（不含点击里程碑）并选一条文本，返回 (类别, 文本)"""
+        bag = self._category_bag
+        for _ in range(len(bag)):
+            category = self._random_categories[bag.next()]
+            text = self.pick(category)
+            if text is not None:
+                return category, text
+        return None, None
+
+    def milestone_at(self, count):
+        """返回点击次数恰好为 count 时的里程碑类别，没有则返回 None"""
+        counts = self._milestone_counts
+        i = bisect_left(counts, count)
+        if i < len(counts) and counts[i] == count:
+            return self._milestone_types[i]
+        return None
@@ -0,0 +1,41 @@
+# 进程内事件总线：各子系统通过事件通知彼此，而不是每帧互相轮询状态。
+# 事件类型是小整数，publish() 同步依次调用订阅者；订阅表在订阅/取消时
+# 整体替换为新元组，分发过程中不创建任何对象。
+
+# 事件类型（publish 的参数含义见右侧注释）
+LANDED = 0  # 落地，参数：落地前的竖直速度（像素/秒）
+LEFT_GROUND = 1  # 离开地面，参数：原因（"jump" 表示主动跳跃，None 表示被弹起或抛出）
+THROWN = 2  # 被鼠标抛出，参数：水平速度（像素/帧）
+ENTERED_IDLE = 3  # 进入空闲，参数：已空闲时间（秒）
+EXITED_IDLE = 4  # 离开空闲，参数：None
+STATE_CHANGED = 5  # 显示的状态图片变化，参数：新状态名
+CLICKED = 6  # 左键点击，参数：累计点击次数
+
+EVENT_NAMES = ("landed", "left_ground", "thrown", "entered_idle", "exited_idle", "state_changed", "clicked")
+
+
+class EventBus:
+    """同步事件总线，订阅者签名为 handler(arg)"""
+    __slots__ = ("_handlers", "published")
+
+    def __init__(self):
+        self._handlers = [()] * len(EVENT_NAMES)  # 事件类型 -> 订阅者元组
+        self.published = [0] * len(EVENT_NAMES)  # 每种事件的发布次数
+
+    def subscribe(self, event, handler):
+        """订阅事件，按订阅顺序调用"""
+        self._handlers[event] = self._handlers[event] + (handler,)
+        return handler
+
+    def unsubscribe(self, event, handler):
+        """取消订阅（未订阅时无效果）"""
+        self._handlers[event] = tuple(h for h in self._handlers[event] if h != handler)
+
+    def publish(self, event, arg=None):
+        """同步通知所有订阅者；单个订阅者出错不影响其他订阅者"""
+        self.published[event] += 1
+        for handler in self._handlers[event]:
+            try:
+                handler(arg)
+            except Exception as e:
+                print(f"事件处理失败 {EVENT_NAMES[event]}: {e}")
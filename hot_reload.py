@@ -0,0 +1,86 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+from config_loader import load_config, DIALOGS_FILE, ASSETS_FILE
+
+
+class ConfigReloader(QObject):
+    """监视 dialogs.json 和 pic_asset.json，文件变化后热加载
+
+    文件在后台线程中解析，解析结果通过信号回到GUI线程，
+    再交给 DialogManager / Renderer 按差异应用，不会阻塞帧更新。
+    """
+    _parsed = pyqtSignal(str, object)
+
+    def __init__(self, pet, debounce_ms=200):
+        super().__init__(pet)
+        self.pet = pet
+        # 配置文件路径 -> (配置名, 应用函数)
+        self._handlers = {
+            os.path.abspath(pet.dialog_manager.config_path): (DIALOGS_FILE, pet.dialog_manager.apply_config),
+            os.path.abspath(pet.renderer.config_path): (ASSETS_FILE, pet.renderer.apply_config),
+        }
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._dirty = set()
+
+        # 编辑器保存时可能连续写多次，合并为一次重新加载
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(debounce_ms)
+        self._debounce.timeout.connect(self._reload_dirty)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watch_all()
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._parsed.connect(self._apply)
+
+    def _watch_all(self):
+        """（重新）监视所有配置文件"""
+        watched = set(self._watcher.files())
+        for path in self._handlers:
+            if path not in watched and os.path.exists(path):
+                self._watcher.addPath(path)
+
+    def _on_file_changed(self, path):
+        self._dirty.add(os.path.abspath(path))
+        self._debounce.start()
+
+    def _reload_dirty(self):
+        # 以“写临时文件再重命名”方式保存的编辑器会让监视失效，需要重新添加
+        self._watch_all()
+        dirty, self._dirty = self._dirty, set()
+        for path in dirty:
+            self._executor.submit(self._parse, path)
+
+    def _parse(self, path):
+        """在后台线程中解析并校验配置文件（同时更新编译缓存）"""
+        entry = self._handlers.get(path)
+        if entry is None:
+            return
+        try:
+            config = load_config(entry[0], path, strict=True)
+        except Exception as e:
+            print(f"重新加载配置失败 {path}: {e}")
+            return
+        self._parsed.emit(path, config)
+
+    def _apply(self, path, config):
+        """在GUI线程中应用解析结果"""
+        entry = self._handlers.get(path)
+        if entry is None:
+            return
+        # 槽函数中未捕获的异常会让 PyQt5 直接终止进程
+        try:
+            changed = entry[1](config)
+        except Exception as e:
+            print(f"应用配置失败 {path}: {e}")
+            return
+        if changed:
+            print(f"已重新加载 {os.path.basename(path)}: {len(changed)} 项变化")
+
+    def shutdown(self):
+        """停止监视并关闭后台线程"""
+        self._watcher.removePaths(self._watcher.files())
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,146 @@
+import time
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import Qt, QTimer, QPoint
+from PyQt5.QtGui import QFont, QFontMetrics, QColor, QPainter, QPixmap
+
+HUD_FONT_FAMILY = "Consolas"
+HUD_FONT_SIZE = 8
+HUD_PADDING = 6
+HUD_GAP = 4  # 面板与宠物之间的距离
+HUD_REFRESH_MS = 500  # 刷新间隔（毫秒）
+DISK_BYTES_REFRESH = 5.0  # 磁盘缓存大小需要扫描目录，单独降低刷新频率（秒）
+
+
+class DebugHud(QWidget):
+    """显示在宠物旁边的调试信息面板
+
+    面板使用独立的 QTimer 定期刷新（不在主循环的帧内执行），
+    文本没有变化时不重新绘制；文本变化时先画到缓存的 QPixmap，paintEvent 只复制这张图。
+    帧率、帧耗时和抖动来自宠物的 FrameProfiler，面板显示期间自动启用计时。
+    """
+
+    def __init__(self, pet):
+        super().__init__(None)
+        self.pet = pet
+        self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool |
+                            Qt.WindowTransparentForInput)
+        self.setAttribute(Qt.WA_TranslucentBackground, True)
+        self.setAttribute(Qt.WA_ShowWithoutActivating, True)
+        self._font = QFont(HUD_FONT_FAMILY, HUD_FONT_SIZE)
+        self._font.setStyleHint(QFont.Monospace)
+        self._metrics = QFontMetrics(self._font)
+        self._pixmap = QPixmap()
+        self._text = None
+        self._last_frames = 0
+        self._last_time = time.monotonic()
+        self._fps = 0.0
+        self._disk_bytes = 0
+        self._disk_bytes_time = 0.0
+        self.redraws = 0
+        self._timer = QTimer(self)
+        self._timer.setInterval(HUD_REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+
+    def set_enabled(self, enabled):
+        """显示或隐藏面板"""
+        profiler = self.pet.profiler
+        if enabled:
+            profiler.set_enabled(True, "hud")
+            self._last_frames = profiler.frames
+            self._last_time = time.monotonic()
+            self._text = None
+            self.refresh()
+            self.follow()
+            self.show()
+            self._timer.start()
+        else:
+            self._timer.stop()
+            self.hide()
+            profiler.set_enabled(False, "hud")
+
+    def follow(self):
+        """移动到宠物右侧，屏幕右边放不下时放到左侧"""
+        pet = self.pet
+        x = pet.x() + pet.width() + HUD_GAP
+        screen = pet.screen()
+        if screen is not None and x + self.width() > screen.availableGeometry().right():
+            x = pet.x() - self.width() - HUD_GAP
+        pos = QPoint(x, pet.y())
+        if pos != self.pos():
+            self.move(pos)
+
+    def _lines(self):
+        """收集要显示的计数"""
+        pet = self.pet
+        now = time.monotonic()
+        profiler = pet.profiler
+        elapsed = now - self._last_time
+        if elapsed > 0:
+            self._fps = (profiler.frames - self._last_frames) / elapsed
+        self._last_frames = profiler.frames
+        self._last_time = now
+        stats = profiler.stats(stages=False)
+        frame = stats["frame"]
+        jitter = stats["jitter"]
+
+        renderer = pet.renderer
+        disk = renderer.disk_cache
+        if now - self._disk_bytes_time >= DISK_BYTES_REFRESH:
+            self._disk_bytes = disk.disk_bytes()
+            self._disk_bytes_time = now
+
+        vx, vy, bounces, on_ground, air_grace = pet.physics_system.get_state()
+        friction, remaining = pet.speed_controller.friction_state()
+        friction_text = f"{friction} {remaining:.1f}s" if remaining > 0 else friction
+
+        return [
+            f"FPS     {self._fps:5.1f}  tick {pet._walk_timer.interval()}ms",
+            f"tick    p50 {frame['p50']:.2f} p95 {frame['p95']:.2f} p99 {frame['p99']:.2f} ms",
+            f"jitter  p50 {jitter['p50']:.2f} p95 {jitter['p95']:.2f} max {jitter['max']:.2f} ms",
+            f"missed  {stats['missed_frames']}",
+            f"sprites hit {renderer.sprite_cache_hits} miss {renderer.sprite_cache_misses} "
+            f"{renderer.sprite_cache_bytes() // 1024} KB",
+            f"disk    hit {disk.hits} miss {disk.misses} {self._disk_bytes // 1024} KB",
+            f"bubbles {len(pet.dialog_manager.bubble_pool.live_bubbles)}  "
+            f"typing {len(pet.dialog_manager.typing_scheduler)}",
+            f"timers  {len(pet.scheduler)}",
+            f"vx {vx:.0f} vy {vy:.0f} ground {int(on_ground)} bounces {bounces} grace {air_grace:.2f}",
+            f"friction {friction_text}",
+        ]
+
+    def refresh(self):
+        """刷新计数，文本变化时重新绘制缓存的图片"""
+        text = "\n".join(self._lines())
+        if text == self._text:
+            return
+        self._text = text
+        self._render(text.split("\n"))
+        self.redraws += 1
+        self.update()
+
+    def _render(self, lines):
+        metrics = self._metrics
+        width = max(metrics.horizontalAdvance(line) for line in lines) + HUD_PADDING * 2
+        height = metrics.lineSpacing() * len(lines) + HUD_PADDING * 2
+        pixmap = QPixmap(width, height)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(0, 0, 0, 170))
+        painter.drawRoundedRect(0, 0, width, height, 6, 6)
+        painter.setFont(self._font)
+        painter.setPen(QColor(230, 255, 230))
+        y = HUD_PADDING + metrics.ascent()
+        for line in lines:
+            painter.drawText(HUD_PADDING, y, line)
+            y += metrics.lineSpacing()
+        painter.end()
+        self._pixmap = pixmap
+        if self.size() != pixmap.size():
+            self.resize(pixmap.size())
+            self.follow()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._pixmap)
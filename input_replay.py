@@ -0,0 +1,273 @@
+"""输入录制与回放，用于测量交互延迟
+
+录制：在真实桌面上运行宠物，把鼠标事件写入 JSON Lines 文件
+    python input_replay.py record session.jsonl
+生成：不录制，直接生成一段包含点击、拖动、抛掷的标准会话
+    python input_replay.py generate session.jsonl
+回放：在 offscreen 平台上把事件作为合成的 QMouseEvent 按原时间间隔发送给宠物，
+报告每类事件的处理耗时（p50/p99）以及回放期间的帧耗时变化
+    python input_replay.py replay session.jsonl [--budget-p99-ms 8] [--json report.json]
+超过预算时以非零状态码退出，便于自动发现交互性能回退。
+录制和回放都在临时主目录中运行，不会读取或覆盖用户的 ~/.desktopet。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from util import percentile, temporary_home
+
+# 录制文件中的事件类型
+EVENT_PRESS = "press"
+EVENT_MOVE = "move"
+EVENT_RELEASE = "release"
+
+
+class InputRecorder:
+    """通过事件过滤器记录宠物窗口收到的鼠标事件"""
+
+    def __init__(self, pet, path):
+        from PyQt5.QtCore import QObject, QEvent
+
+        self.pet = pet
+        self.path = path
+        self._start = time.perf_counter()
+        self._file = open(path, "w", encoding="utf-8")
+        self._types = {
+            QEvent.MouseButtonPress: EVENT_PRESS,
+            QEvent.MouseMove: EVENT_MOVE,
+            QEvent.MouseButtonRelease: EVENT_RELEASE,
+        }
+        header = {"pet_pos": [pet.x(), pet.y()], "pet_size": [pet.width(), pet.height()]}
+        self._file.write(json.dumps(header) + "\n")
+
+        recorder = self
+
+        class _Filter(QObject):
+            def eventFilter(self, obj, event):
+                kind = recorder._types.get(event.type())
+                if kind is not None:
+                    recorder._write(kind, event)
+                return False
+
+        self._filter = _Filter()
+        pet.installEventFilter(self._filter)
+
+    def _write(self, kind, event):
+        record = {
+            "t": round(time.perf_counter() - self._start, 6),
+            "type": kind,
+            "pos": [event.x(), event.y()],
+            "global": [event.globalX(), event.globalY()],
+            "button": int(event.button()),
+            "buttons": int(event.buttons()),
+        }
+        self._file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        """停止录制并关闭文件"""
+        self.pet.removeEventFilter(self._filter)
+        self._file.close()
+
+
+def load_session(path):
+    """读取录制文件，返回 (header, events)"""
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines:
+        return {}, []
+    return lines[0], lines[1:]
+
+
+def generate_session(path, origin=(400, 600), size=(120, 120)):
+    """生成一段标准会话：连续点击、慢速拖动、快速抛掷"""
+    left = 1  # Qt.LeftButton
+    ox, oy = origin
+    cx, cy = ox + size[0] // 2, oy + size[1] // 2
+    events = []
+    t = 0.2
+
+    def add(kind, gx, gy, button, buttons):
+        events.append({
+            "t": round(t, 6),
+            "type": kind,
+            "pos": [gx - ox, gy - oy],
+            "global": [gx, gy],
+            "button": button,
+            "buttons": buttons,
+        })
+
+    # 10 次点击（触发点击计数与对话）
+    for _ in range(10):
+        add(EVENT_PRESS, cx, cy, left, left)
+        t += 0.05
+        add(EVENT_RELEASE, cx, cy, left, 0)
+        t += 0.15
+    # 1 秒的慢速拖动，1000Hz 鼠标
+    add(EVENT_PRESS, cx, cy, left, left)
+    for i in range(1000):
+        t += 0.001
+        add(EVENT_MOVE, cx + i // 5, cy - i // 10, 0, left)
+    t += 0.01
+    add(EVENT_RELEASE, cx + 200, cy - 100, left, 0)
+    t += 1.0
+    # 快速抛掷
+    add(EVENT_PRESS, cx, cy, left, left)
+    for i in range(150):
+        t += 0.001
+        add(EVENT_MOVE, cx + i * 4, cy - i * 2, 0, left)
+    add(EVENT_RELEASE, cx + 600, cy - 300, left, 0)
+    t += 1.0
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"pet_pos": [ox, oy], "pet_size": list(size)}) + "\n")
+        for e in events:
+            f.write(json.dumps(e) + "\n")
+    return len(events)
+
+
+class _TickMeter:
+    """包裹宠物主循环，记录每次tick的耗时"""
+
+    def __init__(self, pet):
+        self.pet = pet
+        self.samples = []
+        self._tick = pet._on_walk_tick
+        pet._walk_timer.timeout.disconnect()
+        pet._walk_timer.timeout.connect(self._on_tick)
+
+    def _on_tick(self):
+        t0 = time.perf_counter_ns()
+        self._tick()
+        self.samples.append(time.perf_counter_ns() - t0)
+
+    def take(self):
+        samples, self.samples = self.samples, []
+        return samples
+
+
+def _summary_ms(samples_ns):
+    values = sorted(samples_ns)
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) / 1e6, 4),
+        "p99_ms": round(percentile(values, 99) / 1e6, 4),
+        "max_ms": round(values[-1] / 1e6, 4) if values else 0.0,
+    }
+
+
+def replay(path, speed=1.0):
+    """在当前 QApplication 中回放录制文件，返回报告字典"""
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import Qt, QPoint, QEvent, QEventLoop
+    from PyQt5.QtGui import QMouseEvent
+    from pet import DesktopPet
+
+    header, events = load_session(path)
+    app = QApplication.instance()
+    pet = DesktopPet(initial_random=False)
+    pet.show()
+    if "pet_pos" in header:
+        pet.move(*header["pet_pos"])
+    meter = _TickMeter(pet)
+
+    def pump(seconds):
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            app.processEvents(QEventLoop.AllEvents, 1)
+
+    # 回放前先空跑一段时间，作为帧耗时的基线
+    duration = events[-1]["t"] if events else 0.0
+    pump(min(2.0, max(0.5, duration / speed / 4)))
+    baseline = meter.take()
+
+    qt_types = {
+        EVENT_PRESS: QEvent.MouseButtonPress,
+        EVENT_MOVE: QEvent.MouseMove,
+        EVENT_RELEASE: QEvent.MouseButtonRelease,
+    }
+    latencies = {kind: [] for kind in qt_types}
+    start = time.perf_counter()
+    for e in events:
+        # 右键会弹出模态菜单，回放时跳过
+        if e["button"] == int(Qt.RightButton):
+            continue
+        target = start + e["t"] / speed
+        delay = target - time.perf_counter()
+        if delay > 0:
+            pump(delay)
+        event = QMouseEvent(qt_types[e["type"]], QPoint(*e["pos"]), QPoint(*e["global"]),
+                            Qt.MouseButton(e["button"]), Qt.MouseButtons(e["buttons"]), Qt.NoModifier)
+        t0 = time.perf_counter_ns()
+        QApplication.sendEvent(pet, event)
+        latencies[e["type"]].append(time.perf_counter_ns() - t0)
+    pump(0.5)
+    during = meter.take()
+    pet.close()
+
+    all_latencies = [v for values in latencies.values() for v in values]
+    base = _summary_ms(baseline)
+    replayed = _summary_ms(during)
+    return {
+        "session": os.path.basename(path),
+        "events": _summary_ms(all_latencies),
+        "by_type": {kind: _summary_ms(values) for kind, values in latencies.items()},
+        "frames_baseline": base,
+        "frames_replay": replayed,
+        "frame_p99_delta_ms": round(replayed["p99_ms"] - base["p99_ms"], 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="输入录制与回放")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_record = sub.add_parser("record", help="录制真实输入")
+    p_record.add_argument("path")
+    p_gen = sub.add_parser("generate", help="生成标准会话")
+    p_gen.add_argument("path")
+    p_replay = sub.add_parser("replay", help="回放并报告延迟")
+    p_replay.add_argument("path")
+    p_replay.add_argument("--speed", type=float, default=1.0, help="回放倍速")
+    p_replay.add_argument("--budget-p99-ms", type=float, default=None, help="事件处理p99预算，超出时返回非零")
+    p_replay.add_argument("--json", default=None, help="把报告写入JSON文件")
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        count = generate_session(args.path)
+        print(f"已生成 {count} 个事件: {args.path}")
+        return 0
+
+    if args.command == "replay":
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    with temporary_home():
+        return _run(args)
+
+
+def _run(args):
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+
+    if args.command == "record":
+        from pet import DesktopPet
+        pet = DesktopPet()
+        pet.show()
+        recorder = InputRecorder(pet, args.path)
+        app.aboutToQuit.connect(recorder.close)
+        print(f"正在录制到 {args.path}，关闭宠物结束录制")
+        return app.exec_()
+
+    report = replay(args.path, speed=args.speed)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+    if args.budget_p99_ms is not None and report["events"]["p99_ms"] > args.budget_p99_ms:
+        print(f"事件处理 p99 {report['events']['p99_ms']}ms 超出预算 {args.budget_p99_ms}ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,27 +1,72 @@
 # main.py
+from startup import tracer  # 最先导入，作为启动计时的起点
+
+import argparse
 import sys
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import Qt
-from pet import DesktopPet
+
+with tracer.phase("import PyQt5"):
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import Qt
+with tracer.phase("import pet"):
+    from pet import DesktopPet
 
 def main():
-    app = QApplication(sys.argv)
-    
+    parser = argparse.ArgumentParser(description="桌宠")
+    parser.add_argument("--fast-start", action="store_true", help="先显示宠物，推迟加载对话、预加载图片和菜单")
+    parser.add_argument("--startup-trace", metavar="PATH", help="启动完成后把各阶段耗时写入 JSON 报告")
+    parser.add_argument("--exit-after-startup", action="store_true", help="启动完成后立即退出（启动基准测试使用）")
+    parser.add_argument("--profile", metavar="PATH", help="启用帧耗时分析，退出时写入 PATH（.csv 或 .json）")
+    parser.add_argument("--control", metavar="SOCKET", nargs="?", const="",
+                        help="启动本地控制服务（默认 ~/.desktopet/control.sock）")
+    parser.add_argument("--metrics", metavar="ADDRESS", nargs="?", const="",
+                        help="以 Prometheus 格式导出指标：端口、host:端口或 unix:路径（默认 127.0.0.1:9464）")
+    args, qt_args = parser.parse_known_args()
+    if args.metrics:
+        from metrics import parse_address
+        try:
+            parse_address(args.metrics)
+        except ValueError as e:
+            parser.error(f"--metrics: {e}")
+
+    with tracer.phase("QApplication"):
+        app = QApplication(sys.argv[:1] + qt_args)
+
     # 设置应用程序属性，确保中文正常显示
     font = app.font()
     font.setFamily("SimHei")
     app.setFont(font)
-    
-    pet = DesktopPet()
-    pet.show()
-    
+
+    with tracer.phase("DesktopPet"):
+        pet = DesktopPet(fast_start=args.fast_start)
+    if args.profile:
+        pet.set_profiling(True)
+    if args.control is not None:
+        address = pet.start_control_server(args.control or None)
+        if address:
+            print(f"控制服务: {address}")
+    if args.metrics is not None:
+        address = pet.start_metrics_server(args.metrics or None)
+        if address:
+            print(f"指标导出: {address}")
+    with tracer.phase("show"):
+        pet.show()
+
+    def on_startup_complete():
+        if args.startup_trace:
+            tracer.write(args.startup_trace)
+        if args.exit_after_startup:
+            app.quit()
+    pet.on_startup_complete = on_startup_complete
+
     # 捕获应用退出事件，确保设置被保存
-    app.aboutToQuit.connect(pet._save_settings)
-    
+    app.aboutToQuit.connect(lambda: pet._save_settings(wait=True))
+    if args.profile:
+        app.aboutToQuit.connect(lambda: pet.dump_profile(args.profile))
+
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
-        print("程序已退出")
\ No newline at end of file
+        print("程序已退出")
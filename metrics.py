@@ -0,0 +1,267 @@
+import os
+import socket
+import socketserver
+import stat
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PyQt5.QtCore import QObject, QTimer
+
+from events import EVENT_NAMES, LEFT_GROUND, STATE_CHANGED, THROWN
+from profiler import HISTOGRAM_BOUNDS
+
+# 指标导出：以 Prometheus 文本格式提供计数和当前值，供桌面监控面板抓取。
+#
+# 主线程用独立的 QTimer 每隔 interval 秒把计数复制成一份普通字典（不在主循环的帧内执行）；
+# HTTP 服务运行在后台线程，只读取最近一次的字典并格式化，从不访问 Qt 对象。
+# 监听地址："端口"、"host:端口"（默认只监听 127.0.0.1）或 "unix:路径"。
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_PORT = 9464
+
+
+def resident_memory_bytes():
+    """当前进程的常驻内存（字节），无法获取时返回 None"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # 没有 /proc 时退回峰值常驻内存（macOS 单位为字节，其他系统为 KB）
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class MetricsCollector(QObject):
+    """在主线程定期汇总宠物的计数"""
+
+    def __init__(self, pet, interval=5.0):
+        super().__init__(pet)
+        self.pet = pet
+        self.state_switches = {}  # 状态名 -> 切换次数
+        self.jumps = 0
+        self.sleeps = 0
+        self.snapshot = None  # 最近一次汇总的结果（整体替换，后台线程只读）
+        pet.events.subscribe(STATE_CHANGED, self._on_state_changed)
+        pet.events.subscribe(LEFT_GROUND, self._on_left_ground)
+        # 帧数、丢帧数和帧耗时直方图来自 FrameProfiler
+        pet.profiler.set_enabled(True, "metrics")
+        self._timer = QTimer(self)
+        self._timer.setInterval(int(interval * 1000))
+        self._timer.timeout.connect(self.collect)
+        self._timer.start()
+        self.collect()
+
+    def _on_state_changed(self, state):
+        self.state_switches[state] = self.state_switches.get(state, 0) + 1
+        if state.startswith("sleep"):
+            self.sleeps += 1
+
+    def _on_left_ground(self, reason):
+        if reason == "jump":
+            self.jumps += 1
+
+    def stop(self):
+        self._timer.stop()
+        self.pet.events.unsubscribe(STATE_CHANGED, self._on_state_changed)
+        self.pet.events.unsubscribe(LEFT_GROUND, self._on_left_ground)
+        self.pet.profiler.set_enabled(False, "metrics")
+
+    def collect(self):
+        """复制当前计数（只读取已经维护好的计数，不遍历历史数据）"""
+        pet = self.pet
+        profiler = pet.profiler
+        renderer = pet.renderer
+        disk = renderer.disk_cache
+        dialog_manager = pet.dialog_manager
+        self.snapshot = {
+            "ticks": profiler.frames,
+            "dropped_frames": profiler.missed_frames,
+            "tick_histogram": list(profiler.histogram),
+            "tick_seconds_sum": profiler.total_ns / 1e9,
+            "state_switches": dict(self.state_switches),
+            "sprite_cache": {
+                "memory": (renderer.sprite_cache_hits, renderer.sprite_cache_misses),
+                "disk": (disk.hits, disk.misses),
+            },
+            "bubbles_shown": dict(dialog_manager.shown_counts),
+            "throws": pet.events.published[THROWN],
+            "jumps": self.jumps,
+            "sleeps": self.sleeps,
+            "events": dict(zip(EVENT_NAMES, pet.events.published)),
+            "resident_memory_bytes": resident_memory_bytes(),
+            "pixmap_cache_bytes": renderer.sprite_cache_bytes(),
+            "live_bubbles": len(dialog_manager.bubble_pool.live_bubbles),
+            "timers": len(pet.scheduler),
+            "tick_interval_seconds": pet._walk_timer.interval() / 1000.0,
+        }
+
+
+def render(snapshot):
+    """把汇总结果格式化为 Prometheus 文本格式"""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in samples:
+            lines.append(f"{name}{suffix}{_labels(labels)} {value}")
+
+    if snapshot is None:
+        return ""
+    metric("desktopet_ticks_total", "counter", "Main loop ticks.", [("", None, snapshot["ticks"])])
+    metric("desktopet_dropped_frames_total", "counter", "Ticks that arrived later than 1.5 intervals.",
+           [("", None, snapshot["dropped_frames"])])
+
+    buckets = []
+    cumulative = 0
+    for bound, count in zip(HISTOGRAM_BOUNDS + ("+Inf",), snapshot["tick_histogram"]):
+        cumulative += count
+        buckets.append(("_bucket", {"le": bound}, cumulative))
+    buckets.append(("_sum", None, snapshot["tick_seconds_sum"]))
+    buckets.append(("_count", None, cumulative))
+    metric("desktopet_tick_seconds", "histogram", "Time spent in one main loop tick.", buckets)
+
+    metric("desktopet_state_switches_total", "counter", "Sprite state switches by target state.",
+           [("", {"state": state}, count) for state, count in sorted(snapshot["state_switches"].items())])
+
+    cache_samples = []
+    ratio_samples = []
+    for cache, (hits, misses) in snapshot["sprite_cache"].items():
+        cache_samples.append(("", {"cache": cache, "result": "hit"}, hits))
+        cache_samples.append(("", {"cache": cache, "result": "miss"}, misses))
+        if hits + misses:
+            ratio_samples.append(("", {"cache": cache}, hits / (hits + misses)))
+    metric("desktopet_sprite_cache_requests_total", "counter", "Sprite cache lookups by cache and result.",
+           cache_samples)
+    metric("desktopet_sprite_cache_hit_ratio", "gauge", "Sprite cache hit ratio since start.", ratio_samples)
+
+    metric("desktopet_bubbles_shown_total", "counter", "Speech bubbles shown by dialog category.",
+           [("", {"category": c}, n) for c, n in sorted(snapshot["bubbles_shown"].items())])
+    metric("desktopet_throws_total", "counter", "Times the pet was thrown.", [("", None, snapshot["throws"])])
+    metric("desktopet_jumps_total", "counter", "Jumps.", [("", None, snapshot["jumps"])])
+    metric("desktopet_sleeps_total", "counter", "Times the pet fell asleep.", [("", None, snapshot["sleeps"])])
+    metric("desktopet_events_total", "counter", "Events published on the event bus.",
+           [("", {"event": e}, n) for e, n in snapshot["events"].items()])
+
+    if snapshot["resident_memory_bytes"] is not None:
+        metric("desktopet_resident_memory_bytes", "gauge", "Resident set size of the process.",
+               [("", None, snapshot["resident_memory_bytes"])])
+    metric("desktopet_pixmap_cache_bytes", "gauge", "Estimated memory held by cached sprite pixmaps.",
+           [("", None, snapshot["pixmap_cache_bytes"])])
+    metric("desktopet_live_bubbles", "gauge", "Speech bubbles currently visible.",
+           [("", None, snapshot["live_bubbles"])])
+    metric("desktopet_timers", "gauge", "Pending scheduler timers.", [("", None, snapshot["timers"])])
+    metric("desktopet_tick_interval_seconds", "gauge", "Configured main loop interval.",
+           [("", None, snapshot["tick_interval_seconds"])])
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render(self.server.collector.snapshot).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix 套接字的客户端地址是空字符串
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def parse_address(address):
+    """解析监听地址，返回 ("unix", 路径) 或 ("tcp", (host, port))
+
+    IPv6 地址写成 "[::1]:9464"。地址无效时抛出 ValueError。
+    """
+    address = str(address or DEFAULT_PORT)
+    if address.startswith("unix:"):
+        if not address[5:]:
+            raise ValueError("unix: 后缺少套接字路径")
+        return "unix", address[5:]
+    host, _, port = address.rpartition(":")
+    if host.startswith("[") and host.endswith("]"):
+        host = host[1:-1]
+    try:
+        port = int(port)
+    except ValueError:
+        raise ValueError(f"无效的端口: {port!r}") from None
+    if not 0 <= port <= 65535:
+        raise ValueError(f"端口超出范围: {port}")
+    return "tcp", (host or "127.0.0.1", port)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _HTTPServer6(_HTTPServer):
+    address_family = socket.AF_INET6
+
+
+class MetricsServer:
+    """在后台线程提供 /metrics"""
+
+    def __init__(self, pet, address=None, interval=5.0):
+        self.kind, self.address = parse_address(address)
+        if self.kind == "unix":
+            # 只清理没有进程在监听的残留套接字，不删除仍在使用的套接字或普通文件
+            if os.path.exists(self.address):
+                probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    probe.connect(self.address)
+                except OSError:
+                    if not stat.S_ISSOCK(os.stat(self.address).st_mode):
+                        raise OSError(f"{self.address} 已存在且不是套接字")
+                    os.remove(self.address)
+                else:
+                    raise OSError(f"{self.address} 已被其他进程使用")
+                finally:
+                    probe.close()
+            self._server = _UnixHTTPServer(self.address, _Handler)
+            os.chmod(self.address, 0o600)
+        else:
+            server_class = _HTTPServer6 if ":" in self.address[0] else _HTTPServer
+            self._server = server_class(self.address, _Handler)
+            self.address = self._server.server_address[:2]
+        self.collector = MetricsCollector(pet, interval)
+        self._server.collector = self.collector
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MetricsServer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self.collector.stop()
+        if self.kind == "unix":
+            try:
+                os.remove(self.address)
+            except OSError:
+                pass
@@ -1,23 +1,44 @@
 import sys
 import random
-import json
-import os
 import time
 from PyQt5.QtWidgets import QApplication, QWidget
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 
 # 导入模块化组件
 from physics import PhysicsSystem
 from speed_control import SpeedController
 from renderer import Renderer
 from behavior import BehaviorController
-from dialog import DialogManager
+from dialog import DialogManager, PRIORITY_DIRECT
 from util import IdleTimeTracker
+from scheduler import Scheduler
+from events import EventBus, EVENT_NAMES, ENTERED_IDLE, EXITED_IDLE, CLICKED, LANDED, THROWN, STATE_CHANGED
+from hot_reload import ConfigReloader
+from power import PowerManager, PROFILES, AUTO
+from settings import SettingsStore
+import snapshot
+from startup import tracer
+from hud import DebugHud
+from control import ControlServer
+from metrics import MetricsServer
+from profiler import (FrameProfiler, STAGE_SCHEDULER, STAGE_INPUT, STAGE_TYPING, STAGE_SPEED, STAGE_DRAG,
+                      STAGE_IDLE, STAGE_RENDER, STAGE_PHYSICS, STAGE_BUBBLES)
 
 class DesktopPet(QWidget):
+    # 后台线程（控制服务）请求恢复主循环，跨线程时由 Qt 排队到主线程执行
+    wake_requested = pyqtSignal()
+    
     def __init__(self, asset_path=None, max_width=None, max_height=None,
-                 initial_random=True, initial_on_ground=False):
+                 initial_random=True, initial_on_ground=False, fast_start=False):
+        """
+        Args:
+            fast_start: 快速启动：先显示默认图片，对话加载、图片预加载、菜单和快捷键、
+                配置热加载推迟到首次绘制之后
+        """
         super().__init__()
+        self.fast_start = fast_start
+        self.on_startup_complete = None  # 启动完成（首次绘制且推迟的初始化完成）后的回调
+        self._first_paint_done = False
         
         # 无边框、置顶、不出现在任务栏、背景透明
         self.setWindowFlags(Qt.FramelessWindowHint | 
@@ -25,25 +46,49 @@ class DesktopPet(QWidget):
                             Qt.Tool)
         self.setAttribute(Qt.WA_TranslucentBackground, True)
         
+        # 统一的定时器调度（单调时钟），由主循环推进
+        self.scheduler = Scheduler()
+        # 子系统之间的事件总线；宠物最先订阅空闲事件，先决定是否入睡，再由对话管理器响应
+        self.events = EventBus()
+        self.events.subscribe(ENTERED_IDLE, self._on_entered_idle)
+        self.events.subscribe(EXITED_IDLE, self._on_exited_idle)
+        # 主循环分阶段计时（默认关闭，由菜单或 --profile 启用）
+        self.profiler = FrameProfiler()
+        self.debug_hud = None  # 调试信息面板，首次打开时创建
+        self.control_server = None  # 本地控制服务（--control 启用）
+        self.metrics_server = None  # Prometheus 指标导出（--metrics 启用）
+        
         # 初始化组件
-        self.renderer = Renderer(self, asset_path, max_width, max_height)
-        self.physics_system = PhysicsSystem(self)
-        self.speed_controller = SpeedController(self.physics_system)
-        self.behavior_controller = BehaviorController(self)
-        self.dialog_manager = DialogManager(self)
+        with tracer.phase("Renderer"):
+            self.renderer = Renderer(self, asset_path, max_width, max_height)
+        with tracer.phase("PhysicsSystem"):
+            self.physics_system = PhysicsSystem(self)
+        with tracer.phase("SpeedController"):
+            self.speed_controller = SpeedController(self.physics_system)
+        with tracer.phase("BehaviorController"):
+            self.behavior_controller = BehaviorController(self, defer_menu=fast_start)
+        with tracer.phase("DialogManager"):
+            self.dialog_manager = DialogManager(self, defer_load=fast_start)
+        # 配置文件热加载（快速启动时推迟创建）
+        self.config_reloader = None
+        if not fast_start:
+            with tracer.phase("ConfigReloader"):
+                self.config_reloader = ConfigReloader(self)
+            with tracer.phase("preload_sprites"):
+                self.renderer.preload_sprites()
         # 缩放参数
         self._scale_factor = 1.0
         
-        # 加载保存的设置
-        self._load_settings()
+        # 加载保存的设置（首次绘制前应用，启动时宠物不会跳动）
+        with tracer.phase("load_settings"):
+            self.settings_store = SettingsStore()
+            settings = self._load_settings()
         
-        # 刹车状态计时器
-        self._shache_timer = QTimer(self)
-        self._shache_timer.setSingleShot(True)
-        self._shache_timer.timeout.connect(lambda: self.renderer._switch_to_state_image("default"))
+        # 刹车状态计时任务（调度器句柄）
+        self._shache_handle = None
         
-        # 空闲时间跟踪器，用于图片切换
-        self.idle_tracker = IdleTimeTracker()
+        # 唯一的空闲时间跟踪器，空闲状态变化通过事件总线发布
+        self.idle_tracker = IdleTimeTracker(self.scheduler)
         self.idle_tracker.set_threshold(40)  # 设置40秒的空闲阈值
         self.is_currently_sleeping = False  # 跟踪当前是否处于睡眠状态
         
@@ -60,56 +105,161 @@ class DesktopPet(QWidget):
         self._walk_timer.setInterval(16)  # ~60 FPS
         self._walk_timer.timeout.connect(self._on_walk_tick)
         
-        # 初始位置
-        if initial_random:
-            self._place_random_in_available_area(on_ground=initial_on_ground)
-        else:
-            self._stick_to_ground()
+        # 宠物静止时主循环停止，由唤醒定时器在最早的任务到期时执行一帧；
+        # 输入、移动和外部命令会立即恢复主循环
+        self._wake_timer = QTimer(self)
+        self._wake_timer.setSingleShot(True)
+        self._wake_timer.timeout.connect(self._on_scheduler_wake)
+        self.scheduler.on_deadline_changed = self._arm_wake_timer
+        self.wake_requested.connect(self.resume_tick)
+        
+        # 电源配置（控制帧间隔、动画和对话频率等）
+        with tracer.phase("PowerManager"):
+            self.power_manager = PowerManager(self)
+        
+        with tracer.phase("restore_session"):
+            # 应用加载的缩放比例（先确定尺寸，再恢复位置）
+            if self._scale_factor != 1.0:
+                self.renderer.apply_scale(self._scale_factor)
             
-        # 应用加载的缩放比例
-        if self._scale_factor != 1.0:
-            self.renderer.apply_scale(self._scale_factor)
+            # 初始位置：优先恢复上次的位置和状态
+            if not self._restore_session(settings):
+                if initial_random:
+                    self._place_random_in_available_area(on_ground=initial_on_ground)
+                else:
+                    self._stick_to_ground()
+        
+        # 位置或状态可能变化时更新设置（写入由设置存储合并后在后台完成）
+        for event in (LANDED, THROWN, STATE_CHANGED, CLICKED):
+            self.events.subscribe(event, lambda _arg: self._save_settings())
+        # 行走时位置持续变化，定期记录一次
+        self._settings_handle = self.scheduler.call_every(30.0, self._save_settings)
             
         # 启动物理系统
         self._walk_timer.start()
     
-    def _get_config_path(self):
-        """获取配置文件路径"""
-        # 在用户目录下创建配置文件夹
-        config_dir = os.path.join(os.path.expanduser("~"), ".desktopet")
-        os.makedirs(config_dir, exist_ok=True)
-        return os.path.join(config_dir, "settings.json")
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._first_paint_done:
+            # 首次绘制后的下一帧再完成推迟的初始化
+            self._first_paint_done = True
+            tracer.mark("first_paint")
+            self.scheduler.call_later(0, self._finish_startup)
+    
+    def _finish_startup(self):
+        """完成快速启动时推迟的初始化"""
+        if self.fast_start:
+            with tracer.phase("deferred:dialogs"):
+                self.dialog_manager.load_dialogues()
+            with tracer.phase("deferred:preload_sprites"):
+                self.renderer.preload_sprites()
+            with tracer.phase("deferred:menu"):
+                self.behavior_controller.build_menu()
+            with tracer.phase("deferred:ConfigReloader"):
+                self.config_reloader = ConfigReloader(self)
+        tracer.mark("startup_complete")
+        if self.on_startup_complete is not None:
+            self.on_startup_complete()
     
     def _load_settings(self):
-        """加载保存的设置"""
+        """加载保存的设置，返回设置字典"""
+        settings = self.settings_store.load()
         try:
-            config_path = self._get_config_path()
-            if os.path.exists(config_path):
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    settings = json.load(f)
-                    if "scale_factor" in settings:
-                        self._scale_factor = float(settings["scale_factor"])
-        except Exception as e:
+            self._scale_factor = float(settings.get("scale_factor", 1.0))
+        except (TypeError, ValueError) as e:
             # 如果加载失败，使用默认值
             print(f"加载设置失败: {e}")
             self._scale_factor = 1.0
+        return settings
     
-    def _save_settings(self):
-        """保存当前设置"""
+    def _restore_session(self, settings):
+        """恢复上次的位置、屏幕、朝向、状态、点击计数和偏好
+        
+        Returns:
+            bool: 是否恢复了位置（否则由调用者决定初始位置）
+        """
         try:
-            config_path = self._get_config_path()
-            settings = {
-                "scale_factor": self._scale_factor
-            }
-            with open(config_path, 'w', encoding='utf-8') as f:
-                json.dump(settings, f, indent=2)
-        except Exception as e:
-            print(f"保存设置失败: {e}")
+            self.total_click_count = int(settings.get("total_click_count", 0))
+            self.dialog_manager.interaction_count = int(settings.get("interaction_count", 0))
+            if "auto_dialog" in settings:
+                self.dialog_manager.set_auto_trigger_enabled(bool(settings["auto_dialog"]))
+            if settings.get("power_profile") == AUTO or settings.get("power_profile") in PROFILES:
+                self.power_manager.set_preference(settings["power_profile"])
+            if settings.get("facing") in (-1, 1):
+                self.renderer.turn_to(settings["facing"], animate=False)
+            # 被拎起、刹车等临时状态不恢复
+            state = settings.get("state")
+            if state not in (None, "default", "lift", "lift2", "shache") and self.renderer._switch_to_state_image(state):
+                self.is_currently_sleeping = state.startswith("sleep")
+            if "x" not in settings or "y" not in settings:
+                return False
+            x, y = int(settings["x"]), int(settings["y"])
+        except (TypeError, ValueError) as e:
+            print(f"恢复设置失败: {e}")
+            return False
+        
+        # 上次所在的屏幕不存在时（例如拔掉了外接显示器）退回主屏
+        screen = QApplication.primaryScreen()
+        for scr in QApplication.screens():
+            if scr.name() == settings.get("screen"):
+                screen = scr
+                break
+        avail = screen.availableGeometry()
+        x = min(max(x, avail.left()), avail.right() - self.width() + 1)
+        y = min(max(y, avail.top()), avail.bottom() - self.height() + 1)
+        self.move(x, y)
+        if settings.get("on_ground"):
+            self._stick_to_ground()
+            self.physics_system.on_ground = True
+        return True
+    
+    def _collect_settings(self):
+        """当前需要保存的设置"""
+        scr = self.screen()
+        return {
+            "scale_factor": self._scale_factor,
+            "x": self.x(),
+            "y": self.y(),
+            "screen": scr.name() if scr is not None else "",
+            "on_ground": self.physics_system.on_ground,
+            "facing": self.renderer._dir,
+            "state": self.renderer.current_state,
+            "total_click_count": self.total_click_count,
+            "interaction_count": self.dialog_manager.interaction_count,
+            "auto_dialog": self.dialog_manager.auto_trigger_enabled,
+            "power_profile": self.power_manager.preference,
+        }
+    
+    def _save_settings(self, wait=False):
+        """保存当前设置
+        
+        Args:
+            wait: 为 True 时立即写入磁盘（退出时使用），否则由后台线程合并后写入
+        """
+        self.settings_store.update(self._collect_settings())
+        if wait:
+            self.settings_store.flush()
     
     def closeEvent(self, event):
         """窗口关闭事件处理"""
-        # 保存当前设置
+        # 保存当前设置并停止后台写入线程
+        self.scheduler.cancel(self._settings_handle)
         self._save_settings()
+        self.settings_store.close()
+        # 停止配置监视，销毁对象池中的气泡
+        if self.config_reloader is not None:
+            self.config_reloader.shutdown()
+        self.power_manager.shutdown()
+        self.dialog_manager.bubble_pool.clear()
+        if self.debug_hud is not None:
+            self.debug_hud.set_enabled(False)
+            self.debug_hud.close()
+        if self.control_server is not None:
+            self.control_server.stop()
+            self.control_server = None
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
         super().closeEvent(event)
     
     # ===== 基础功能方法 =====
@@ -145,20 +295,132 @@ class DesktopPet(QWidget):
         self.move(rand_x, rand_y)
     
     # ===== 定时器更新 =====
+    def _arm_wake_timer(self):
+        """主循环未运行时，安排在最早的任务到期时唤醒"""
+        if self._walk_timer.isActive():
+            return
+        deadline = self.scheduler.next_deadline()
+        if deadline is None:
+            self._wake_timer.stop()
+            return
+        delay_ms = max(0, int((deadline - self.scheduler.now()) * 1000) + 1)
+        self._wake_timer.start(delay_ms)
+    
+    def _on_scheduler_wake(self):
+        """唤醒定时器到期：执行一帧（到期任务、空闲检测等），帧末尾决定继续停止还是恢复主循环"""
+        self._on_walk_tick()
+    
+    def _at_rest(self):
+        """宠物静止且没有需要逐帧推进的工作时返回 True"""
+        physics = self.physics_system
+        if not physics.on_ground or physics.vx or physics.vy or physics.get_state()[4] > 0:
+            return False
+        behavior = self.behavior_controller
+        if self.is_in_lift_state or behavior.is_dragging or behavior.has_pending_input:
+            return False
+        dialog_manager = self.dialog_manager
+        if len(dialog_manager.typing_scheduler) or dialog_manager.has_pending_request:
+            return False
+        if self.speed_controller.friction_state()[0] not in ("idle", "off"):
+            return False
+        server = self.control_server
+        return server is None or not server.pending
+    
+    def _update_tick_mode(self):
+        """静止时停止主循环、改由调度器的到期时间唤醒，否则保持主循环运行"""
+        if self._at_rest():
+            if self._walk_timer.isActive():
+                self._walk_timer.stop()
+                # 停止期间的间隔不计为丢帧
+                self.profiler.pause()
+            self._arm_wake_timer()
+        elif not self._walk_timer.isActive():
+            self.resume_tick()
+    
+    def resume_tick(self):
+        """恢复主循环（输入、移动或外部命令到来时调用）"""
+        if not self._walk_timer.isActive():
+            self._wake_timer.stop()
+            self._walk_timer.start()
+    
+    def set_tick_interval(self, interval_ms):
+        """设置主循环间隔（毫秒），按新的间隔换算水平速度（像素/帧）保持实际速度不变"""
+        old_ms = max(1, self._walk_timer.interval())
+        if interval_ms == old_ms:
+            return
+        self._walk_timer.setInterval(interval_ms)
+        vx = self.physics_system.vx
+        if vx:
+            scaled = int(round(vx * interval_ms / old_ms))
+            self.physics_system.vx = scaled if scaled else (1 if vx > 0 else -1)
+    
+    def _end_shache(self):
+        """刹车图片显示结束，切回默认图片"""
+        self._shache_handle = None
+        self.renderer._switch_to_state_image("default")
+    
     def _on_walk_tick(self):
         """主更新循环"""
         # 时间步长（秒）
         dt = max(0.001, self._walk_timer.interval() / 1000.0)
         interval_ms = max(1, self._walk_timer.interval())
         
-        # 保存更新前的地面状态
-        was_on_ground = self.physics_system.on_ground
+        # 分阶段计时（关闭时 prof 为 None）
+        prof = self.profiler.active
+        if prof:
+            prof.begin(interval_ms)
+        
+        # 在帧边界执行控制服务收到的命令
+        server = self.control_server
+        if server is not None and server.pending:
+            server.drain()
         
+        # 执行到期的定时任务
+        self.scheduler.advance()
+        if prof:
+            prof.lap(STAGE_SCHEDULER)
+        
+        # 每帧统一应用一次合并后的鼠标输入（拎起时由 _update_motion 统一放置）
+        self.behavior_controller.flush_pending_input(place_lifted=False)
+        if prof:
+            prof.lap(STAGE_INPUT)
+        
+        # 推进所有气泡的打字效果
+        self.dialog_manager.typing_scheduler.advance()
+        if prof:
+            prof.lap(STAGE_TYPING)
+        
+        # 更新宠物运动
+        self._update_motion(dt, interval_ms, prof)
+        
+        # 显示排队到期的对话，再让气泡跟随宠物，与宠物在同一帧内移动
+        self.dialog_manager.process_bubble_queue()
+        self.dialog_manager.update_bubble_positions()
+        if prof:
+            prof.lap(STAGE_BUBBLES)
+            prof.end()
+        
+        self._update_tick_mode()
+    
+    def _update_motion(self, dt, interval_ms, prof=None):
+        """更新拖拽、拎起或物理运动（prof 为启用的帧耗时分析器）"""
         # 更新速度控制
         self.speed_controller.update(dt, interval_ms)
+        if prof:
+            prof.lap(STAGE_SPEED)
+        
+        # 被拎起时只推进摆动，不做物理更新
+        if self.is_in_lift_state:
+            self.behavior_controller.update_lift(dt)
+            if prof:
+                prof.lap(STAGE_DRAG)
+            return
         
-        # 若正在拖拽，跳过物理更新
+        # 若正在拖拽，跳过物理更新（延迟补偿模式下每帧刷新预测位置）
         if self.behavior_controller.is_dragging:
+            self.behavior_controller.update_drag()
+            if prof:
+                prof.lap(STAGE_DRAG)
             return
         
         # 检查速度并切换到刹车图像
@@ -172,46 +434,62 @@ class DesktopPet(QWidget):
         
         # 更新空闲时间状态
         entered_idle, exited_idle = self.idle_tracker.update(is_actually_idle)
+        if prof:
+            prof.lap(STAGE_IDLE)
         
         # 处理速度相关的图片切换（刹车状态）
         if current_speed_px_per_sec > 200 or current_speed_py_per_sec > 200:
             # 速度大于200时，立即切换到刹车图像并重置计时器
             self.renderer._switch_to_state_image("shache")
             self.is_currently_sleeping = False  # 刹车时不睡觉
-            if self._shache_timer.isActive():
-                self._shache_timer.stop()
+            if self._shache_handle is not None:
+                self.scheduler.cancel(self._shache_handle)
+                self._shache_handle = None
         else:
             # 速度低于200时，如果计时器未启动，则启动3秒延时
-            if not self._shache_timer.isActive() and self.renderer.current_state == "shache":
-                self._shache_timer.start(1500)  # 单位ms
+            if self._shache_handle is None and self.renderer.current_state == "shache":
+                self._shache_handle = self.scheduler.call_later(1.5, self._end_shache)
+        if prof:
+            prof.lap(STAGE_RENDER)
                 
-        # 处理空闲状态的图片切换（睡眠状态）（睡眠状态下的对话框放在dialog.py中,和idle一起实现）
-        # 如果进入空闲状态，切换到sleep图片
-        if entered_idle and not self.is_currently_sleeping:
-            if random.randint(0, 100) < 30: # 30%的概率进入睡眠状态
-            # 随机选择sleep或sleep2图片
-                sleep_state = random.choice(["sleep", "sleep2"])
-                self.renderer._switch_to_state_image(sleep_state)
-                self.is_currently_sleeping = True
-        # 如果离开空闲状态且处于睡眠状态，只更新状态标记（实际切换逻辑已移至register_interaction）
-        elif exited_idle and self.is_currently_sleeping:
-            self.is_currently_sleeping = False
+        # 发布空闲状态变化（睡眠图片和无聊/睡觉对话由订阅者处理）
+        if entered_idle:
+            self.events.publish(ENTERED_IDLE, self.idle_tracker.idle_time)
+        elif exited_idle:
+            self.events.publish(EXITED_IDLE)
+        if prof:
+            prof.lap(STAGE_IDLE)
         
-        # 更新物理状态
+        # 更新物理状态（落地/离地事件由物理系统发布）
         self.physics_system.update(dt, interval_ms)
-        
-        # 检查是否离开底部（从地面状态变为非地面状态）
-        if was_on_ground and not self.physics_system.on_ground:
-            # 从dialogues_move中选择fly类型的对话并显示
-            if hasattr(self.dialog_manager, 'dialogues_move') and 'fly' in self.dialog_manager.dialogues_move:
-                fly_dialogues = self.dialog_manager.dialogues_move['fly']
-                if fly_dialogues and random.randint(0, 100) < 10:
-                    text = random.choice(fly_dialogues)
-                    self.dialog_manager.show_dialog(text=text, timeout=3000, typing_speed=50)
+        if prof:
+            prof.lap(STAGE_PHYSICS)
+    
+    def _on_entered_idle(self, _idle_time):
+        """进入空闲状态时有一定概率入睡，切换到sleep图片"""
+        if self.is_currently_sleeping:
+            return
+        if random.randint(0, 100) < 30: # 30%的概率进入睡眠状态
+            # 随机选择sleep或sleep2图片
+            sleep_state = random.choice(["sleep", "sleep2"])
+            self.renderer._switch_to_state_image(sleep_state)
+            self.is_currently_sleeping = True
+    
+    def _on_exited_idle(self, _arg):
+        """离开空闲状态时只更新睡眠标记（实际切换逻辑在register_interaction中）"""
+        self.is_currently_sleeping = False
+    
+    def _reset_idle(self):
+        """重置空闲计时，原本处于空闲状态时发布离开空闲事件"""
+        was_idle = self.idle_tracker.is_idle
+        self.idle_tracker.reset()
+        if was_idle:
+            self.events.publish(EXITED_IDLE)
     
     # ===== 事件处理 =====
     def mousePressEvent(self, event):
         """处理鼠标按下事件"""
+        self.resume_tick()
         if event.button() == Qt.LeftButton:
             # # 2次左键点击切换到lift状态的逻辑
             # current_time = time.time()
@@ -231,16 +509,9 @@ class DesktopPet(QWidget):
                 # 普通点击行为
                 self.register_interaction()
                 
-                # 计算总点击次数，不同的次数对应不同的语音
+                # 计算总点击次数，不同的次数对应不同的语音（由对话管理器响应点击事件）
                 self.total_click_count += 1
-                if self.total_click_count == 10:
-                    self.show_dialog(dialog_type="10clicks")
-                if self.total_click_count == 25:
-                    self.show_dialog(dialog_type="25clicks")
-                if self.total_click_count == 50:
-                    self.show_dialog(dialog_type="50clicks")
-                if self.total_click_count == 75:
-                    self.show_dialog(dialog_type="75clicks")
+                self.events.publish(CLICKED, self.total_click_count)
                 if self.total_click_count >= 100:
                     self.total_click_count = 0
 
@@ -248,10 +519,12 @@ class DesktopPet(QWidget):
     
     def mouseMoveEvent(self, event):
         """处理鼠标移动事件"""
+        self.resume_tick()
         self.behavior_controller.on_mouse_move(event)
     
     def mouseReleaseEvent(self, event):
         """处理鼠标释放事件"""
+        self.resume_tick()
         self.behavior_controller.on_mouse_release(event)
     
     # ===== 公共接口方法 =====
@@ -261,18 +534,28 @@ class DesktopPet(QWidget):
         self._scale_factor += step
         self.renderer.apply_scale(self._scale_factor)
         self._stick_to_ground()
+        self._save_settings()
     
     def decrease_scale(self, step=0.1):
         """减小宠物尺寸"""
         self._scale_factor -= step
         self.renderer.apply_scale(self._scale_factor)
         self._stick_to_ground()
+        self._save_settings()
+    
+    def set_scale(self, factor):
+        """设置宠物尺寸（缩放比例不小于 0.1）"""
+        self._scale_factor = max(0.1, factor)
+        self.renderer.apply_scale(self._scale_factor)
+        self._stick_to_ground()
+        self._save_settings()
     
     def reset_scale(self):
         """重置宠物尺寸"""
         self._scale_factor = 1.0
         self.renderer.apply_scale(self._scale_factor)
         self._stick_to_ground()
+        self._save_settings()
     
     # 运动相关
     def start_walk(self, speed_px_per_sec=random.randint(120, 180),dir=random.choice([1,-1])):
@@ -280,6 +563,7 @@ class DesktopPet(QWidget):
         interval_ms = max(1, self._walk_timer.interval())
         self.speed_controller.start_walk(speed_px_per_sec*dir, interval_ms)
         self._stick_to_ground()
+        self.resume_tick()
         if dir == 1:
             self.face_right()
         else:
@@ -292,6 +576,7 @@ class DesktopPet(QWidget):
     def jump(self):
         """执行跳跃"""
         self.physics_system.jump()
+        self.resume_tick()
     
     def enable_random_speed(self, enabled: bool = True):
         """启用或禁用随机速度"""
@@ -311,13 +596,120 @@ class DesktopPet(QWidget):
         """显示右键菜单"""
         self.behavior_controller.show_context_menu()
 
-    def show_dialog(self, text=None, dialog_type=None, timeout=3000):
+    def run_command(self, name, *args):
+        """按名称执行菜单动作（委托给behavior_controller）"""
+        return self.behavior_controller.run_command(name, *args)
+
+    def save_snapshot(self, path=None):
+        """把完整运行状态保存为二进制快照（默认 ~/.desktopet/snapshot.bin）"""
+        try:
+            return snapshot.save([self], path)
+        except (OSError, ValueError) as e:
+            print(f"保存快照失败: {e}")
+            return 0
+    
+    def set_profiling(self, enabled):
+        """启用或关闭主循环分阶段计时"""
+        self.profiler.set_enabled(enabled)
+    
+    def start_control_server(self, path=None):
+        """启动本地控制服务（Unix 套接字，默认 ~/.desktopet/control.sock），返回监听地址"""
+        if self.control_server is None:
+            server = ControlServer(self, path)
+            # 命令到来时唤醒静止状态下停止的主循环
+            server.on_pending = self.wake_requested.emit
+            if not server.start():
+                return None
+            self.control_server = server
+        return self.control_server.address
+    
+    def start_metrics_server(self, address=None):
+        """启动 Prometheus 指标导出（默认 127.0.0.1:9464，也可以是 "unix:路径"），返回监听地址"""
+        if self.metrics_server is None:
+            try:
+                self.metrics_server = MetricsServer(self, address)
+            except (OSError, ValueError) as e:
+                print(f"启动指标导出失败: {e}")
+                return None
+        return self.metrics_server.address
+    
+    def stats(self):
+        """运行状态和计数（可以序列化为 JSON，供控制服务的 stats 命令使用）"""
+        vx, vy, bounces, on_ground, air_grace = self.physics_system.get_state()
+        friction, friction_remaining = self.speed_controller.friction_state()
+        renderer = self.renderer
+        result = {
+            "position": [self.x(), self.y()],
+            "size": [self.width(), self.height()],
+            "scale": self._scale_factor,
+            "state": renderer.current_state,
+            "facing": renderer._dir,
+            "sleeping": self.is_currently_sleeping,
+            "lifted": self.is_in_lift_state,
+            "dragging": self.behavior_controller.is_dragging,
+            "clicks": self.total_click_count,
+            "physics": {"vx": vx, "vy": vy, "on_ground": on_ground,
+                        "remaining_bounces": bounces, "air_grace": air_grace},
+            "friction": {"state": friction, "remaining": friction_remaining},
+            "tick_ms": self._walk_timer.interval(),
+            "power": {"profile": self.power_manager.describe(),
+                      "cpu_times": self.power_manager.cpu_times()},
+            "events": dict(zip(EVENT_NAMES, self.events.published)),
+            "sprite_cache": {"hits": renderer.sprite_cache_hits, "misses": renderer.sprite_cache_misses,
+                             "bytes": renderer.sprite_cache_bytes(),
+                             "disk_hits": renderer.disk_cache.hits, "disk_misses": renderer.disk_cache.misses},
+            "bubbles": len(self.dialog_manager.bubble_pool.live_bubbles),
+            "timers": len(self.scheduler),
+        }
+        if self.profiler.enabled:
+            result["profile"] = self.profiler.stats()
+        if self.control_server is not None:
+            server = self.control_server
+            result["control"] = {"clients": server.clients, "requests": server.requests,
+                                 "commands": server.commands}
+        return result
+    
+    def set_debug_hud(self, enabled):
+        """显示或隐藏宠物旁边的调试信息面板"""
+        if self.debug_hud is None:
+            if not enabled:
+                return
+            self.debug_hud = DebugHud(self)
+        self.debug_hud.set_enabled(enabled)
+    
+    def moveEvent(self, event):
+        """被移动时恢复主循环（可能需要重新下落），调试面板跟随宠物移动"""
+        super().moveEvent(event)
+        self.resume_tick()
+        if self.debug_hud is not None and self.debug_hud.isVisible():
+            self.debug_hud.follow()
+    
+    def dump_profile(self, path=None):
+        """导出帧耗时分析（.csv 为逐帧样本，否则为 JSON 统计），返回写入的路径"""
+        path = self.profiler.write(path)
+        if path:
+            print(f"帧耗时分析已写入: {path}")
+        return path
+    
+    def load_snapshot(self, path=None):
+        """从快照恢复完整运行状态，返回恢复耗时（毫秒），失败时返回 None"""
+        try:
+            return snapshot.load([self], path)
+        except (OSError, ValueError) as e:
+            print(f"恢复快照失败: {e}")
+            return None
+        finally:
+            self.resume_tick()
+    
+    def show_dialog(self, text=None, dialog_type=None, timeout=3000, priority=PRIORITY_DIRECT):
         """显示一个对话框"""
-        self.dialog_manager.show_dialog(text, dialog_type, timeout)
+        self.dialog_manager.show_dialog(text, dialog_type, timeout, priority=priority)
+        self.resume_tick()
     
     def show_random_dialog(self):
         """显示一个随机对话框"""
         self.dialog_manager.show_random_dialog()
+        self.resume_tick()
     
     def switch_to_lift_state(self):
         """切换到被拎起状态"""
@@ -335,15 +727,12 @@ class DesktopPet(QWidget):
         self.stop_walk()
         
         # 重置空闲时间
-        self.idle_tracker.reset()
+        self._reset_idle()
     
     def register_interaction(self):
         """注册用户交互"""
         self.dialog_manager.register_interaction()
         
-        # 用户交互时，重置空闲时间
-        self.idle_tracker.reset()
-        
         # 用户交互时，如果当前处于睡眠状态，执行跳跃并切换图片
         if self.is_currently_sleeping:
             self.physics_system.on_ground = True
@@ -354,8 +743,8 @@ class DesktopPet(QWidget):
             self.is_currently_sleeping = False  
             # self.physics_system.jump()
             # 先不急着实现jump,不知道为啥这个方法没效果，到时候试试单独实现。
-            # 添加等待时间，使用QTimer.singleShot实现延迟切换到default
-            QTimer.singleShot(2000, lambda: self.renderer._switch_to_state_image("default"))  # 2000毫秒
+            # 添加等待时间，2秒后切换到default
+            self.scheduler.call_later(2.0, lambda: self.renderer._switch_to_state_image("default"))
         
         # 用户交互时，如果当前在lift状态，切换回default状态
         elif self.is_in_lift_state:
@@ -366,3 +755,6 @@ class DesktopPet(QWidget):
             self.physics_system.vx = 0
             self.physics_system.vy = 0
             self.behavior_controller._drag_offset = None
+        
+        # 用户交互时，重置空闲时间（在睡眠处理之后，避免离开空闲事件提前清除睡眠标记）
+        self._reset_idle()
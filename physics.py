@@ -1,12 +1,12 @@
+import math
 import random
-import dialog
 from PyQt5.QtCore import Qt
+from events import LANDED, LEFT_GROUND
 
 class PhysicsSystem:
     def __init__(self, pet):
         self.pet = pet
         
-        self.dialog_manager = dialog.DialogManager(self.pet)
         # 物理参数
         self._vx = 0  # 像素/帧
         self._vy = 0.0  # 像素/秒
@@ -47,6 +47,7 @@ class PhysicsSystem:
     def update(self, dt, interval_ms):
         """更新物理状态"""
         avail = self.pet._available_rect()
+        was_on_ground = self._on_ground
         
         # --- 水平运动 --- 
         x = self.pet.x() + int(self._vx)  # 按每tick像素应用，简单平滑
@@ -71,9 +72,11 @@ class PhysicsSystem:
         y = int(y + self._vy * dt)
         
         # 碰撞地面（考虑空中宽限时间）
+        landed_from_air = False
         if y >= ground_y and self._air_grace_time <= 0:
             # 刚落地事件（从空中到地面且有向下速度）
-            if not self._on_ground and self._vy > 0:
+            landed_from_air = not self._on_ground and self._vy > 0
+            if landed_from_air:
                 if self._remaining_bounces <= 0:
                     self._remaining_bounces = random.randint(self._bounce_min, self._bounce_max)
                 
@@ -104,6 +107,13 @@ class PhysicsSystem:
         # 更新空中宽限计时
         if self._air_grace_time > 0:
             self._air_grace_time -= dt
+        
+        # 地面状态变化时通知其他子系统
+        if self._on_ground != was_on_ground:
+            if self._on_ground:
+                self.pet.events.publish(LANDED, speed if landed_from_air else 0.0)
+            else:
+                self.pet.events.publish(LEFT_GROUND)
     
     def jump(self):
         """执行跳跃动作"""
@@ -113,7 +123,7 @@ class PhysicsSystem:
             self._vy = jump_speed
             self._remaining_bounces = 0
             self._on_ground = False
-            self.dialog_manager.show_jump_dialog()
+            self.pet.events.publish(LEFT_GROUND, "jump")
     
     def set_air_grace_time(self, time):
         """设置空中宽限时间"""
@@ -122,4 +132,59 @@ class PhysicsSystem:
     def stop_movement(self):
         """停止所有移动"""
         self._vx = 0
-        self._vy = 0.0
\ No newline at end of file
+        self._vy = 0.0
+    
+    def get_state(self):
+        """返回可序列化的运动状态 (vx, vy, 剩余反弹次数, 是否在地面, 空中宽限时间)"""
+        return (self._vx, self._vy, self._remaining_bounces, self._on_ground, self._air_grace_time)
+    
+    def set_state(self, state):
+        """恢复 get_state() 返回的运动状态"""
+        self._vx, self._vy, self._remaining_bounces, self._on_ground, self._air_grace_time = state
+
+
+class SwingPhysics:
+    """被拎起时的阻尼摆模型，按时间步进，与鼠标事件频率无关"""
+    __slots__ = ("angle", "speed", "mouse_vx", "_stiffness", "_damping_per_sec",
+                 "_mouse_gain", "_mouse_decay_per_sec", "_max_angle", "_max_step")
+
+    def __init__(self, max_angle=25.0):
+        self.angle = 0.0  # 摆动角度（度）
+        self.speed = 0.0  # 角速度（度/秒）
+        self.mouse_vx = 0.0  # 鼠标水平速度（像素/秒），随时间衰减
+        self._stiffness = 30.0  # 恢复力系数（1/秒²），约0.9Hz的自然摆动
+        self._damping_per_sec = 0.9  # 阻尼（1/秒），约0.8秒振幅减半
+        self._mouse_gain = 0.6  # 鼠标速度对角加速度的影响（度/秒² 每 像素/秒）
+        self._mouse_decay_per_sec = 10.0  # 鼠标速度影响的衰减率（1/秒）
+        self._max_angle = max_angle
+        self._max_step = 1.0 / 60  # 单步最大时长，dt较大时拆分为子步保证稳定
+
+    def reset(self):
+        """重置摆动状态"""
+        self.angle = 0.0
+        self.speed = 0.0
+        self.mouse_vx = 0.0
+
+    def get_state(self):
+        """返回可序列化的摆动状态 (角度, 角速度, 鼠标水平速度)"""
+        return (self.angle, self.speed, self.mouse_vx)
+
+    def set_state(self, state):
+        """恢复 get_state() 返回的摆动状态"""
+        self.angle, self.speed, self.mouse_vx = state
+
+    def step(self, dt):
+        """推进摆动物理 dt 秒（半隐式欧拉 + 指数阻尼）"""
+        while dt > 0:
+            h = dt if dt < self._max_step else self._max_step
+            dt -= h
+            accel = self.mouse_vx * self._mouse_gain - self.angle * self._stiffness
+            self.speed = (self.speed + accel * h) * math.exp(-self._damping_per_sec * h)
+            self.angle += self.speed * h
+            if self.angle > self._max_angle:
+                self.angle = self._max_angle
+                self.speed = min(self.speed, 0.0)
+            elif self.angle < -self._max_angle:
+                self.angle = -self._max_angle
+                self.speed = max(self.speed, 0.0)
+            self.mouse_vx *= math.exp(-self._mouse_decay_per_sec * h)
@@ -0,0 +1,194 @@
+import os
+import time
+from collections import namedtuple
+
+from PyQt5.QtCore import QEvent, QFileSystemWatcher, QObject
+
+from events import STATE_CHANGED
+
+# 电源配置：
+#   tick_ms: 主循环（物理）间隔（毫秒）
+#   movie_speed: GIF 播放速度（百分比）
+#   typing_scale: 打字效果每字符时间的倍数，0 表示直接显示全文
+#   dialog_interval_scale: 自动对话间隔的倍数
+#   smooth_transform: 缩放和镜像是否使用平滑变换
+PowerProfile = namedtuple("PowerProfile", ["name", "label", "tick_ms", "movie_speed", "typing_scale",
+                                           "dialog_interval_scale", "smooth_transform"])
+
+PROFILES = {
+    "performance": PowerProfile("performance", "性能", 16, 100, 1.0, 1.0, True),
+    "balanced": PowerProfile("balanced", "均衡", 33, 100, 1.0, 1.5, True),
+    "saver": PowerProfile("saver", "省电", 66, 50, 0.0, 3.0, False),
+}
+PROFILE_ORDER = ("performance", "balanced", "saver")
+
+# 自动模式：按宠物状态选择配置
+AUTO = "auto"
+
+# 该文件存在时视为使用电池供电（可由外部脚本创建或删除）
+DEFAULT_BATTERY_FLAG = os.path.join(os.path.expanduser("~"), ".desktopet", "on_battery")
+
+
+class PowerManager(QObject):
+    """按宠物状态切换电源配置，并统计每个配置下消耗的CPU时间
+
+    自动模式下：睡眠或窗口不可见时使用省电配置，存在电池标记文件时使用均衡配置，
+    拖拽、拎起等交互时以及其他情况下使用性能配置。
+    所有条件都由事件触发重新评估（图片切换、窗口显示/隐藏/最小化/暴露、标记文件所在目录变化），
+    不定期轮询，宠物静止时主循环可以一直停止。
+    """
+
+    _WINDOW_EVENTS = (QEvent.Show, QEvent.Hide, QEvent.WindowStateChange)
+
+    def __init__(self, pet, battery_flag=DEFAULT_BATTERY_FLAG):
+        super().__init__(pet)
+        self.pet = pet
+        self.battery_flag = battery_flag  # 为 None 时不检查电池标记
+        self.preference = AUTO  # 用户选择：AUTO 或某个配置名
+        self.profile = None  # 当前生效的配置
+        self.on_battery = False
+
+        # 每个配置累计的 CPU 时间和运行时间（秒）
+        self.cpu_time = {name: 0.0 for name in PROFILE_ORDER}
+        self.wall_time = {name: 0.0 for name in PROFILE_ORDER}
+        self._cpu_mark = time.process_time()
+        self._wall_mark = time.monotonic()
+
+        self._apply(PROFILES["performance"])
+        # 睡眠状态变化总是伴随图片切换，借此尽快重新评估
+        self._evaluate_handle = None
+        pet.events.subscribe(STATE_CHANGED, self._on_state_changed)
+
+        # 窗口显示、隐藏、最小化和暴露状态的变化
+        self._window = None
+        pet.installEventFilter(self)
+
+        # 电池标记文件的创建和删除通过监视所在目录得知
+        self._watcher = None
+        if battery_flag is not None:
+            self._watcher = QFileSystemWatcher(self)
+            self._watcher.directoryChanged.connect(self._check_battery_flag)
+            directory = os.path.dirname(os.path.abspath(battery_flag))
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError as e:
+                print(f"无法监视电池标记: {e}")
+            else:
+                self._watcher.addPath(directory)
+            self.on_battery = os.path.exists(battery_flag)
+
+    def _window_hidden(self):
+        """窗口不可见、最小化或未暴露（被完全遮挡时部分平台会报告为未暴露）"""
+        pet = self.pet
+        if not pet.isVisible() or pet.isMinimized():
+            return True
+        handle = pet.windowHandle()
+        return handle is not None and not handle.isExposed()
+
+    def eventFilter(self, obj, event):
+        kind = event.type()
+        if obj is self.pet:
+            if kind in self._WINDOW_EVENTS:
+                # 原生窗口在第一次显示时才创建，之后监视它的暴露状态
+                if self._window is None and self.pet.windowHandle() is not None:
+                    self._window = self.pet.windowHandle()
+                    self._window.installEventFilter(self)
+                self._request_evaluate()
+        elif kind == QEvent.Expose:
+            self._request_evaluate()
+        return False
+
+    def _on_state_changed(self, _state):
+        # 切换图片时睡眠标记可能还没更新，推迟到下一帧再评估
+        self._request_evaluate()
+
+    def _request_evaluate(self):
+        """在下一帧重新评估（同一帧内的多次请求只评估一次）"""
+        if self._evaluate_handle is None:
+            self._evaluate_handle = self.pet.scheduler.call_later(0, self._deferred_evaluate)
+
+    def _deferred_evaluate(self):
+        self._evaluate_handle = None
+        self.evaluate()
+
+    def _check_battery_flag(self, _directory=None):
+        on_battery = os.path.exists(self.battery_flag)
+        if on_battery != self.on_battery:
+            self.on_battery = on_battery
+            self.evaluate()
+
+    def choose(self):
+        """根据用户选择和宠物状态决定应使用的配置名"""
+        if self.preference != AUTO:
+            return self.preference
+        pet = self.pet
+        if pet.behavior_controller.is_dragging or pet.is_in_lift_state:
+            return "performance"
+        if pet.is_currently_sleeping or self._window_hidden():
+            return "saver"
+        if self.on_battery:
+            return "balanced"
+        return "performance"
+
+    def evaluate(self):
+        """重新评估并在需要时切换配置"""
+        profile = PROFILES[self.choose()]
+        if profile is not self.profile:
+            self._apply(profile)
+
+    def _account(self):
+        """把上次切换以来的时间记到当前配置上"""
+        cpu = time.process_time()
+        wall = time.monotonic()
+        if self.profile is not None:
+            self.cpu_time[self.profile.name] += cpu - self._cpu_mark
+            self.wall_time[self.profile.name] += wall - self._wall_mark
+        self._cpu_mark = cpu
+        self._wall_mark = wall
+
+    def _apply(self, profile):
+        self._account()
+        self.profile = profile
+        pet = self.pet
+        pet.set_tick_interval(profile.tick_ms)
+        pet.renderer.set_movie_speed(profile.movie_speed)
+        pet.renderer.set_render_quality(profile.smooth_transform)
+        pet.dialog_manager.typing_speed_scale = profile.typing_scale
+        pet.dialog_manager.trigger_interval_scale = profile.dialog_interval_scale
+
+    def set_preference(self, name):
+        """设置用户选择（AUTO 或配置名），立即生效"""
+        if name != AUTO and name not in PROFILES:
+            raise ValueError(f"未知的电源配置: {name}")
+        self.preference = name
+        self.evaluate()
+
+    def cycle_preference(self):
+        """依次切换：自动 -> 性能 -> 均衡 -> 省电 -> 自动"""
+        order = (AUTO,) + PROFILE_ORDER
+        self.set_preference(order[(order.index(self.preference) + 1) % len(order)])
+
+    def describe(self):
+        """菜单上显示的当前配置，例如“均衡（自动）”"""
+        label = self.profile.label
+        return f"{label}（自动）" if self.preference == AUTO else label
+
+    def cpu_times(self):
+        """每个配置累计的 CPU 时间和运行时间（秒），包含当前配置尚未结算的部分
+
+        Returns:
+            dict: 配置名 -> (CPU 时间, 运行时间)
+        """
+        self._account()
+        return {name: (self.cpu_time[name], self.wall_time[name]) for name in PROFILE_ORDER}
+
+    def shutdown(self):
+        """停止监视"""
+        self.pet.scheduler.cancel(self._evaluate_handle)
+        self._evaluate_handle = None
+        self.pet.events.unsubscribe(STATE_CHANGED, self._on_state_changed)
+        self.pet.removeEventFilter(self)
+        if self._window is not None:
+            self._window.removeEventFilter(self)
+        if self._watcher is not None and self._watcher.directories():
+            self._watcher.removePaths(self._watcher.directories())
@@ -0,0 +1,127 @@
+import math
+from collections import deque
+
+
+class DragPredictor:
+    """拖动延迟补偿：根据最近的拖动轨迹把位置外推到下一帧
+
+    速度由最近一小段时间窗内的样本做加权最小二乘估计，
+    外推量再乘上一个置信度（样本数、轨迹一致性、样本新鲜度），
+    置信度低时退化为直接使用真实位置。真实样本到达时，
+    预测误差不会一次性跳变，而是按时间常数平滑修正。
+    """
+
+    def __init__(self, window=0.06, max_lead=0.025, max_lead_px=80.0, correction_tau=0.03):
+        self._samples = deque(maxlen=16)  # [(x, y, t), ...]
+        self._window = window  # 参与速度估计的时间窗（秒）
+        self._max_lead = max_lead  # 最大外推时长（秒）
+        self._max_lead_px = max_lead_px  # 最大外推距离（像素）
+        self._correction_tau = correction_tau  # 误差修正的时间常数（秒）
+        self._stale_after = 0.05  # 最后一个样本超过该时长后置信度降为0（秒）
+        self._vx = 0.0
+        self._vy = 0.0
+        self._confidence = 0.0
+        self._correction = (0.0, 0.0)  # 当前显示位置相对预测位置的残余误差
+        self._correction_time = 0.0
+        self._last_shown = None  # 上次返回的显示位置 (x, y, t)
+
+    @property
+    def confidence(self):
+        return self._confidence
+
+    def reset(self):
+        """清空轨迹与修正状态"""
+        self._samples.clear()
+        self._vx = 0.0
+        self._vy = 0.0
+        self._confidence = 0.0
+        self._correction = (0.0, 0.0)
+        self._last_shown = None
+
+    def add_sample(self, x, y, t):
+        """加入一个真实样本（拖动目标位置和时间）"""
+        samples = self._samples
+        if samples and t <= samples[-1][2]:
+            # 时间戳相同或倒退时只更新位置
+            samples[-1] = (x, y, samples[-1][2])
+        else:
+            samples.append((x, y, t))
+        self._fit_velocity(t)
+        # 新样本让预测位置跳变，把跳变量记为残余误差再平滑衰减
+        if self._last_shown is not None:
+            sx, sy, st = self._last_shown
+            px, py = self._extrapolate(st)
+            self._correction = (sx - px, sy - py)
+            self._correction_time = st
+
+    def _fit_velocity(self, now):
+        """用时间窗内的样本估计速度和置信度"""
+        cutoff = now - self._window
+        pts = [s for s in self._samples if s[2] >= cutoff]
+        if len(pts) < 3:
+            self._vx = self._vy = 0.0
+            self._confidence = 0.0
+            return
+        # 越新的样本权重越大
+        t_ref = pts[-1][2]
+        sw = swt = swtt = swx = swtx = swy = swty = 0.0
+        for x, y, t in pts:
+            dt = t - t_ref
+            w = 1.0 + (t - cutoff) / self._window
+            sw += w
+            swt += w * dt
+            swtt += w * dt * dt
+            swx += w * x
+            swtx += w * dt * x
+            swy += w * y
+            swty += w * dt * y
+        denom = sw * swtt - swt * swt
+        if denom <= 1e-12:
+            self._vx = self._vy = 0.0
+            self._confidence = 0.0
+            return
+        self._vx = (sw * swtx - swt * swx) / denom
+        self._vy = (sw * swty - swt * swy) / denom
+        bx = (swx - self._vx * swt) / sw
+        by = (swy - self._vy * swt) / sw
+
+        # 一致性：残差越大（急转、抖动）置信度越低
+        residual = 0.0
+        for x, y, t in pts:
+            dt = t - t_ref
+            residual += (x - bx - self._vx * dt) ** 2 + (y - by - self._vy * dt) ** 2
+        rms = math.sqrt(residual / len(pts))
+        consistency = 1.0 / (1.0 + rms / 2.0)
+        count_factor = min(1.0, (len(pts) - 2) / 4.0)
+        self._confidence = consistency * count_factor
+
+    def _extrapolate(self, t):
+        """外推到时间 t 的位置（不含平滑修正）"""
+        x, y, t_last = self._samples[-1]
+        age = t - t_last
+        if age <= 0 or self._confidence <= 0:
+            return float(x), float(y)
+        # 样本变旧（鼠标停下）时逐渐收回外推
+        freshness = max(0.0, 1.0 - (age - self._max_lead) / self._stale_after) if age > self._max_lead else 1.0
+        lead = min(age, self._max_lead) * self._confidence * freshness
+        dx = self._vx * lead
+        dy = self._vy * lead
+        dist = math.hypot(dx, dy)
+        if dist > self._max_lead_px:
+            k = self._max_lead_px / dist
+            dx *= k
+            dy *= k
+        return x + dx, y + dy
+
+    def predict(self, t):
+        """返回时间 t 时应显示的位置 (x, y)"""
+        if not self._samples:
+            return None
+        px, py = self._extrapolate(t)
+        cx, cy = self._correction
+        if cx or cy:
+            decay = math.exp(-max(0.0, t - self._correction_time) / self._correction_tau)
+            px += cx * decay
+            py += cy * decay
+        self._last_shown = (px, py, t)
+        return px, py
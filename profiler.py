@@ -0,0 +1,197 @@
+import csv
+import json
+import os
+import time
+from array import array
+from bisect import bisect_left
+
+from util import percentile
+
+# 帧耗时分析：把主循环的每一帧拆成若干阶段分别计时（perf_counter_ns），
+# 保存最近 window 帧的样本，按需计算各阶段的 p50/p95/p99/最大值、丢帧数和定时器抖动。
+#
+# 关闭时 active 为 None，主循环中每个计时点只多一次局部变量判断，可以常驻在正式版本中：
+#     prof = self.profiler.active
+#     if prof:
+#         prof.begin(interval_ms)
+#     ...
+#     if prof:
+#         prof.lap(STAGE_PHYSICS)
+
+STAGE_SCHEDULER = 0   # 到期的定时任务
+STAGE_INPUT = 1       # 合并后的鼠标输入
+STAGE_TYPING = 2      # 气泡打字效果
+STAGE_SPEED = 3       # 速度控制
+STAGE_DRAG = 4        # 拖动 / 拎起摆动
+STAGE_IDLE = 5        # 空闲检测与空闲事件
+STAGE_RENDER = 6      # 状态图片切换
+STAGE_PHYSICS = 7     # 物理更新（含落地/离地事件）
+STAGE_BUBBLES = 8     # 对话队列与气泡跟随
+STAGE_NAMES = ("scheduler", "input", "typing", "speed", "drag", "idle", "render", "physics", "bubbles")
+
+# 整帧耗时累计直方图的桶上限（秒），用于导出指标
+HISTOGRAM_BOUNDS = (0.0005, 0.001, 0.002, 0.004, 0.008, 0.016, 0.033, 0.066)
+
+
+def default_profile_path(suffix=".json"):
+    """用户目录下按时间命名的分析结果文件"""
+    name = time.strftime("profile-%Y%m%d-%H%M%S") + suffix
+    return os.path.join(os.path.expanduser("~"), ".desktopet", name)
+
+
+class FrameProfiler:
+    """主循环分阶段计时器"""
+
+    def __init__(self, window=600, clock=time.perf_counter_ns):
+        """
+        Args:
+            window: 保留最近多少帧的样本
+            clock: 纳秒计时函数
+        """
+        self.window = window
+        self._clock = clock
+        self.active = None  # 启用时指向自身，关闭时为 None
+        self.holders = set()  # 需要计时的使用者（菜单、调试面板、指标导出），全部释放后才关闭
+        self._bounds_ns = [int(b * 1e9) for b in HISTOGRAM_BOUNDS]
+        self._reset()
+
+    def _reset(self):
+        n = len(STAGE_NAMES)
+        # 环形缓冲：各阶段耗时、整帧耗时、帧间隔和期望帧间隔（纳秒）
+        self._stages = [array("q", bytes(8 * self.window)) for _ in range(n)]
+        self._totals = array("q", bytes(8 * self.window))
+        self._intervals = array("q", bytes(8 * self.window))
+        self._expected = array("q", bytes(8 * self.window))
+        self._current = [0] * n
+        self._index = 0  # 下一帧写入的位置
+        self.frames = 0
+        self.missed_frames = 0
+        # 启用以来的累计直方图：各桶（最后一个为 +Inf）的帧数和总耗时
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.total_ns = 0
+        self._frame_start = 0
+        self._last_lap = 0
+        self._last_begin = 0
+        self._expected_ns = 0
+
+    @property
+    def enabled(self):
+        return self.active is not None
+
+    def set_enabled(self, enabled, holder="user"):
+        """为 holder 启用或释放计时；从关闭变为启用时清空之前的样本"""
+        if enabled:
+            if self.active is None:
+                self._reset()
+                self.active = self
+            self.holders.add(holder)
+        else:
+            self.holders.discard(holder)
+            if not self.holders:
+                self.active = None
+
+    def begin(self, interval_ms):
+        """帧开始：记录与上一帧的实际间隔，超过期望间隔 1.5 倍时计为丢帧"""
+        now = self._clock()
+        self._expected_ns = interval_ms * 1000000
+        if self._last_begin:
+            gap = now - self._last_begin
+            if gap > self._expected_ns * 3 // 2:
+                self.missed_frames += max(1, round(gap / self._expected_ns) - 1)
+            self._intervals[self._index] = gap
+        else:
+            self._intervals[self._index] = self._expected_ns
+        self._last_begin = now
+        self._frame_start = now
+        self._last_lap = now
+        current = self._current
+        for i in range(len(current)):
+            current[i] = 0
+
+    def pause(self):
+        """主循环暂停：下一帧不与暂停前的帧比较间隔（不计为丢帧）"""
+        self._last_begin = 0
+
+    def lap(self, stage):
+        """把上一个计时点到现在的时间计入 stage"""
+        now = self._clock()
+        self._current[stage] += now - self._last_lap
+        self._last_lap = now
+
+    def end(self):
+        """帧结束：提交本帧样本"""
+        i = self._index
+        total = self._clock() - self._frame_start
+        self._totals[i] = total
+        self.histogram[bisect_left(self._bounds_ns, total)] += 1
+        self.total_ns += total
+        self._expected[i] = self._expected_ns
+        for stage, value in enumerate(self._current):
+            self._stages[stage][i] = value
+        self._index = (i + 1) % self.window
+        self.frames += 1
+
+    def _ordered(self, samples):
+        """按时间顺序返回缓冲区中的有效样本"""
+        count = min(self.frames, self.window)
+        if self.frames <= self.window:
+            return samples[:count]
+        return samples[self._index:] + samples[:self._index]
+
+    @staticmethod
+    def _summary(values_ns):
+        values = sorted(v / 1e6 for v in values_ns)
+        return {
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": values[-1] if values else 0.0,
+            "mean": sum(values) / len(values) if values else 0.0,
+        }
+
+    def stats(self, stages=True):
+        """最近 window 帧的统计（毫秒）；stages 为 False 时不统计各阶段（调试面板定期刷新时使用）"""
+        intervals = self._ordered(self._intervals)
+        expected = self._ordered(self._expected)
+        jitter = [abs(a - b) for a, b in zip(intervals, expected)]
+        result = {
+            "frames": self.frames,
+            "window": min(self.frames, self.window),
+            "missed_frames": self.missed_frames,
+            "frame": self._summary(self._ordered(self._totals)),
+            "interval": self._summary(intervals),
+            "jitter": self._summary(jitter),
+        }
+        if stages:
+            result["stages"] = {name: self._summary(self._ordered(self._stages[i]))
+                                for i, name in enumerate(STAGE_NAMES)}
+        return result
+
+    def write(self, path=None):
+        """写入分析结果：.csv 为逐帧样本，其他扩展名为 JSON 统计
+
+        Returns:
+            str: 写入的文件路径，失败时返回 None
+        """
+        path = path or default_profile_path()
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            if path.lower().endswith(".csv"):
+                self._write_csv(path)
+            else:
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(self.stats(), f, indent=2)
+        except OSError as e:
+            print(f"写入帧耗时分析失败: {e}")
+            return None
+        return path
+
+    def _write_csv(self, path):
+        columns = [self._ordered(self._intervals), self._ordered(self._expected), self._ordered(self._totals)]
+        columns += [self._ordered(samples) for samples in self._stages]
+        first = self.frames - min(self.frames, self.window)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "interval_ms", "expected_ms", "frame_ms"] + [f"{n}_ms" for n in STAGE_NAMES])
+            for row, values in enumerate(zip(*columns)):
+                writer.writerow([first + row] + [f"{v / 1e6:.4f}" for v in values])
@@ -1,9 +1,11 @@
-import os
-import sys
-from PyQt5.QtGui import QMovie, QPixmap, QTransform
-from PyQt5.QtCore import Qt, QSize
+from collections.abc import Mapping
+from PyQt5.QtGui import QMovie, QPixmap, QTransform, QImage, QImageReader
+from PyQt5.QtCore import Qt, QSize, QBuffer, QByteArray, QIODevice
 from PyQt5.QtWidgets import QLabel
-import json
+from config_loader import load_config, config_path, ASSETS_FILE
+from events import STATE_CHANGED
+from resources import get_resources
+from sprite_cache import SpriteDiskCache
 
 class Renderer:
     def __init__(self, pet_widget, asset_path=None, max_width=None, max_height=None):
@@ -14,6 +16,19 @@ class Renderer:
         self.label.setAttribute(Qt.WA_TranslucentBackground, True)
         self.label.setScaledContents(True)
         
+        # 资源加载器：图片按相对名称读取，可以来自程序目录或压缩包
+        self.resources = get_resources()
+        self._movie_buffer = None  # 从压缩包播放 GIF 时 QMovie 读取的缓冲区
+        
+        # 已解码的精灵图缓存：状态名 -> (资源路径, QPixmap)
+        self._sprite_cache = {}
+        self.sprite_cache_hits = 0
+        self.sprite_cache_misses = 0
+        # 已缩放（和镜像）的精灵图：(状态名, 朝向) -> (缓存键, QPixmap)，并持久化到磁盘
+        self._scaled_cache = {}
+        self.disk_cache = SpriteDiskCache()
+        self._base_key = None  # 当前基础图片的 (状态名, 资源路径, 目标尺寸)
+        
         # 从配置文件加载状态与图片路径的字典
         self._states = {}
         self._default_asset = "assets/扫地机器人.png"
@@ -23,19 +38,19 @@ class Renderer:
         if asset_path is None:
             asset_path = self._default_asset
         
-        # 获取正确的资源路径（支持PyInstaller打包后的环境）
-        asset_path = self._get_absolute_path(asset_path)
-        
         # 兼容 GIF/PNG
         self._dir = 1  # 朝向：1 面向右，-1 面向左
         self.asset_path = asset_path
         self._is_movie = asset_path.lower().endswith(".gif")
         self.current_state = "default"  # 跟踪当前状态
         self.current_scale = 1.0  # 缓存当前缩放比例
+        self.movie = None
+        self.movie_speed = 100  # GIF 播放速度（百分比），由电源配置调整
+        self.transform_mode = Qt.SmoothTransformation  # 缩放和镜像的变换质量
         
         # 加载资源并设置初始尺寸
         if self._is_movie:
-            self.movie = QMovie(asset_path)
+            self.movie = self._open_movie(asset_path)
             # 初始原始尺寸
             base_size = self.movie.frameRect().size()
             # 计算目标尺寸（可选）
@@ -48,18 +63,19 @@ class Renderer:
                 size = base_size
             # 不将 movie 直接绑定到 label，转为手动更新以支持镜像
             self.movie.frameChanged.connect(self._on_movie_frame)
+            self.movie.setSpeed(self.movie_speed)
             self.movie.start()
         else:
-            self.pixmap = QPixmap(asset_path)
-            base_size = self.pixmap.size()
+            # 只读取图片头获取尺寸，磁盘缓存命中时不需要解码
+            base_size = self._image_size(asset_path)
+            if not base_size.isValid():
+                base_size = self._load_sprite(self.current_state, asset_path).size()
             if max_width or max_height:
                 target = QSize(max_width or base_size.width(), max_height or base_size.height())
-                scaled_pixmap = self.pixmap.scaled(target, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                self._base_pixmap = scaled_pixmap
-                size = scaled_pixmap.size()
             else:
-                self._base_pixmap = self.pixmap
-                size = base_size
+                target = base_size
+            self._set_base(self.current_state, asset_path, target)
+            size = self._base_pixmap.size()
             # 初始化展示
             self._refresh_label_pixmap()
         
@@ -68,120 +84,207 @@ class Renderer:
         self.pet_widget.resize(size)
         self.label.resize(size)
     
-    def _get_absolute_path(self, relative_path):
-        # """获取资源文件的绝对路径，支持PyInstaller打包后的环境"""
-        # 原始的相对路径处理方式（注释掉，保留用于调试）
-        # return relative_path
-        
+    def _open_movie(self, asset_path):
+        """打开 GIF 动画；资源不在磁盘上时从内存缓冲区播放"""
+        self._movie_buffer = None
+        local = self.resources.local_path(asset_path)
+        if local is not None:
+            return QMovie(local)
         try:
-            # PyInstaller会创建一个临时文件夹，并把路径存储在_MEIPASS中
-            base_path = sys._MEIPASS
-        except Exception:
-            # 如果不是PyInstaller打包的环境，则使用当前工作目录
-            base_path = os.path.abspath("..")
-        
-        # 确保路径格式正确（处理Windows路径）
-        return os.path.join(base_path, relative_path).replace("/", os.path.sep)
+            data = self.resources.read_bytes(asset_path)
+        except OSError as e:
+            print(f"读取动画失败 {asset_path}: {e}")
+            data = b""
+        # QMovie 播放期间持续读取缓冲区，需要保持引用
+        self._movie_buffer = QBuffer()
+        self._movie_buffer.setData(QByteArray(data))
+        self._movie_buffer.open(QIODevice.ReadOnly)
+        return QMovie(self._movie_buffer)
+    
+    def _image_size(self, asset_path):
+        """只读取图片头获取原始尺寸"""
+        local = self.resources.local_path(asset_path)
+        if local is not None:
+            return QImageReader(local).size()
+        try:
+            data = self.resources.read_bytes(asset_path)
+        except OSError:
+            return QSize()
+        buffer = QBuffer()
+        buffer.setData(QByteArray(data))
+        buffer.open(QIODevice.ReadOnly)
+        return QImageReader(buffer).size()
+    
+    @property
+    def config_path(self):
+        """图片资源配置文件路径"""
+        return config_path(ASSETS_FILE)
     
     def _load_assets_from_config(self):
-        """从配置文件加载图片资源路径"""
-        config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pic_asset.json")
+        """从配置文件加载图片资源路径（与其他使用者共享同一份只读配置）"""
+        config = load_config(ASSETS_FILE)
+        self._states = config["states"]
+        self._default_asset = config["default_asset"]
+    
+    def apply_config(self, config):
+        """应用重新加载的资源配置，只淘汰路径发生变化的状态
         
-        # 默认配置，当配置文件不存在或加载失败时使用
-        default_config = {
-            "states": {
-                "default": "assets/扫地机器人.png",
-                "shache": "assets/brake.png"
-            },
-            "default_asset": "assets/扫地机器人.png"
-        }
+        Returns:
+            set: 路径发生变化（包括新增和删除）的状态名
+        """
+        states = config.get("states")
+        if not isinstance(states, Mapping):
+            return set()
+        changed = {name for name in set(states) | set(self._states)
+                   if states.get(name) != self._states.get(name)}
+        for name in changed:
+            self._sprite_cache.pop(name, None)
+            self._scaled_cache.pop((name, 1), None)
+            self._scaled_cache.pop((name, -1), None)
+        self._states = states
+        if "default_asset" in config:
+            self._default_asset = config["default_asset"]
+        # 当前状态的图片变化时立即重新加载
+        if self.current_state in changed:
+            if self.current_state in self._states:
+                self._switch_to_state_image(self.current_state, force=True)
+            else:
+                self._switch_to_state_image("default", force=True)
+        return changed
+    
+    def _load_sprite(self, state_name, asset_path):
+        """从缓存获取状态对应的已解码图片，未命中时通过资源加载器读取"""
+        entry = self._sprite_cache.get(state_name)
+        if entry is not None and entry[0] == asset_path:
+            self.sprite_cache_hits += 1
+            return entry[1]
+        self.sprite_cache_misses += 1
+        local = self.resources.local_path(asset_path)
+        if local is not None:
+            pixmap = QPixmap(local)
+        else:
+            # 压缩包中的图片直接从内存解码，不解压到临时目录
+            image = QImage()
+            try:
+                image.loadFromData(self.resources.read_bytes(asset_path))
+            except OSError as e:
+                print(f"读取图片失败 {asset_path}: {e}")
+            pixmap = QPixmap.fromImage(image)
+        self._sprite_cache[state_name] = (asset_path, pixmap)
+        return pixmap
+    
+    def _scaled_sprite(self, state_name, asset_path, target, direction=1):
+        """获取缩放到 target（并按朝向镜像）的精灵图
         
-        try:
-            if os.path.exists(config_path):
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    # 加载状态与图片路径
-                    if "states" in config and isinstance(config["states"], dict):
-                        self._states = config["states"]
-                    else:
-                        self._states = default_config["states"]
-                    # 加载默认资源
-                    if "default_asset" in config:
-                        self._default_asset = config["default_asset"]
-                    else:
-                        self._default_asset = default_config["default_asset"]
+        依次查找内存缓存、磁盘缓存，都未命中时才解码和重新采样，结果写回两级缓存。
+        """
+        smooth = self.transform_mode == Qt.SmoothTransformation
+        key = (asset_path, target.width(), target.height(), direction, smooth)
+        entry = self._scaled_cache.get((state_name, direction))
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        signature = self.resources.signature(asset_path)
+        pixmap = self.disk_cache.load(signature, target.width(), target.height(), direction, smooth)
+        if pixmap is None:
+            if direction == 1:
+                pixmap = self._load_sprite(state_name, asset_path).scaled(target, Qt.KeepAspectRatio, self.transform_mode)
             else:
-                # 如果配置文件不存在，创建默认配置文件
-                os.makedirs(os.path.dirname(config_path), exist_ok=True)
-                with open(config_path, 'w', encoding='utf-8') as f:
-                    json.dump(default_config, f, indent=2, ensure_ascii=False)
-                # 使用默认配置
-                self._states = default_config["states"]
-                self._default_asset = default_config["default_asset"]
-        except Exception as e:
-            print(f"加载资源配置失败: {e}")
-            # 使用默认配置
-            self._states = default_config["states"]
-            self._default_asset = default_config["default_asset"]
+                pixmap = self._scaled_sprite(state_name, asset_path, target).transformed(
+                    QTransform().scale(-1, 1), self.transform_mode)
+            self.disk_cache.store(signature, target.width(), target.height(), direction, smooth, pixmap)
+        self._scaled_cache[(state_name, direction)] = (key, pixmap)
+        return pixmap
+    
+    def _set_base(self, state_name, asset_path, target):
+        """设置当前显示的基础图片（未镜像）"""
+        self._base_key = (state_name, asset_path, target)
+        self._base_pixmap = self._scaled_sprite(state_name, asset_path, target)
     
-    def _switch_to_state_image(self, state_name):
+    def _state_target(self, state_name):
+        """状态图片的目标尺寸：统一的基准尺寸 × 状态缩放系数 × 当前缩放比例"""
+        # 为不同状态设置不同的缩放系数
+        scale_factors = {
+            "sleep": (1.0, 1.0),  # 宽度和高度的缩放系数
+            "default": (1.0, 1.0),
+            "shache": (1.0, 1.0)
+            # 可以根据需要为其他状态添加缩放系数
+        }
+        
+        # 获取当前状态的缩放系数，如果没有则使用默认值
+        scale_x, scale_y = scale_factors.get(state_name, (1.0, 1.0))
+        
+        # 应用缩放系数到统一的基准尺寸，并考虑当前缓存的缩放比例
+        return QSize(
+            int(self.base_size.width() * scale_x * self.current_scale), 
+            int(self.base_size.height() * scale_y * self.current_scale)
+        )
+    
+    def preload_sprites(self):
+        """按当前缩放和朝向预先准备所有静态图片状态，之后切换状态时不再读取磁盘
+        
+        磁盘缓存命中时只映射缓存文件，不解码 PNG。
+        
+        Returns:
+            int: 新准备的图片数量
+        """
+        count = 0
+        for state_name, asset_path in self._states.items():
+            if asset_path.lower().endswith(".gif"):
+                continue
+            target = self._state_target(state_name)
+            for direction in {1, self._dir}:
+                if (state_name, direction) not in self._scaled_cache:
+                    count += 1
+                self._scaled_sprite(state_name, asset_path, target, direction)
+        return count
+    
+    def sprite_cache_bytes(self):
+        """估算精灵图缓存占用的内存（字节）"""
+        pixmaps = [pix for _, pix in self._sprite_cache.values()]
+        pixmaps += [pix for _, pix in self._scaled_cache.values()]
+        return sum(pix.width() * pix.height() * pix.depth() // 8 for pix in pixmaps)
+    
+    def _switch_to_state_image(self, state_name, force=False):
         """根据状态名称切换图像资源"""
         if state_name not in self._states:
             return False
         
-        self.current_state = state_name  # 更新当前状态
         new_asset_path = self._states[state_name]
         
-        # 原始的路径访问方式（注释掉，保留用于调试）
-        # original_new_asset_path = new_asset_path
+        # 已经显示该状态的图片时不重复加载（例如高速时每帧都会请求刹车图片）
+        if not force and state_name == self.current_state and new_asset_path == self.asset_path:
+            return True
         
-        # 获取正确的资源路径（支持PyInstaller打包后的环境）
-        new_asset_path = self._get_absolute_path(new_asset_path)
+        state_changed = state_name != self.current_state
+        self.current_state = state_name  # 更新当前状态
         
         # 停止之前的动画（如果有）
-        if hasattr(self, 'movie') and self.movie:
+        if self.movie:
             self.movie.stop()
             self.movie.frameChanged.disconnect(self._on_movie_frame)
             self.movie = None
+            self._movie_buffer = None
         
         # 更新asset_path和is_movie属性
         self.asset_path = new_asset_path
         self._is_movie = new_asset_path.lower().endswith(".gif")
         
-        # 为不同状态设置不同的缩放系数
-        scale_factors = {
-            "sleep": (1.0, 1.0),  # 宽度和高度的缩放系数
-            "default": (1.0, 1.0),
-            "shache": (1.0, 1.0)
-            # 可以根据需要为其他状态添加缩放系数
-        }
-        
-        # 获取当前状态的缩放系数，如果没有则使用默认值
-        scale_x, scale_y = scale_factors.get(state_name, (1.0, 1.0))
-        
-        # 应用缩放系数到统一的基准尺寸，并考虑当前缓存的缩放比例
-        target = QSize(
-            int(self.base_size.width() * scale_x * self.current_scale), 
-            int(self.base_size.height() * scale_y * self.current_scale)
-        )
+        target = self._state_target(state_name)
         
         # 加载新的资源
         if self._is_movie:
-            self.movie = QMovie(new_asset_path)
+            self.movie = self._open_movie(new_asset_path)
             
             # 应用统一基准尺寸的缩放和缓存的缩放比例
             new_size = self.movie.frameRect().size().scaled(target, Qt.KeepAspectRatio)
             self.movie.setScaledSize(new_size)
             # 连接信号并启动动画
             self.movie.frameChanged.connect(self._on_movie_frame)
+            self.movie.setSpeed(self.movie_speed)
             self.movie.start()
         else:
-            self.pixmap = QPixmap(new_asset_path)
-            
-            # 应用统一基准尺寸的缩放和缓存的缩放比例
-            scaled_pixmap = self.pixmap.scaled(target, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self._base_pixmap = scaled_pixmap
-            new_size = scaled_pixmap.size()
+            # 应用统一基准尺寸的缩放和缓存的缩放比例（优先使用缓存的缩放结果）
+            self._set_base(state_name, new_asset_path, target)
             
             # 刷新显示
             self._refresh_label_pixmap()
@@ -190,9 +293,26 @@ class Renderer:
         self.pet_widget.resize(target)
         self.label.resize(target)
         
+        if state_changed:
+            self.pet_widget.events.publish(STATE_CHANGED, state_name)
         return True
 
 
+    def set_movie_speed(self, percent):
+        """设置 GIF 播放速度（百分比）"""
+        self.movie_speed = percent
+        if self.movie:
+            self.movie.setSpeed(percent)
+    
+    def set_render_quality(self, smooth):
+        """设置缩放和镜像使用平滑变换还是快速变换"""
+        mode = Qt.SmoothTransformation if smooth else Qt.FastTransformation
+        if mode != self.transform_mode:
+            self.transform_mode = mode
+            if not self._is_movie and self._base_key is not None:
+                self._set_base(*self._base_key)
+            self._refresh_label_pixmap()
+    
     def _refresh_label_pixmap(self):
         """刷新标签上显示的图像"""
         if self._is_movie:
@@ -200,12 +320,13 @@ class Renderer:
             pix = self.movie.currentPixmap()
             if not pix.isNull():
                 if self._dir == -1:
-                    pix = pix.transformed(QTransform().scale(-1, 1), Qt.SmoothTransformation)
+                    pix = pix.transformed(QTransform().scale(-1, 1), self.transform_mode)
                 self.label.setPixmap(pix)
         else:
             pix = self._base_pixmap
             if self._dir == -1:
-                pix = pix.transformed(QTransform().scale(-1, 1), Qt.SmoothTransformation)
+                # 镜像结果同样缓存，转向时不再逐像素变换
+                pix = self._scaled_sprite(*self._base_key, -1)
             self.label.setPixmap(pix)
     
     def _on_movie_frame(self, _index):
@@ -215,7 +336,7 @@ class Renderer:
         if pix.isNull():
             return
         if self._dir == -1:
-            pix = pix.transformed(QTransform().scale(-1, 1), Qt.SmoothTransformation)
+            pix = pix.transformed(QTransform().scale(-1, 1), self.transform_mode)
         self.label.setPixmap(pix)
     
     def turn_to(self, direction: int, animate: bool = True):
@@ -243,9 +364,8 @@ class Renderer:
             self.label.resize(new_w, height0)
             self.pet_widget.resize(new_w, height0)
             # 只在地面上时才执行贴地操作
-            if hasattr(self.pet_widget, 'physics_system') and self.pet_widget.physics_system.on_ground:
-                if hasattr(self.pet_widget, '_stick_to_ground'):
-                    self.pet_widget._stick_to_ground()
+            if self.pet_widget.physics_system.on_ground:
+                self.pet_widget._stick_to_ground()
             QApplication.processEvents()
         
         # 翻转方向
@@ -259,9 +379,8 @@ class Renderer:
             self.label.resize(new_w, height0)
             self.pet_widget.resize(new_w, height0)
             # 只在地面上时才执行贴地操作
-            if hasattr(self.pet_widget, 'physics_system') and self.pet_widget.physics_system.on_ground:
-                if hasattr(self.pet_widget, '_stick_to_ground'):
-                    self.pet_widget._stick_to_ground()
+            if self.pet_widget.physics_system.on_ground:
+                self.pet_widget._stick_to_ground()
             QApplication.processEvents()
     
     def face_left(self, animate: bool = True):
@@ -291,8 +410,7 @@ class Renderer:
             w = max(1, int(self.base_size.width() * scale_factor))
             h = max(1, int(self.base_size.height() * scale_factor))
             target = QSize(w, h)
-            scaled_pixmap = self._base_pixmap.scaled(target, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self._base_pixmap = scaled_pixmap
+            self._set_base(self.current_state, self.asset_path, target)
             self._refresh_label_pixmap()
-            self.label.resize(scaled_pixmap.size())
-            self.pet_widget.resize(scaled_pixmap.size())
\ No newline at end of file
+            self.label.resize(self._base_pixmap.size())
+            self.pet_widget.resize(self._base_pixmap.size())
\ No newline at end of file
@@ -0,0 +1,164 @@
+import importlib.resources
+import os
+import sys
+import threading
+import zipfile
+import zipimport
+import zlib
+
+# 资源加载：图片和 JSON 配置统一按相对名称（例如 "assets/sleep.png"）读取，
+# 可以来自程序目录、zip 压缩包（包括 zipapp）或 Python 包（importlib.resources）。
+# 打包后的程序直接从压缩包读取字节，不需要先解压到临时目录。
+
+# 环境变量：指定资源目录、zip 文件，或 "pkg:包名"
+RESOURCES_ENV = "DESKTOPET_RESOURCES"
+
+
+def _normalize(name):
+    return name.replace("\\", "/").lstrip("/")
+
+
+class FileSystemResources:
+    """从目录读取资源"""
+    kind = "filesystem"
+
+    def __init__(self, base_dir):
+        self.base_dir = os.path.abspath(base_dir)
+
+    def local_path(self, name):
+        """资源在磁盘上的路径（可以直接交给需要文件路径的接口）"""
+        return os.path.join(self.base_dir, _normalize(name)).replace("/", os.path.sep)
+
+    def exists(self, name):
+        return os.path.isfile(self.local_path(name))
+
+    def read_bytes(self, name):
+        with open(self.local_path(name), "rb") as f:
+            return f.read()
+
+    def signature(self, name):
+        """资源版本标识（用于缓存失效），资源不存在时返回 None"""
+        try:
+            st = os.stat(self.local_path(name))
+        except OSError:
+            return None
+        return (self.local_path(name), st.st_mtime_ns, st.st_size)
+
+
+class ArchiveResources:
+    """从 zip 压缩包（或 zipapp）中直接读取资源，不解压到磁盘"""
+    kind = "zip"
+
+    def __init__(self, archive, prefix=""):
+        self.archive = os.path.abspath(archive)
+        self.prefix = _normalize(prefix)
+        if self.prefix and not self.prefix.endswith("/"):
+            self.prefix += "/"
+        self._zip = zipfile.ZipFile(self.archive)
+        self._lock = threading.Lock()  # ZipFile 不能在多个线程中同时读取
+        st = os.stat(self.archive)
+        self._archive_sig = (self.archive, st.st_mtime_ns, st.st_size)
+
+    def local_path(self, name):
+        return None
+
+    def _info(self, name):
+        try:
+            return self._zip.getinfo(self.prefix + _normalize(name))
+        except KeyError:
+            return None
+
+    def exists(self, name):
+        return self._info(name) is not None
+
+    def read_bytes(self, name):
+        info = self._info(name)
+        if info is None:
+            raise FileNotFoundError(f"{self.archive}: {name}")
+        with self._lock:
+            return self._zip.read(info)
+
+    def signature(self, name):
+        info = self._info(name)
+        if info is None:
+            return None
+        return self._archive_sig + (info.filename, info.CRC, info.file_size)
+
+
+class PackageResources:
+    """通过 importlib.resources 从 Python 包中读取资源（包可以位于 zip 或 wheel 中）"""
+    kind = "package"
+
+    def __init__(self, package):
+        self.package = package
+        self._root = importlib.resources.files(package)
+
+    def _node(self, name):
+        node = self._root
+        for part in _normalize(name).split("/"):
+            node = node.joinpath(part)
+        return node
+
+    def local_path(self, name):
+        # 只有包位于普通目录时才有真实路径
+        node = self._node(name)
+        return str(node) if isinstance(node, os.PathLike) and os.path.isfile(node) else None
+
+    def exists(self, name):
+        return self._node(name).is_file()
+
+    def read_bytes(self, name):
+        return self._node(name).read_bytes()
+
+    def signature(self, name):
+        node = self._node(name)
+        if not node.is_file():
+            return None
+        path = self.local_path(name)
+        if path is not None:
+            st = os.stat(path)
+            return (path, st.st_mtime_ns, st.st_size)
+        # 压缩包中的资源没有修改时间，用内容校验和标识
+        data = node.read_bytes()
+        return (self.package, name, len(data), zlib.crc32(data))
+
+
+def program_dir():
+    """程序所在目录（PyInstaller 打包时为解压目录）"""
+    meipass = getattr(sys, "_MEIPASS", None)
+    if meipass:
+        return meipass
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def detect_resources():
+    """按运行方式选择资源来源"""
+    override = os.environ.get(RESOURCES_ENV)
+    if override:
+        if override.startswith("pkg:"):
+            return PackageResources(override[4:])
+        if zipfile.is_zipfile(override):
+            return ArchiveResources(override)
+        return FileSystemResources(override)
+    # 以 zipapp 方式运行（python desktopet.pyz）时，资源与代码在同一个压缩包中
+    loader = globals().get("__loader__")
+    if isinstance(loader, zipimport.zipimporter):
+        return ArchiveResources(loader.archive, loader.prefix)
+    return FileSystemResources(program_dir())
+
+
+_resources = None
+
+
+def get_resources():
+    """进程内共享的资源加载器"""
+    global _resources
+    if _resources is None:
+        _resources = detect_resources()
+    return _resources
+
+
+def set_resources(resources):
+    """替换共享的资源加载器（测试和基准测试使用）"""
+    global _resources
+    _resources = resources
@@ -0,0 +1,115 @@
+import heapq
+import itertools
+import time
+
+
+class TimerHandle:
+    """定时任务句柄，可通过 Scheduler.cancel() 或 handle.cancel() 取消"""
+    __slots__ = ("deadline", "interval", "callback", "cancelled", "_scheduler")
+
+    def __init__(self, scheduler, deadline, interval, callback):
+        self._scheduler = scheduler
+        self.deadline = deadline  # 到期时间（单调时钟，秒）
+        self.interval = interval  # 周期（秒），None 表示只执行一次
+        self.callback = callback
+        self.cancelled = False
+
+    @property
+    def active(self):
+        """任务是否仍在等待执行"""
+        return not self.cancelled
+
+    def remaining(self, now=None):
+        """距离到期还剩多少秒"""
+        if now is None:
+            now = self._scheduler.now()
+        return max(0.0, self.deadline - now)
+
+    def cancel(self):
+        self._scheduler.cancel(self)
+
+
+class Scheduler:
+    """基于小顶堆的定时器，统一管理所有延时和周期事件
+
+    由宠物主循环每帧调用 advance() 推进；主循环停止时，
+    on_deadline_changed 回调可以据 next_deadline() 安排一次唤醒，
+    这样只有在确实有任务到期时进程才会被唤醒。
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._heap = []  # [(deadline, seq, handle), ...]，取消的任务惰性删除
+        self._seq = itertools.count()
+        self._active = 0
+        self.on_deadline_changed = None  # 最早到期时间可能变化时的回调
+
+    def now(self):
+        """调度器使用的单调时钟（秒）"""
+        return self._clock()
+
+    def __len__(self):
+        """等待执行的任务数"""
+        return self._active
+
+    def _push(self, handle):
+        first = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (handle.deadline, next(self._seq), handle))
+        if self.on_deadline_changed is not None and (first is None or handle.deadline < first):
+            self.on_deadline_changed()
+
+    def call_later(self, delay, callback):
+        """delay 秒后执行一次 callback"""
+        handle = TimerHandle(self, self.now() + max(0.0, delay), None, callback)
+        self._active += 1
+        self._push(handle)
+        return handle
+
+    def call_every(self, interval, callback, first_delay=None):
+        """每隔 interval 秒执行一次 callback"""
+        if interval <= 0:
+            raise ValueError("interval 必须大于0")
+        delay = interval if first_delay is None else first_delay
+        handle = TimerHandle(self, self.now() + max(0.0, delay), interval, callback)
+        self._active += 1
+        self._push(handle)
+        return handle
+
+    def cancel(self, handle):
+        """取消任务（对已执行或已取消的任务无效果）"""
+        if handle is not None and not handle.cancelled:
+            handle.cancelled = True
+            self._active -= 1
+
+    def next_deadline(self):
+        """最早的到期时间，没有任务时返回 None"""
+        heap = self._heap
+        while heap and heap[0][2].cancelled:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def advance(self, now=None):
+        """执行所有已到期的任务，返回执行的数量"""
+        if now is None:
+            now = self.now()
+        heap = self._heap
+        fired = 0
+        while heap and heap[0][0] <= now:
+            _, _, handle = heapq.heappop(heap)
+            if handle.cancelled:
+                continue
+            if handle.interval is None:
+                handle.cancelled = True
+                self._active -= 1
+            else:
+                # 周期任务：落后太多时不补执行，直接排到下一个周期
+                handle.deadline += handle.interval
+                if handle.deadline <= now:
+                    handle.deadline = now + handle.interval
+                heapq.heappush(heap, (handle.deadline, next(self._seq), handle))
+            fired += 1
+            try:
+                handle.callback()
+            except Exception as e:
+                print(f"定时任务执行失败: {e}")
+        return fired
@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+
+
+def default_settings_path():
+    """用户目录下的设置文件路径"""
+    return os.path.join(os.path.expanduser("~"), ".desktopet", "settings.json")
+
+
+class SettingsStore:
+    """设置存储：内存中保存最新设置，后台线程合并短时间内的多次修改后再写入
+
+    写入时先写临时文件并刷新到磁盘，再用 os.replace 原子替换，
+    写入过程中崩溃也不会损坏原来的设置文件。
+    """
+
+    def __init__(self, path=None, debounce=1.0):
+        self.path = path or default_settings_path()
+        self.debounce = debounce  # 最后一次修改后等待多久再写入（秒）
+        self.writes = 0  # 实际写入磁盘的次数
+        self._data = {}
+        self._version = 0  # 每次修改递增
+        self._saved_version = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="SettingsStore", daemon=True)
+        self._thread.start()
+
+    def load(self):
+        """同步读取设置文件（启动时在首次绘制前调用），失败时返回空字典"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        except Exception as e:
+            print(f"加载设置失败: {e}")
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        with self._cond:
+            self._data = dict(data)
+        return dict(data)
+
+    def get(self, key, default=None):
+        with self._cond:
+            return self._data.get(key, default)
+
+    def update(self, values):
+        """合并新的设置值；有变化时安排一次延迟写入（关闭后直接同步写入）"""
+        with self._cond:
+            changed = any(self._data.get(k) != v for k, v in values.items())
+            if not changed:
+                return
+            self._data.update(values)
+            self._version += 1
+            if not self._closed:
+                self._cond.notify()
+                return
+        self._write_pending()
+
+    def flush(self):
+        """立即写入尚未保存的修改"""
+        self._write_pending()
+
+    def close(self):
+        """写入尚未保存的修改并停止后台线程"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=2.0)
+        self._write_pending()
+
+    def _run(self):
+        cond = self._cond
+        with cond:
+            while not self._closed:
+                if self._version == self._saved_version:
+                    cond.wait()
+                    continue
+                # 等待修改停止 debounce 秒，期间的修改合并为一次写入
+                version = self._version
+                cond.wait(self.debounce)
+                if self._version != version:
+                    continue
+                cond.release()
+                try:
+                    self._write_pending()
+                finally:
+                    cond.acquire()
+
+    def _write_pending(self):
+        with self._write_lock:
+            with self._cond:
+                if self._version == self._saved_version:
+                    return
+                version = self._version
+                data = dict(self._data)
+            if self._write_atomic(data):
+                with self._cond:
+                    self._saved_version = max(self._saved_version, version)
+
+    def _write_atomic(self, data):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self.writes += 1
+            return True
+        except Exception as e:
+            print(f"保存设置失败: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return False
@@ -0,0 +1,211 @@
+import os
+import struct
+import time
+import zlib
+
+# 运行状态快照：把每只宠物的完整运行状态（位置、物理、速度控制、空闲计时、
+# 睡眠/拎起状态、摆动和当前气泡）按固定格式打包为二进制，恢复时原样还原场景，
+# 抛在半空中的宠物也会继续原来的轨迹。
+
+MAGIC = b"DPSN"
+VERSION = 2  # 格式版本，字段含义变化时需要递增
+
+_PREFIX = struct.Struct("<4sH")  # 魔数, 版本（各版本都以此开头）
+_HEADER = struct.Struct("<4sHIH")  # 魔数, 版本, 结构布局校验值, 宠物数量
+_STR = struct.Struct("<H")  # 字符串长度（UTF-8 字节数）
+# x, y, 缩放, 朝向, 帧间隔(毫秒), 是否睡眠, 是否被拎起, 总点击次数, 互动次数
+_PET = struct.Struct("<iidbH??II")
+# vx(像素/帧), vy(像素/秒), 剩余反弹次数, 是否在地面, 空中宽限时间
+_PHYSICS = struct.Struct("<ddi?d")
+# 随机速度开关, 当前速度, 目标速度, 距下次变速, 摩擦开关, 距摩擦激活, 摩擦等待中, 摩擦激活, 摩擦冷却, 刚被抛出
+_SPEED = struct.Struct("<?ddd?d??d?")
+# 空闲时间, 已开始空闲的秒数(-1表示不空闲), 是否空闲, 阈值, 是否已到达阈值
+_IDLE = struct.Struct("<dd?d?")
+# 摆动角度, 角速度, 鼠标水平速度, 是否有拎起锚点, 锚点x, 锚点y
+_SWING = struct.Struct("<ddd?ii")
+# 是否有气泡；有气泡时后接文本和 _BUBBLE
+_HAS_BUBBLE = struct.Struct("<?")
+# 优先级, 自动关闭时间(毫秒), 打字速度(毫秒/字符), 已显示字符数, 打字是否完成, 距离关闭的毫秒数
+_BUBBLE = struct.Struct("<iidI?d")
+
+
+# 所有记录格式的校验值：布局变化但忘记递增版本时也能拒绝旧快照
+LAYOUT = zlib.crc32("|".join(fmt.format for fmt in (_STR, _PET, _PHYSICS, _SPEED, _IDLE, _SWING,
+                                                    _HAS_BUBBLE, _BUBBLE)).encode("ascii"))
+
+
+def default_snapshot_path():
+    """用户目录下的快照文件路径"""
+    return os.path.join(os.path.expanduser("~"), ".desktopet", "snapshot.bin")
+
+
+def _pack_str(parts, text):
+    data = text.encode("utf-8")
+    parts.append(_STR.pack(len(data)))
+    parts.append(data)
+
+
+def _unpack_str(data, offset):
+    (length,) = _STR.unpack_from(data, offset)
+    offset += _STR.size
+    return data[offset:offset + length].decode("utf-8"), offset + length
+
+
+def _capture_pet(pet, parts):
+    behavior = pet.behavior_controller
+    parts.append(_PET.pack(pet.x(), pet.y(), pet._scale_factor, pet.renderer._dir,
+                           max(1, pet._walk_timer.interval()), pet.is_currently_sleeping,
+                           pet.is_in_lift_state, pet.total_click_count, pet.dialog_manager.interaction_count))
+    _pack_str(parts, pet.renderer.current_state)
+    parts.append(_PHYSICS.pack(*pet.physics_system.get_state()))
+    parts.append(_SPEED.pack(*pet.speed_controller.get_state()))
+    parts.append(_IDLE.pack(*pet.idle_tracker.get_state()))
+    anchor = behavior._lift_anchor
+    parts.append(_SWING.pack(*behavior._swing.get_state(), anchor is not None,
+                             *(anchor if anchor is not None else (0, 0))))
+    bubble = pet.dialog_manager.bubble_state()
+    parts.append(_HAS_BUBBLE.pack(bubble is not None))
+    if bubble is not None:
+        _pack_str(parts, bubble[0])
+        parts.append(_BUBBLE.pack(*bubble[1:]))
+
+
+def dumps(pets):
+    """把若干宠物的运行状态打包为二进制快照
+
+    Raises:
+        ValueError: 某个值超出快照格式的范围
+    """
+    parts = [_HEADER.pack(MAGIC, VERSION, LAYOUT, len(pets))]
+    try:
+        for pet in pets:
+            _capture_pet(pet, parts)
+    except struct.error as e:
+        raise ValueError(f"无法打包快照: {e}")
+    return b"".join(parts)
+
+
+def _read_pet(data, offset):
+    """解析一只宠物的状态，返回 (状态字典, 新偏移)"""
+    state = {}
+    state["pet"] = _PET.unpack_from(data, offset)
+    offset += _PET.size
+    state["image"], offset = _unpack_str(data, offset)
+    for key, fmt in (("physics", _PHYSICS), ("speed", _SPEED), ("idle", _IDLE), ("swing", _SWING)):
+        state[key] = fmt.unpack_from(data, offset)
+        offset += fmt.size
+    (has_bubble,) = _HAS_BUBBLE.unpack_from(data, offset)
+    offset += _HAS_BUBBLE.size
+    state["bubble"] = None
+    if has_bubble:
+        text, offset = _unpack_str(data, offset)
+        state["bubble"] = (text,) + _BUBBLE.unpack_from(data, offset)
+        offset += _BUBBLE.size
+    return state, offset
+
+
+def loads(data):
+    """解析二进制快照，返回每只宠物的状态字典列表
+
+    Raises:
+        ValueError: 快照格式或版本不匹配
+    """
+    try:
+        magic, version = _PREFIX.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("不是快照文件")
+        if version != VERSION:
+            raise ValueError(f"快照版本 {version} 与当前版本 {VERSION} 不兼容")
+        _, _, layout, count = _HEADER.unpack_from(data, 0)
+    except struct.error as e:
+        raise ValueError(f"快照数据不完整: {e}")
+    if layout != LAYOUT:
+        raise ValueError("快照的数据布局与当前版本不一致")
+    offset = _HEADER.size
+    states = []
+    try:
+        for _ in range(count):
+            state, offset = _read_pet(data, offset)
+            states.append(state)
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"快照数据损坏: {e}")
+    return states
+
+
+def _restore_pet(pet, state):
+    x, y, scale, facing, tick_ms, sleeping, lifted, clicks, interactions = state["pet"]
+    renderer = pet.renderer
+
+    # 先恢复尺寸和图片，再恢复位置（位置依赖窗口尺寸）
+    if scale != pet._scale_factor:
+        pet._scale_factor = scale
+        renderer.apply_scale(scale)
+    if state["image"] in renderer._states:
+        renderer._switch_to_state_image(state["image"], force=True)
+    renderer.turn_to(facing, animate=False)
+    pet.move(x, y)
+
+    # 水平速度以“像素/帧”保存，按当前帧间隔换算
+    physics = list(state["physics"])
+    interval = max(1, pet._walk_timer.interval())
+    if interval != tick_ms and physics[0]:
+        physics[0] = physics[0] * interval / tick_ms
+    pet.physics_system.set_state(tuple(physics))
+    pet.speed_controller.set_state(state["speed"])
+    pet.idle_tracker.set_state(state["idle"])
+
+    pet.is_currently_sleeping = sleeping
+    pet.is_in_lift_state = lifted
+    pet.total_click_count = clicks
+    pet.dialog_manager.interaction_count = interactions
+
+    behavior = pet.behavior_controller
+    angle, speed, mouse_vx, has_anchor, ax, ay = state["swing"]
+    behavior._swing.set_state((angle, speed, mouse_vx))
+    behavior._lift_anchor = (ax, ay) if has_anchor else None
+
+    if state["bubble"] is not None:
+        pet.dialog_manager.restore_bubble(state["bubble"])
+
+
+def restore(pets, data):
+    """用快照恢复宠物的运行状态（按顺序对应，多余的宠物或快照条目被忽略）
+
+    Returns:
+        float: 恢复耗时（毫秒）
+    """
+    start = time.perf_counter()
+    for pet, state in zip(pets, loads(data)):
+        _restore_pet(pet, state)
+    return (time.perf_counter() - start) * 1000.0
+
+
+def save(pets, path=None):
+    """把快照原子地写入文件
+
+    Raises:
+        OSError: 写入失败
+        ValueError: 运行状态无法打包
+    """
+    path = path or default_snapshot_path()
+    data = dumps(pets)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return len(data)
+
+
+def load(pets, path=None):
+    """从文件读取快照并恢复，返回恢复耗时（毫秒）"""
+    with open(path or default_snapshot_path(), "rb") as f:
+        data = f.read()
+    return restore(pets, data)
@@ -39,6 +39,18 @@ class SpeedController:
     def thrown_recently(self, value):
         self._thrown_recently = value
     
+    def friction_state(self):
+        """摩擦调速的当前阶段：(阶段名, 剩余秒数)，阶段为 off/cooldown/waiting/active/idle"""
+        if not self._friction_enabled:
+            return ("off", 0.0)
+        if self._friction_cooldown > 0:
+            return ("cooldown", self._friction_cooldown)
+        if self._friction_active:
+            return ("active", 0.0)
+        if self._friction_waiting:
+            return ("waiting", self._friction_time_to_activation)
+        return ("idle", 0.0)
+    
     def update(self, dt, interval_ms):
         """更新速度控制状态"""
         # 计算当前速度
@@ -143,6 +155,18 @@ class SpeedController:
         """设置摩擦冷却时间"""
         self._friction_cooldown = self._friction_cooldown_after_throw
     
+    def get_state(self):
+        """返回可序列化的速度控制状态（随机速度和摩擦状态机）"""
+        return (self._random_speed_enabled, self._speed_current_px_per_sec, self._speed_target_px_per_sec,
+                self._time_to_next_speed_change, self._friction_enabled, self._friction_time_to_activation,
+                self._friction_waiting, self._friction_active, self._friction_cooldown, self._thrown_recently)
+    
+    def set_state(self, state):
+        """恢复 get_state() 返回的速度控制状态"""
+        (self._random_speed_enabled, self._speed_current_px_per_sec, self._speed_target_px_per_sec,
+         self._time_to_next_speed_change, self._friction_enabled, self._friction_time_to_activation,
+         self._friction_waiting, self._friction_active, self._friction_cooldown, self._thrown_recently) = state
+    
     def check_friction_cooldown(self):
         """检查摩擦冷却是否结束"""
         return self._friction_cooldown <= 0
\ No newline at end of file
@@ -0,0 +1,164 @@
+import hashlib
+import mmap
+import os
+import struct
+
+from PyQt5 import sip
+from PyQt5.QtGui import QImage, QPixmap
+
+# 精灵图磁盘缓存：保存已经缩放（和镜像）好的预乘 ARGB 像素，
+# 启动时用 mmap 映射文件直接包装为 QImage，不需要解码 PNG 也不需要重新采样。
+
+CACHE_VERSION = 1
+MAGIC = b"DPSP"
+_HEADER = struct.Struct("<4sHHIIII")  # 魔数, 版本, 保留, 宽, 高, 每行字节数, 像素数据偏移
+_DATA_OFFSET = 64  # 像素数据按64字节对齐
+_SUFFIX = ".argb"
+
+
+def default_cache_dir():
+    """用户目录下的精灵图缓存目录"""
+    return os.path.join(os.path.expanduser("~"), ".desktopet", "cache", "sprites")
+
+
+class SpriteDiskCache:
+    """已缩放精灵图的磁盘缓存，按最近使用时间淘汰，总大小不超过 max_bytes
+
+    缓存键包含源图片的版本标识（路径、修改时间和大小，或压缩包内的校验和），
+    源图片变化后旧条目不再命中，之后随 LRU 淘汰被删除。
+    """
+
+    def __init__(self, directory=None, max_bytes=64 * 1024 * 1024):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def _entry_path(self, signature, width, height, direction, smooth):
+        """缓存文件路径；源图片不存在（signature 为 None）时返回 None"""
+        if signature is None:
+            return None
+        key = f"{CACHE_VERSION}|{signature!r}|{width}x{height}|{direction}|{int(bool(smooth))}"
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest()[:24] + _SUFFIX)
+
+    def load(self, signature, width, height, direction=1, smooth=True):
+        """读取缓存的精灵图，未命中时返回 None
+
+        Args:
+            signature: 源图片的版本标识（见 resources 中的 signature()）
+            width, height: 缩放目标尺寸
+            direction: 1 原始方向，-1 水平镜像
+            smooth: 是否使用平滑变换缩放
+        """
+        path = self._entry_path(signature, width, height, direction, smooth)
+        if path is None:
+            self.misses += 1
+            return None
+        try:
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            mm = None
+        pixmap = None
+        if mm is not None:
+            try:
+                pixmap = self._wrap(mm)
+            finally:
+                try:
+                    mm.close()
+                except BufferError:
+                    pass  # 仍有引用时由垃圾回收关闭
+        if pixmap is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # 更新修改时间作为 LRU 的使用时间
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return pixmap
+
+    @staticmethod
+    def _wrap(mm):
+        """把映射的像素直接包装为 QImage 并转为 QPixmap（QPixmap 持有自己的副本）"""
+        if len(mm) < _DATA_OFFSET:
+            return None
+        magic, version, _, width, height, bytes_per_line, offset = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != CACHE_VERSION or len(mm) < offset + bytes_per_line * height:
+            return None
+        view = memoryview(mm)[offset:offset + bytes_per_line * height]
+        try:
+            image = QImage(sip.voidptr(view), width, height, bytes_per_line, QImage.Format_ARGB32_Premultiplied)
+            pixmap = QPixmap.fromImage(image)
+            # 映射关闭前释放引用该内存的 QImage
+            del image
+        finally:
+            try:
+                view.release()
+            except BufferError:
+                pass
+        return pixmap
+
+    def store(self, signature, width, height, direction, smooth, pixmap):
+        """保存缩放好的精灵图（写临时文件再原子替换），超出大小上限时淘汰最久未使用的条目"""
+        path = self._entry_path(signature, width, height, direction, smooth)
+        if path is None or pixmap.isNull():
+            return False
+        image = pixmap.toImage().convertToFormat(QImage.Format_ARGB32_Premultiplied)
+        size = image.bytesPerLine() * image.height()
+        header = _HEADER.pack(MAGIC, CACHE_VERSION, 0, image.width(), image.height(), image.bytesPerLine(),
+                              _DATA_OFFSET)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(header.ljust(_DATA_OFFSET, b"\0"))
+                f.write(image.constBits().asstring(size))
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"写入精灵图缓存失败: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return False
+        self.writes += 1
+        self._evict()
+        return True
+
+    def _evict(self):
+        """总大小超过上限时按修改时间从旧到新删除"""
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(_SUFFIX):
+                        st = entry.stat()
+                        entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                        total += st.st_size
+        except OSError:
+            return
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.evictions += 1
+            except OSError:
+                pass
+
+    def disk_bytes(self):
+        """缓存目录中缓存文件的总大小（字节）"""
+        try:
+            with os.scandir(self.directory) as it:
+                return sum(e.stat().st_size for e in it if e.name.endswith(_SUFFIX))
+        except OSError:
+            return 0
@@ -0,0 +1,63 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+# 启动过程跟踪：记录每个导入和构造阶段的耗时以及首次绘制等时间点。
+# 本模块应最先被导入，时间起点为导入本模块的时刻。
+
+
+class StartupTracer:
+    """记录启动各阶段耗时，可导出为 JSON 报告"""
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self.origin = clock()
+        self.phases = []  # [(名称, 开始时间, 耗时, 嵌套深度), ...]，时间单位为秒，相对 origin
+        self.marks = {}  # 时间点名称 -> 相对 origin 的时间（秒），只记录第一次
+        self._depth = 0
+
+    @contextmanager
+    def phase(self, name):
+        """记录一个阶段的耗时，阶段可以嵌套"""
+        start = self._clock()
+        depth = self._depth
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.phases.append((name, start - self.origin, self._clock() - start, depth))
+
+    def mark(self, name):
+        """记录一个时间点（例如 first_paint），重复调用时保留第一次"""
+        if name not in self.marks:
+            self.marks[name] = self._clock() - self.origin
+
+    def elapsed_ms(self, name):
+        """某个时间点距离起点的毫秒数，未记录时返回 None"""
+        value = self.marks.get(name)
+        return None if value is None else value * 1000.0
+
+    def report(self):
+        """生成报告字典（时间单位为毫秒）"""
+        phases = sorted(self.phases, key=lambda p: p[1])
+        return {
+            "pid": os.getpid(),
+            "phases": [{"name": name, "start_ms": round(start * 1000.0, 3),
+                        "duration_ms": round(duration * 1000.0, 3), "depth": depth}
+                       for name, start, duration, depth in phases],
+            "marks": {name: round(t * 1000.0, 3) for name, t in sorted(self.marks.items(), key=lambda m: m[1])},
+        }
+
+    def write(self, path):
+        """把报告写入 JSON 文件"""
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.report(), f, indent=2, ensure_ascii=False)
+        except OSError as e:
+            print(f"写入启动报告失败: {e}")
+
+
+# 进程内共享的跟踪器
+tracer = StartupTracer()
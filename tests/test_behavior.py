@@ -0,0 +1,92 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("PyQt5")
+from PyQt5.QtCore import QPoint, Qt  # noqa: E402
+
+from behavior import THROW_WINDOW, BehaviorController  # noqa: E402
+from physics import SwingPhysics  # noqa: E402
+
+FRAME = 1.0 / 60
+
+
+class CountingSwing(SwingPhysics):
+    def __init__(self):
+        super().__init__(max_angle=25)
+        self.steps = 0
+
+    def step(self, dt):
+        self.steps += 1
+        super().step(dt)
+
+
+def make_controller(lifted=False):
+    pet = MagicMock()
+    pet.x.return_value = 0
+    pet.y.return_value = 0
+    pet.width.return_value = 100
+    pet.height.return_value = 90
+    pet._walk_timer.interval.return_value = 16
+    pet.is_in_lift_state = lifted
+    controller = BehaviorController(pet, defer_menu=True)
+    controller._swing = CountingSwing()
+    return controller, pet
+
+
+def move_event(x, y, buttons=Qt.LeftButton):
+    return SimpleNamespace(globalX=lambda: x, globalY=lambda: y, buttons=lambda: buttons)
+
+
+def start_frame(controller):
+    """模拟本帧刚应用过一次输入：之后的移动事件都留给主循环合并"""
+    controller._last_apply_time = time.monotonic()
+    controller._min_move_interval = 10.0
+
+
+def test_drag_moves_in_one_frame_move_the_window_once():
+    controller, pet = make_controller()
+    controller._drag_offset = QPoint(10, 5)
+    controller._is_dragging = True
+    start_frame(controller)
+    for i in range(5):
+        controller.on_mouse_move(move_event(100 + i * 3, 200 + i))
+    pet.move.assert_not_called()
+    assert controller.has_pending_input
+
+    controller.flush_pending_input()
+    pet.move.assert_called_once_with(100 + 4 * 3 - 10, 204 - 5)
+    assert not controller.has_pending_input
+    # 轨迹保留所有样本，只有窗口移动被合并
+    assert len(controller._drag_history) == 5
+
+
+def test_lift_moves_in_one_frame_step_the_swing_once():
+    controller, pet = make_controller(lifted=True)
+    start_frame(controller)
+    for i in range(5):
+        controller.on_mouse_move(move_event(300 + i * 4, 150, Qt.NoButton))
+    pet.move.assert_not_called()
+
+    # 与主循环一致：先应用输入，再推进摆动并放置一次
+    controller.flush_pending_input(place_lifted=False)
+    controller.update_lift(FRAME)
+    assert controller._swing.steps == 1
+    assert controller._lift_anchor == (316, 150)
+    assert pet.move.call_count == 1
+
+
+def test_drag_history_covers_the_throw_window_at_high_event_rates():
+    controller, _ = make_controller()
+    controller._drag_offset = QPoint(0, 0)
+    controller._is_dragging = True
+    controller._min_move_interval = 10.0
+    start = time.monotonic()
+    # 1000Hz 的鼠标：样本按时间裁剪，不受条数限制
+    controller._drag_history.extend((i, 0, start - THROW_WINDOW + i / 1000.0) for i in range(190))
+    controller.on_mouse_move(move_event(190, 0))
+    assert len(controller._drag_history) > 64
+    history = controller._drag_history
+    assert history[-1][2] - history[0][2] <= THROW_WINDOW
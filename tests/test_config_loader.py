@@ -0,0 +1,93 @@
+import json
+import os
+
+import pytest
+
+import config_loader
+from config_loader import ASSETS_FILE, DIALOGS_FILE, _validate_dialogs, load_config
+
+
+@pytest.fixture(autouse=True)
+def home(tmp_path, monkeypatch):
+    """编译缓存写到临时主目录"""
+    home = tmp_path / "home"
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setenv("USERPROFILE", str(home))
+    return home
+
+
+def write(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def test_validate_dialogs_keeps_valid_content():
+    config = _validate_dialogs({
+        "dialogues": {"greet": ["hi", {"text": "hey", "weight": 2, "cooldown": 1.5, "extra": 1}, 3, {"weight": 1}],
+                      "bad": "not a list"},
+        "dialogues_move": [],
+    })
+    assert config == {
+        "dialogues": {"greet": ["hi", {"text": "hey", "weight": 2, "cooldown": 1.5}]},
+        "dialogues_move": {},
+        "dialogues_sleep": {},
+    }
+
+
+@pytest.mark.parametrize("entry", [
+    {"text": "x", "weight": "heavy"},
+    {"text": "x", "weight": -1},
+    {"text": "x", "weight": 1.5},
+    {"text": "x", "cooldown": "abc"},
+    {"text": "x", "cooldown": -2},
+])
+def test_validate_dialogs_rejects_bad_weight_or_cooldown(entry):
+    with pytest.raises(ValueError):
+        _validate_dialogs({"dialogues": {"a": [entry]}})
+
+
+def test_strict_load_raises_and_lenient_load_falls_back(tmp_path, capsys):
+    path = write(tmp_path / DIALOGS_FILE, {"dialogues": {"a": [{"text": "x", "cooldown": "abc"}]}})
+    with pytest.raises(ValueError):
+        load_config(DIALOGS_FILE, path, strict=True)
+    config = load_config(DIALOGS_FILE, path)
+    assert dict(config["dialogues"]) == {}
+    assert "加载配置失败" in capsys.readouterr().out
+
+
+def test_result_is_frozen_and_shared(tmp_path):
+    path = write(tmp_path / DIALOGS_FILE, {"dialogues": {"a": ["x"]}})
+    first = load_config(DIALOGS_FILE, path)
+    assert load_config(DIALOGS_FILE, path) is first
+    assert first["dialogues"]["a"] == ("x",)
+    with pytest.raises(TypeError):
+        first["dialogues"]["b"] = ()
+
+
+def test_changed_file_is_reloaded(tmp_path):
+    path = tmp_path / DIALOGS_FILE
+    write(path, {"dialogues": {"a": ["x"]}})
+    load_config(DIALOGS_FILE, str(path))
+    write(path, {"dialogues": {"a": ["x", "y"]}})
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert load_config(DIALOGS_FILE, str(path))["dialogues"]["a"] == ("x", "y")
+
+
+def test_compiled_cache_is_used_by_a_new_process(tmp_path, monkeypatch):
+    path = write(tmp_path / DIALOGS_FILE, {"dialogues": {"a": ["x"]}})
+    load_config(DIALOGS_FILE, path)
+    assert os.listdir(config_loader.cache_dir())
+    # 模拟新进程：清空进程内缓存，并让 JSON 解析失败以确认读取的是编译缓存
+    monkeypatch.setattr(config_loader, "_loaded", {})
+    monkeypatch.setattr(config_loader.json, "load", lambda f: pytest.fail("不应重新解析"))
+    assert load_config(DIALOGS_FILE, path)["dialogues"]["a"] == ("x",)
+
+
+def test_missing_file_is_created_with_defaults(tmp_path):
+    path = tmp_path / ASSETS_FILE
+    config = load_config(ASSETS_FILE, str(path))
+    assert path.exists()
+    assert config["default_asset"] == config_loader.DEFAULT_ASSET_CONFIG["default_asset"]
+    with pytest.raises(FileNotFoundError):
+        load_config(ASSETS_FILE, str(tmp_path / "missing" / ASSETS_FILE), strict=True)
@@ -0,0 +1,121 @@
+import random
+from collections import Counter
+
+import pytest
+
+from dialog_index import DialogIndex, ShuffleBag, parse_cooldown, parse_weight
+
+
+def test_bag_round_has_no_repeats_and_no_seam_repeat():
+    bag = ShuffleBag([1] * 5, rng=random.Random(1))
+    picks = [bag.next() for _ in range(50)]
+    for start in range(0, 50, 5):
+        assert sorted(picks[start:start + 5]) == [0, 1, 2, 3, 4]
+    assert all(a != b for a, b in zip(picks, picks[1:]))
+
+
+def test_bag_weights_are_copies():
+    bag = ShuffleBag([3, 1], rng=random.Random(2))
+    assert len(bag) == 4
+    counts = Counter(bag.next() for _ in range(40))
+    assert counts == {0: 30, 1: 10}
+
+
+@pytest.mark.parametrize("weights", [[3, 2, 2, 1], [2, 1, 1], [4, 4, 1], [3, 3]])
+def test_bag_weighted_copies_are_never_adjacent(weights):
+    bag = ShuffleBag(weights, rng=random.Random(7))
+    total = sum(weights)
+    picks = [bag.next() for _ in range(total * 100)]
+    assert all(a != b for a, b in zip(picks, picks[1:]))
+    # 每轮仍然按权重取出
+    for start in range(0, len(picks), total):
+        assert Counter(picks[start:start + total]) == dict(enumerate(weights))
+
+
+def test_bag_heavy_entry_repeats_only_when_unavoidable():
+    # 条目 0 占 3/5，无限序列中至少有 1/5 的取出与上一个相同，不能更多
+    bag = ShuffleBag([3, 1, 1], rng=random.Random(8))
+    picks = [bag.next() for _ in range(1000)]
+    repeats = sum(a == b for a, b in zip(picks, picks[1:]))
+    assert repeats <= 1000 // 5
+    assert all(a == b == 0 for a, b in zip(picks, picks[1:]) if a == b)
+
+
+def test_bag_order_is_random():
+    orders = set()
+    for seed in range(20):
+        bag = ShuffleBag([2, 1, 1, 1], rng=random.Random(seed))
+        orders.add(tuple(bag.next() for _ in range(5)))
+    assert len(orders) > 10
+
+
+def test_bag_weight_zero_is_never_picked():
+    bag = ShuffleBag([0, 2], rng=random.Random(3))
+    assert {bag.next() for _ in range(20)} == {1}
+    assert ShuffleBag([0, 0]).next() == -1
+
+
+def test_bag_cooldown():
+    bag = ShuffleBag([1], cooldowns=[10.0], rng=random.Random(4))
+    assert bag.next(now=0.0) == 0
+    assert bag.next(now=5.0) == -1
+    assert bag.next(now=10.0) == 0
+
+
+@pytest.mark.parametrize("value, expected", [
+    (0, 0), (3, 3), (2.0, 2), (-1, None), (1.5, None), ("2", None), ("heavy", None), (True, None), (None, None),
+])
+def test_parse_weight(value, expected):
+    assert parse_weight(value) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    (0, 0.0), (2, 2.0), (0.5, 0.5), (-0.1, None), ("abc", None), (float("nan"), None), (False, None),
+])
+def test_parse_cooldown(value, expected):
+    assert parse_cooldown(value) == expected
+
+
+def test_invalid_entries_are_skipped(capsys):
+    index = DialogIndex({"a": [
+        {"text": "x", "cooldown": "abc"},
+        {"text": "y", "weight": "heavy"},
+        {"text": "z", "weight": -2},
+        "ok",
+    ]})
+    assert index.texts("a") == ("ok",)
+    assert capsys.readouterr().out.count("忽略无效的对话条目") == 3
+
+
+def test_weight_zero_entry_is_never_picked():
+    index = DialogIndex({"a": [{"text": "never", "weight": 0}, "always"]}, rng=random.Random(5))
+    assert {index.pick("a") for _ in range(20)} == {"always"}
+    only_zero = DialogIndex({"a": [{"text": "never", "weight": 0}]})
+    assert only_zero.pick("a") is None
+    assert only_zero.pick_random() == (None, None)
+
+
+def test_empty_and_missing_categories():
+    index = DialogIndex({"empty": [], "blank": [""], "none": None, "a": ["hi"]})
+    assert index.categories() == ("a",)
+    assert "empty" not in index
+    assert index.pick("missing") is None
+
+
+def test_milestones_are_not_random_categories():
+    index = DialogIndex({"10clicks": ["ten"], "100clicks": ["hundred"], "greet": ["hi"]}, rng=random.Random(6))
+    assert index.milestone_at(10) == "10clicks"
+    assert index.milestone_at(100) == "100clicks"
+    assert index.milestone_at(11) is None
+    assert {index.pick_random() for _ in range(10)} == {("greet", "hi")}
+
+
+def test_update_category():
+    index = DialogIndex({"a": ["old"]})
+    index.update_category("a", ["new"])
+    index.update_category("50clicks", ["fifty"])
+    assert index.pick("a") == "new"
+    assert index.milestone_at(50) == "50clicks"
+    index.update_category("a", None)
+    assert "a" not in index
+    assert index.pick_random() == (None, None)
@@ -0,0 +1,34 @@
+from events import CLICKED, EVENT_NAMES, LANDED, EventBus
+
+
+def test_publish_in_subscription_order_and_counts():
+    bus = EventBus()
+    calls = []
+    bus.subscribe(LANDED, lambda v: calls.append(("a", v)))
+    bus.subscribe(LANDED, lambda v: calls.append(("b", v)))
+    bus.publish(LANDED, 300.0)
+    bus.publish(CLICKED, 1)
+    assert calls == [("a", 300.0), ("b", 300.0)]
+    assert bus.published[LANDED] == 1
+    assert bus.published[CLICKED] == 1
+    assert len(bus.published) == len(EVENT_NAMES)
+
+
+def test_unsubscribe():
+    bus = EventBus()
+    calls = []
+    handler = bus.subscribe(LANDED, calls.append)
+    bus.unsubscribe(LANDED, handler)
+    bus.unsubscribe(LANDED, handler)  # 未订阅时无效果
+    bus.publish(LANDED, 1)
+    assert calls == []
+
+
+def test_handler_error_does_not_stop_others(capsys):
+    bus = EventBus()
+    calls = []
+    bus.subscribe(CLICKED, lambda _: 1 / 0)
+    bus.subscribe(CLICKED, calls.append)
+    bus.publish(CLICKED, 3)
+    assert calls == [3]
+    assert "事件处理失败 clicked" in capsys.readouterr().out
@@ -0,0 +1,52 @@
+import pytest
+
+from prediction import DragPredictor
+
+
+def feed_line(predictor, speed=1000.0, hz=500.0, count=20):
+    for i in range(count):
+        t = i / hz
+        predictor.add_sample(100.0 + speed * t, 50.0, t)
+    return t
+
+
+def test_no_samples():
+    assert DragPredictor().predict(1.0) is None
+
+
+def test_too_few_samples_use_real_position():
+    predictor = DragPredictor()
+    predictor.add_sample(10, 20, 0.0)
+    predictor.add_sample(20, 20, 0.01)
+    assert predictor.confidence == 0.0
+    assert predictor.predict(0.02) == (20.0, 20.0)
+
+
+def test_constant_motion_is_extrapolated():
+    predictor = DragPredictor()
+    t = feed_line(predictor)
+    assert predictor.confidence == pytest.approx(1.0)
+    x, y = predictor.predict(t + 0.016)
+    assert x == pytest.approx(100.0 + 1000.0 * (t + 0.016), abs=1.0)
+    assert y == pytest.approx(50.0)
+
+
+def test_lead_is_limited():
+    predictor = DragPredictor(max_lead=0.025, max_lead_px=10.0)
+    t = feed_line(predictor, speed=5000.0)
+    x, _ = predictor.predict(t + 0.02)
+    assert x - (100.0 + 5000.0 * t) == pytest.approx(10.0)
+
+
+def test_stale_samples_fall_back_to_last_position():
+    predictor = DragPredictor()
+    t = feed_line(predictor)
+    assert predictor.predict(t + 1.0) == (pytest.approx(100.0 + 1000.0 * t), 50.0)
+
+
+def test_reset():
+    predictor = DragPredictor()
+    feed_line(predictor)
+    predictor.reset()
+    assert predictor.predict(1.0) is None
+    assert predictor.confidence == 0.0
@@ -0,0 +1,109 @@
+import pytest
+
+from scheduler import Scheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        return self.t
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def scheduler(clock):
+    return Scheduler(clock=clock)
+
+
+def test_fires_in_deadline_order(scheduler, clock):
+    fired = []
+    scheduler.call_later(2.0, lambda: fired.append("b"))
+    scheduler.call_later(1.0, lambda: fired.append("a"))
+    scheduler.call_later(3.0, lambda: fired.append("c"))
+    clock.t += 2.5
+    assert scheduler.advance() == 2
+    assert fired == ["a", "b"]
+    assert len(scheduler) == 1
+    clock.t += 1.0
+    scheduler.advance()
+    assert fired == ["a", "b", "c"]
+    assert len(scheduler) == 0
+
+
+def test_same_deadline_keeps_insertion_order(scheduler, clock):
+    fired = []
+    for i in range(5):
+        scheduler.call_later(1.0, lambda i=i: fired.append(i))
+    clock.t += 1.0
+    scheduler.advance()
+    assert fired == [0, 1, 2, 3, 4]
+
+
+def test_cancel(scheduler, clock):
+    fired = []
+    handle = scheduler.call_later(1.0, lambda: fired.append(1))
+    scheduler.cancel(handle)
+    scheduler.cancel(handle)  # 重复取消无效果
+    assert len(scheduler) == 0
+    assert not handle.active
+    clock.t += 2.0
+    assert scheduler.advance() == 0
+    assert fired == []
+
+
+def test_next_deadline_skips_cancelled(scheduler):
+    first = scheduler.call_later(1.0, lambda: None)
+    scheduler.call_later(5.0, lambda: None)
+    first.cancel()
+    assert scheduler.next_deadline() == pytest.approx(105.0)
+    assert Scheduler(clock=lambda: 0.0).next_deadline() is None
+
+
+def test_periodic_does_not_catch_up(scheduler, clock):
+    count = []
+    handle = scheduler.call_every(1.0, lambda: count.append(1))
+    clock.t += 10.5
+    assert scheduler.advance() == 1
+    assert handle.deadline == pytest.approx(clock.t + 1.0)
+    clock.t += 1.0
+    scheduler.advance()
+    assert len(count) == 2
+    assert len(scheduler) == 1
+
+
+def test_call_every_rejects_non_positive_interval(scheduler):
+    with pytest.raises(ValueError):
+        scheduler.call_every(0, lambda: None)
+
+
+def test_callback_error_does_not_stop_others(scheduler, clock, capsys):
+    fired = []
+    scheduler.call_later(1.0, lambda: 1 / 0)
+    scheduler.call_later(1.0, lambda: fired.append(1))
+    clock.t += 1.0
+    assert scheduler.advance() == 2
+    assert fired == [1]
+    assert "定时任务执行失败" in capsys.readouterr().out
+
+
+def test_deadline_changed_only_for_earlier_deadline(scheduler):
+    calls = []
+    scheduler.on_deadline_changed = lambda: calls.append(scheduler.next_deadline())
+    scheduler.call_later(5.0, lambda: None)
+    scheduler.call_later(10.0, lambda: None)
+    scheduler.call_later(1.0, lambda: None)
+    assert calls == [pytest.approx(105.0), pytest.approx(101.0)]
+
+
+def test_remaining(scheduler, clock):
+    handle = scheduler.call_later(3.0, lambda: None)
+    clock.t += 1.0
+    assert handle.remaining() == pytest.approx(2.0)
+    clock.t += 5.0
+    assert handle.remaining() == 0.0
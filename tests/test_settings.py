@@ -0,0 +1,40 @@
+import json
+
+from settings import SettingsStore
+
+
+def test_debounced_writes_are_merged(tmp_path):
+    path = tmp_path / "settings.json"
+    store = SettingsStore(str(path), debounce=0.2)
+    for i in range(20):
+        store.update({"x": i})
+    store.update({"x": 19})  # 没有变化时不安排写入
+    store.close()
+    assert store.writes == 1
+    assert json.loads(path.read_text(encoding="utf-8")) == {"x": 19}
+
+
+def test_flush_and_update_after_close(tmp_path):
+    path = tmp_path / "sub" / "settings.json"
+    store = SettingsStore(str(path), debounce=60.0)
+    store.update({"a": 1})
+    store.flush()
+    assert json.loads(path.read_text(encoding="utf-8")) == {"a": 1}
+    store.close()
+    store.update({"a": 2})  # 关闭后同步写入
+    assert json.loads(path.read_text(encoding="utf-8")) == {"a": 2}
+    assert [p.name for p in path.parent.iterdir()] == ["settings.json"]
+
+
+def test_load_handles_missing_and_corrupt_files(tmp_path, capsys):
+    path = tmp_path / "settings.json"
+    store = SettingsStore(str(path))
+    assert store.load() == {}
+    path.write_text("{broken", encoding="utf-8")
+    assert store.load() == {}
+    assert "加载设置失败" in capsys.readouterr().out
+    path.write_text('{"scale": 1.5}', encoding="utf-8")
+    assert store.load() == {"scale": 1.5}
+    assert store.get("scale") == 1.5
+    store.close()
+    assert store.writes == 0
@@ -0,0 +1,85 @@
+import struct
+from types import SimpleNamespace
+
+import pytest
+
+import snapshot
+
+
+def make_pet(x=120, y=-40, clicks=7, bubble=("你好", 2, 3000, 50.0, 1, False, 1234.5), anchor=(15, 30)):
+    """只提供快照需要的属性的替身宠物"""
+    def state(value):
+        return lambda: value
+
+    return SimpleNamespace(
+        x=state(x), y=state(y), _scale_factor=1.5,
+        renderer=SimpleNamespace(_dir=-1, current_state="shache"),
+        _walk_timer=SimpleNamespace(interval=state(16)),
+        is_currently_sleeping=False, is_in_lift_state=True, total_click_count=clicks,
+        dialog_manager=SimpleNamespace(interaction_count=3, bubble_state=state(bubble)),
+        physics_system=SimpleNamespace(get_state=state((4.0, -250.0, 2, False, 0.1))),
+        speed_controller=SimpleNamespace(get_state=state((True, 3.0, 5.0, 1.2, True, 0.5, False, True, 2.0, False))),
+        idle_tracker=SimpleNamespace(get_state=state((1.0, 1.0, False, 30.0, False))),
+        behavior_controller=SimpleNamespace(_lift_anchor=anchor,
+                                            _swing=SimpleNamespace(get_state=state((12.5, -3.0, 80.0)))),
+    )
+
+
+def test_round_trip():
+    data = snapshot.dumps([make_pet(), make_pet(x=5, bubble=None, anchor=None)])
+    first, second = snapshot.loads(data)
+    assert first["pet"] == (120, -40, 1.5, -1, 16, False, True, 7, 3)
+    assert first["image"] == "shache"
+    assert first["physics"] == (4.0, -250.0, 2, False, 0.1)
+    assert first["speed"] == (True, 3.0, 5.0, 1.2, True, 0.5, False, True, 2.0, False)
+    assert first["idle"] == (1.0, 1.0, False, 30.0, False)
+    assert first["swing"] == (12.5, -3.0, 80.0, True, 15, 30)
+    assert first["bubble"] == ("你好", 2, 3000, 50.0, 1, False, 1234.5)
+    assert second["pet"][0] == 5
+    assert second["swing"][3:] == (False, 0, 0)
+    assert second["bubble"] is None
+
+
+def test_rejects_other_versions():
+    data = bytearray(snapshot.dumps([make_pet()]))
+    struct.pack_into("<H", data, 4, snapshot.VERSION - 1)
+    with pytest.raises(ValueError, match="不兼容"):
+        snapshot.loads(bytes(data))
+    # 旧版本的头部更短，也要按版本拒绝而不是报告数据不完整
+    with pytest.raises(ValueError, match="不兼容"):
+        snapshot.loads(struct.pack("<4sHH", snapshot.MAGIC, 1, 0))
+
+
+def test_rejects_layout_mismatch_and_bad_magic():
+    data = bytearray(snapshot.dumps([make_pet()]))
+    struct.pack_into("<I", data, 6, snapshot.LAYOUT ^ 1)
+    with pytest.raises(ValueError, match="布局"):
+        snapshot.loads(bytes(data))
+    with pytest.raises(ValueError, match="不是快照文件"):
+        snapshot.loads(b"NOPE" + bytes(20))
+
+
+@pytest.mark.parametrize("cut", [2, 8, 20, -1])
+def test_truncated_data(cut):
+    data = snapshot.dumps([make_pet()])
+    with pytest.raises(ValueError):
+        snapshot.loads(data[:cut])
+
+
+def test_unpackable_value_raises_value_error():
+    with pytest.raises(ValueError, match="无法打包快照"):
+        snapshot.dumps([make_pet(clicks=-1)])
+    with pytest.raises(ValueError):
+        snapshot.dumps([make_pet(x=2 ** 40)])
+
+
+def test_save_is_atomic(tmp_path):
+    path = tmp_path / "sub" / "snapshot.bin"
+    size = snapshot.save([make_pet()], str(path))
+    assert path.stat().st_size == size
+    assert len(snapshot.loads(path.read_bytes())) == 1
+    # 打包失败时不留下临时文件，也不覆盖原来的快照
+    with pytest.raises(ValueError):
+        snapshot.save([make_pet(clicks=-1)], str(path))
+    assert sorted(p.name for p in path.parent.iterdir()) == ["snapshot.bin"]
+    assert path.stat().st_size == size
@@ -0,0 +1,91 @@
+from collections import namedtuple
+import math
+
+from PyQt5.QtCore import Qt, QPointF, QSize
+from PyQt5.QtGui import QTextLayout, QTextOption
+
+# 一行排版结果：起始字符、字符数、自然宽度、行顶部y、基线偏移
+LayoutLine = namedtuple("LayoutLine", ["start", "length", "width", "y", "ascent"])
+# 一段文本的排版结果：整体尺寸（QSize）和各行
+TextLayoutInfo = namedtuple("TextLayoutInfo", ["size", "lines"])
+
+
+class TextLayoutCache:
+    """文本排版缓存：按字体和屏幕DPI缓存每段文本的换行结果与尺寸
+
+    对话文本来自固定的 dialogs.json，预先（或首次使用时）排版一次，
+    之后气泡尺寸和打字效果只需查表。字体或DPI变化时整个缓存失效。
+    """
+
+    def __init__(self, font, wrap_width):
+        self._font = font
+        self._wrap_width = wrap_width  # 换行宽度（像素）
+        self._env_key = None  # (字体, 逻辑DPI, 设备像素比)
+        self._entries = {}  # 文本 -> TextLayoutInfo
+        self._option = QTextOption(Qt.AlignHCenter)
+        self._option.setWrapMode(QTextOption.WrapAtWordBoundaryOrAnywhere)
+
+    @property
+    def font(self):
+        return self._font
+
+    def __len__(self):
+        return len(self._entries)
+
+    def set_font(self, font):
+        """更换字体，字体变化时清空缓存"""
+        if font != self._font:
+            self._font = font
+            self._entries.clear()
+
+    def update_environment(self, screen):
+        """根据屏幕DPI检查缓存是否仍然有效
+
+        Returns:
+            bool: 缓存是否因此被清空
+        """
+        if screen is None:
+            return False
+        key = (self._font.key(), screen.logicalDotsPerInch(), screen.devicePixelRatio())
+        if key == self._env_key:
+            return False
+        invalidated = self._env_key is not None
+        self._env_key = key
+        if invalidated:
+            self._entries.clear()
+        return invalidated
+
+    def layout(self, text):
+        """返回文本的排版结果（命中缓存时只是一次查表）"""
+        info = self._entries.get(text)
+        if info is None:
+            info = self._measure(text)
+            self._entries[text] = info
+        return info
+
+    def prewarm(self, texts):
+        """预先排版一批文本"""
+        for text in texts:
+            if text not in self._entries:
+                self._entries[text] = self._measure(text)
+
+    def _measure(self, text):
+        """用 QTextLayout 排版文本"""
+        layout = QTextLayout(text, self._font)
+        layout.setTextOption(self._option)
+        layout.beginLayout()
+        lines = []
+        y = 0.0
+        max_width = 0.0
+        while True:
+            line = layout.createLine()
+            if not line.isValid():
+                break
+            line.setLineWidth(self._wrap_width)
+            line.setPosition(QPointF(0, y))
+            width = line.naturalTextWidth()
+            lines.append(LayoutLine(line.textStart(), line.textLength(), width, y, line.ascent()))
+            y += line.height()
+            max_width = max(max_width, width)
+        layout.endLayout()
+        return TextLayoutInfo(QSize(int(math.ceil(max_width)), int(math.ceil(y))), tuple(lines))
@@ -1,35 +1,71 @@
+import os
+import tempfile
 import time
+from contextlib import contextmanager
 
 class IdleTimeTracker:
-    def __init__(self):
-        """初始化空闲时间跟踪器"""
+    def __init__(self, scheduler=None, clock=time.monotonic):
+        """初始化空闲时间跟踪器
+        
+        Args:
+            scheduler: 可选的 Scheduler；提供时空闲阈值作为定时任务注册，
+                到期时才标记为空闲，而不是每次更新都比较时间
+            clock: 单调时钟（没有 scheduler 时使用）
+        """
+        self._scheduler = scheduler
+        self._clock = scheduler.now if scheduler is not None else clock
         self.idle_time = 0  # 空闲时间（秒）
-        self.last_update_time = time.time()
+        self.last_update_time = self._clock()
         self.is_idle = False
         self.idle_threshold = 30  # 默认空闲阈值（秒）
+        self._idle_since = None  # 开始空闲的时间，None 表示当前不空闲
+        self._threshold_handle = None  # 阈值到期的定时任务
+        self._threshold_reached = False
+    
+    def _arm_threshold(self, now):
+        """开始计时并注册阈值到期事件"""
+        self._idle_since = now
+        self._threshold_reached = False
+        if self._scheduler is not None:
+            self._scheduler.cancel(self._threshold_handle)
+            self._threshold_handle = self._scheduler.call_later(self.idle_threshold, self._on_threshold)
+    
+    def _disarm_threshold(self):
+        """停止计时并取消阈值事件"""
+        self._idle_since = None
+        self._threshold_reached = False
+        if self._scheduler is not None:
+            self._scheduler.cancel(self._threshold_handle)
+            self._threshold_handle = None
     
-    def update(self, is_actually_idle):
+    def _on_threshold(self):
+        self._threshold_handle = None
+        self._threshold_reached = True
+    
+    def update(self, is_actually_idle, now=None):
         """更新空闲时间状态
         
         Args:
             is_actually_idle: 布尔值，表示当前是否真的处于空闲状态
+            now: 当前时间（单调时钟，秒），默认读取时钟
         
         Returns:
             tuple: (是否进入空闲状态, 是否离开空闲状态)
         """
-        current_time = time.time()
-        delta_time = current_time - self.last_update_time
+        current_time = self._clock() if now is None else now
         self.last_update_time = current_time
         
         was_idle = self.is_idle
         
         if is_actually_idle:
-            self.idle_time += delta_time
-            if self.idle_time >= self.idle_threshold:
-                self.is_idle = True
-            else:
-                self.is_idle = False
+            if self._idle_since is None:
+                self._arm_threshold(current_time)
+            self.idle_time = current_time - self._idle_since
+            if self._scheduler is None:
+                self._threshold_reached = self.idle_time >= self.idle_threshold
+            self.is_idle = self._threshold_reached
         else:
+            self._disarm_threshold()
             self.idle_time = 0
             self.is_idle = False
         
@@ -42,6 +78,8 @@ class IdleTimeTracker:
         """重置空闲时间"""
         self.idle_time = 0
         self.is_idle = False
+        if self._idle_since is not None:
+            self._arm_threshold(self._clock())
     
     def set_threshold(self, threshold):
         """设置空闲时间阈值
@@ -50,6 +88,36 @@ class IdleTimeTracker:
             threshold: 空闲时间阈值（秒）
         """
         self.idle_threshold = threshold
+        if self._idle_since is not None and self._scheduler is not None:
+            remaining = max(0.0, threshold - (self._clock() - self._idle_since))
+            self._scheduler.cancel(self._threshold_handle)
+            self._threshold_handle = self._scheduler.call_later(remaining, self._on_threshold)
+    
+    def get_state(self):
+        """返回可序列化的状态 (空闲时间, 已开始空闲的秒数, 是否空闲, 阈值, 是否已到达阈值)
+        
+        开始空闲的时间保存为相对值（不空闲时为 -1），可以在另一个进程中恢复。
+        """
+        now = self._clock()
+        since = now - self._idle_since if self._idle_since is not None else -1.0
+        return (self.idle_time, since, self.is_idle, self.idle_threshold, self._threshold_reached)
+    
+    def set_state(self, state):
+        """恢复 get_state() 返回的状态，并重新注册剩余的阈值事件"""
+        self.idle_time, since, self.is_idle, self.idle_threshold, reached = state
+        now = self._clock()
+        self.last_update_time = now
+        if since < 0:
+            self._disarm_threshold()
+            return
+        self._idle_since = now - since
+        self._threshold_reached = reached
+        if self._scheduler is not None:
+            self._scheduler.cancel(self._threshold_handle)
+            self._threshold_handle = None
+            if not reached:
+                self._threshold_handle = self._scheduler.call_later(max(0.0, self.idle_threshold - since),
+                                                                    self._on_threshold)
     
     def get_idle_time(self):
         """获取当前的空闲时间
@@ -65,4 +133,50 @@ class IdleTimeTracker:
         Returns:
             bool: 当前是否处于空闲状态
         """
-        return self.is_idle
\ No newline at end of file
+        return self.is_idle
+
+
+def percentile(sorted_values, p):
+    """计算已排序序列的百分位数（线性插值）
+    
+    Args:
+        sorted_values: 已升序排列的数值序列
+        p: 百分位（0-100）
+    
+    Returns:
+        float: 百分位数，序列为空时返回0
+    """
+    n = len(sorted_values)
+    if n == 0:
+        return 0.0
+    if n == 1:
+        return float(sorted_values[0])
+    k = (n - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, n - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+@contextmanager
+def temporary_home():
+    """在临时目录中运行（设置、快照和各种缓存都位于 ~/.desktopet）
+
+    基准测试和回放脚本使用，避免读取或覆盖用户自己的设置。
+    退出时恢复原来的环境变量并删除临时目录。
+
+    Yields:
+        str: 临时主目录
+    """
+    names = ("HOME", "USERPROFILE")
+    saved = {name: os.environ.get(name) for name in names}
+    with tempfile.TemporaryDirectory(prefix="desktopet-home-") as home:
+        for name in names:
+            os.environ[name] = home
+        try:
+            yield home
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value